@@ -1,29 +1,79 @@
 import json
 import os
-import webbrowser
-from datetime import datetime
-import tkinter as tk
-from tkinter import messagebox, simpledialog, Toplevel, scrolledtext
+import sys
+import csv
+import hmac
+import itertools
+import unicodedata
+import bisect
+import gzip
+import string
+import hashlib
+import heapq
+import html
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Sequence
+from email.utils import formatdate, parsedate_to_datetime
+from datetime import date, datetime, timedelta
 from urllib.parse import quote
 import subprocess
-import qrcode
+import time
+import queue
+import selectors
+import socket
+import sqlite3
+import argparse
+import signal
 from http.server import BaseHTTPRequestHandler, HTTPServer
+from concurrent.futures import ThreadPoolExecutor
 import threading
 from urllib.parse import urlparse, parse_qs
-from pyngrok import ngrok
+try:
+    # Facoltativo: se installato, le risorse di testo vengono servite anche compresse con brotli
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import fcntl
+except ImportError:
+    # Windows: il blocco della cartella dei dati usa msvcrt (vedi BloccoCartellaDati)
+    fcntl = None
+    import msvcrt
 
-# Variabile globale per il lock
-checkin_lock = threading.Lock()
+# Lock globale per le operazioni Git (pubblicatore in background e pulsante manuale)
+git_lock = threading.Lock()
 # Variabile globale per l'URL pubblico di ngrok
 public_url = None
+# Esecutore delle operazioni lente avviate dalla GUI (creato in avvia_gui)
+esecutore_gui = None
+# Moduli di Tkinter: si importano solo all'avvio dell'interfaccia grafica (vedi importa_moduli_gui),
+# così il server e i comandi da terminale funzionano anche senza display e partono prima.
+# Allo stesso modo pyngrok, qrcode e webbrowser si importano solo dove servono.
+tk = messagebox = simpledialog = filedialog = Toplevel = scrolledtext = ttk = None
+
+# --- Notifiche all'utente da qualsiasi thread ---
+# Tk non è thread-safe: i thread del server e quelli in background non aprono finestre,
+# accodano il messaggio e la finestra principale lo mostra dal proprio thread (vedi EsecutoreGUI).
+coda_notifiche = queue.Queue(maxsize=100)
+
+def notifica_utente(titolo, messaggio, errore=False):
+    """Accoda un messaggio per l'utente e ritorna subito; può essere chiamata da qualsiasi thread."""
+    # Sulla console va su stderr: stdout resta per l'output dei comandi da terminale (es. esporta)
+    print(f"{titolo}: {messaggio}", file=sys.stderr)
+    try:
+        coda_notifiche.put_nowait((titolo, messaggio, errore))
+    except queue.Full:
+        # Senza una finestra che svuoti la coda i messaggi restano solo sulla console
+        pass
 
 # --- Funzione globale per il caricamento su GitHub ---
-def carica_su_github():
+def esegui_comandi_git():
     """
-    Carica i file del report HTML su GitHub.
-    Gestisce in modo più robusta gli errori di Git.
+    Esegue add, commit e push del repository.
+    Solleva le eccezioni di subprocess: la gestione degli errori spetta al chiamante.
     """
-    try:
+    with git_lock:
         # Aggiunge i file al repository Git
         # Usiamo "." per aggiungere tutti i file modificati, inclusi index.html e logo.
         subprocess.run(["git", "add", "."], check=True, capture_output=True, text=True, timeout=30)
@@ -33,7 +83,14 @@ def carica_su_github():
         
         # Esegue il push al repository remoto
         subprocess.run(["git", "push"], check=True, capture_output=True, text=True, timeout=60)
-        
+
+def carica_su_github():
+    """
+    Carica i file del report HTML su GitHub.
+    Gestisce in modo più robusta gli errori di Git.
+    """
+    try:
+        esegui_comandi_git()
         return True
     except subprocess.CalledProcessError as e:
         error_message = (
@@ -42,280 +99,921 @@ def carica_su_github():
             f"Codice di uscita: {e.returncode}\n"
             f"Messaggio di errore:\n{e.stderr}"
         )
-        messagebox.showerror("Errore GitHub", error_message)
+        notifica_utente("Errore GitHub", error_message, errore=True)
     except FileNotFoundError:
-        messagebox.showerror("Errore Git", "Errore: Git non è stato trovato. Assicurati che sia installato e configurato correttamente.")
+        notifica_utente("Errore Git", "Errore: Git non è stato trovato. Assicurati che sia installato e configurato correttamente.", errore=True)
     except subprocess.TimeoutExpired:
-        messagebox.showerror("Errore Git", "Errore: L'operazione Git è andata in timeout. Prova a verificare la tua connessione internet o le dimensioni del repository.")
+        notifica_utente("Errore Git", "Errore: L'operazione Git è andata in timeout. Prova a verificare la tua connessione internet o le dimensioni del repository.", errore=True)
     except Exception as e:
-        messagebox.showerror("Errore Inaspettato", f"Si è verificato un errore inaspettato durante il caricamento su GitHub: {e}")
+        notifica_utente("Errore Inaspettato", f"Si è verificato un errore inaspettato durante il caricamento su GitHub: {e}", errore=True)
     return False
 
-class ClassificaManager:
-    def __init__(self, filename="classifica_apex_data.json"):
+# --- Pubblicazione su GitHub in background ---
+class PubblicatoreGitHub(threading.Thread):
+    def __init__(self, intervallo_minimo=30):
         """
-        Gestisce la classifica dei collaboratori per l'Apex Challenge.
+        Esegue il caricamento su GitHub in un thread separato, fuori dal percorso del check-in.
+        Le richieste arrivate a raffica vengono accorpate in un unico commit+push,
+        con al massimo un push ogni `intervallo_minimo` secondi.
         """
-        self.filename = filename
-        self.dati_collaboratori = {}
-        self.punti_azioni = {
-            "Meeting day": 50,
-            "Change your life": 50,
-            "Incentive da 5": 50,
-            "Collaboratore diretto": 100,
-            "Ospite step one": 25,
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.intervallo_minimo = intervallo_minimo
+        self.coda = queue.Queue()
+        self._in_chiusura = threading.Event()
+        self._ultimo_push = None
+        self.ultima_latenza = None
+        self.ultimo_errore = None
+        self.pubblicazioni = 0
+        self.richieste_accorpate = 0
+
+    def richiedi_pubblicazione(self):
+        """Accoda una richiesta di pubblicazione e ritorna subito."""
+        self.coda.put(time.monotonic())
+
+    def stato(self):
+        """Restituisce profondità della coda e statistiche dell'ultima pubblicazione."""
+        return {
+            "in_coda": self.coda.qsize(),
+            "ultima_latenza": self.ultima_latenza,
+            "pubblicazioni": self.pubblicazioni,
+            "richieste_accorpate": self.richieste_accorpate,
+            "ultimo_errore": self.ultimo_errore,
         }
-        self.carica_dati()
 
-    def salva_cronologia(self):
+    def run(self):
+        while True:
+            richiesta = self.coda.get()
+            if richiesta is None:
+                break
+
+            # Rispetta l'intervallo minimo tra due push (salvo chiusura in corso)
+            if self._ultimo_push is not None:
+                attesa = self._ultimo_push + self.intervallo_minimo - time.monotonic()
+                if attesa > 0:
+                    self._in_chiusura.wait(attesa)
+
+            # Tutte le richieste arrivate nel frattempo confluiscono in un unico push
+            accorpate = 1
+            fermati = False
+            while True:
+                try:
+                    altra = self.coda.get_nowait()
+                except queue.Empty:
+                    break
+                if altra is None:
+                    fermati = True
+                else:
+                    accorpate += 1
+
+            self._pubblica(accorpate)
+            if fermati:
+                break
+
+    def _pubblica(self, accorpate):
+        inizio = time.monotonic()
+        try:
+            esegui_comandi_git()
+            self.ultimo_errore = None
+        except subprocess.CalledProcessError as e:
+            self.ultimo_errore = f"Comando fallito: {' '.join(e.cmd)} (codice {e.returncode}): {e.stderr.strip()}"
+        except FileNotFoundError:
+            self.ultimo_errore = "Git non è stato trovato."
+        except subprocess.TimeoutExpired:
+            self.ultimo_errore = "L'operazione Git è andata in timeout."
+        except Exception as e:
+            self.ultimo_errore = f"Errore inaspettato: {e}"
+        fine = time.monotonic()
+        self._ultimo_push = fine
+        self.ultima_latenza = fine - inizio
+        self.pubblicazioni += 1
+        self.richieste_accorpate += accorpate - 1
+        if self.ultimo_errore:
+            print(f"Errore durante l'aggiornamento su GitHub: {self.ultimo_errore}")
+        else:
+            print(f"Classifica pubblicata su GitHub in {self.ultima_latenza:.1f}s ({accorpate} richieste accorpate).")
+
+    def ferma(self, timeout=None):
+        """Pubblica le eventuali richieste in sospeso e termina il thread."""
+        self._in_chiusura.set()
+        self.coda.put(None)
+        self.join(timeout)
+
+# --- Giornale degli eventi (write-ahead log) ---
+class GiornaleEventi:
+    def __init__(self, filename="classifica_apex_journal.jsonl"):
         """
-        Salva una copia dei dati della classifica in un file di cronologia,
-        con un timestamp per ogni salvataggio.
+        Registro append-only delle modifiche alla classifica.
+        Ogni evento è una riga JSON, sincronizzata su disco (fsync) prima di confermare l'operazione.
+        Più eventi scritti nello stesso momento condividono una sola fsync (group commit).
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        history_filename = f"cronologia/classifica_apex_data_{timestamp}.json"
-        
-        if not os.path.exists("cronologia"):
-            os.makedirs("cronologia")
+        self.filename = filename
+        self._file = None
+        self._lock_sincronizzazione = threading.Lock()
+        # Fine degli eventi scritti e fine della parte già sincronizzata su disco
+        self._offset_scritto = 0
+        self._offset_durevole = 0
 
-        with open(history_filename, 'w') as f:
-            json.dump(self.dati_collaboratori, f, indent=4)
+    def esiste(self):
+        return os.path.exists(self.filename)
 
-    def standardizza_nome(self, nome_completo):
+    def dimensione(self):
+        return os.path.getsize(self.filename) if self.esiste() else 0
+
+    def leggi(self, offset=0):
         """
-        Standardizza un nome e cognome, rendendoli uniformi (es. '  igor Claudio  previtera' -> 'Igor Claudio Previtera').
-        La funzione rimuove gli spazi in eccesso e mette ogni parola in maiuscolo, senza cambiarne l'ordine.
+        Restituisce gli eventi a partire dalla posizione `offset` (in byte), come coppie
+        (evento, offset_successivo). Un'ultima riga troncata da un crash viene ignorata.
         """
-        return " ".join(word.capitalize() for word in nome_completo.strip().split())
+        if not self.esiste():
+            return
+        with open(self.filename, 'rb') as f:
+            f.seek(offset)
+            for riga in f:
+                if not riga.endswith(b"\n"):
+                    break
+                try:
+                    evento = json.loads(riga)
+                except json.JSONDecodeError:
+                    break
+                offset += len(riga)
+                yield evento, offset
 
-    def cerca_collaboratore_flessibile(self, nome_input):
+    def tronca(self, offset):
+        """Elimina tutto ciò che segue `offset` (es. una riga scritta a metà)."""
+        self.chiudi()
+        with open(self.filename, 'r+b') as f:
+            f.truncate(offset)
+        self._offset_scritto = self._offset_durevole = offset
+
+    def ruota(self, destinazione):
         """
-        Cerca un collaboratore esistente in modo flessibile.
-        Restituisce il nome standardizzato del collaboratore trovato o None se non c'è corrispondenza.
+        Sposta gli eventi scritti finora nel file `destinazione` (un segmento chiuso) e riparte
+        con un giornale vuoto, creato alla prossima scrittura.
         """
-        nome_input_std = self.standardizza_nome(nome_input)
-        
-        # 1. Cerca corrispondenza esatta con il nome standardizzato
-        if nome_input_std in self.dati_collaboratori:
-            return nome_input_std
-        
-        # 2. Cerca corrispondenza flessibile (parole in qualsiasi ordine)
-        input_parole = sorted(nome_input_std.lower().split())
-        for nome_esistente in self.dati_collaboratori.keys():
-            nome_esistente_parole = sorted(nome_esistente.lower().split())
-            if input_parole == nome_esistente_parole:
-                return nome_esistente
-        
-        return None
+        self.chiudi()
+        os.makedirs(os.path.dirname(destinazione), exist_ok=True)
+        os.replace(self.filename, destinazione)
+        self._offset_scritto = self._offset_durevole = 0
 
-    def modifica_nome_collaboratore(self, nome_attuale, nuovo_nome):
+    def scrivi(self, evento, durevole=True):
         """
-        Modifica il nome di un collaboratore e aggiorna i dati.
+        Accoda un evento e restituisce l'offset di fine giornale.
+        Con durevole=False l'evento è solo consegnato al sistema operativo: il chiamante
+        deve poi attendere rendi_durevole(offset), tipicamente dopo aver rilasciato i lock.
         """
-        nome_attuale_std = self.standardizza_nome(nome_attuale)
-        nuovo_nome_std = self.standardizza_nome(nuovo_nome)
+        if self._file is None:
+            self._file = open(self.filename, 'ab')
+        riga = json.dumps(evento, ensure_ascii=False, default=serializza_json).encode('utf-8') + b"\n"
+        self._file.write(riga)
+        self._file.flush()
+        offset = self._offset_scritto = self._file.tell()
+        if durevole:
+            self.rendi_durevole(offset)
+        return offset
 
-        if nome_attuale_std in self.dati_collaboratori:
-            # Controllo per evitare sovrascritture accidentali
-            if nuovo_nome_std in self.dati_collaboratori and nuovo_nome_std != nome_attuale_std:
-                return False, f"Errore: Il nome '{nuovo_nome_std}' esiste già."
-            
-            self.dati_collaboratori[nuovo_nome_std] = self.dati_collaboratori.pop(nome_attuale_std)
-            self.salva_dati()
-            self.salva_cronologia()
-            self.genera_report_html_e_carica()
-            return True, f"Nome '{nome_attuale_std}' modificato in '{nuovo_nome_std}'."
-        return False, f"Errore: Il collaboratore '{nome_attuale_std}' non esiste."
-        
-    def trova_ultimo_backup(self, history_folder="cronologia"):
+    def rendi_durevole(self, offset):
         """
-        Trova il file di backup più recente nella cartella cronologia.
-        Restituisce il percorso completo del file o None se non ne trova.
+        Attende che il giornale sia su disco almeno fino a `offset`.
+        Chi esegue la fsync copre anche gli eventi scritti dagli altri thread nel frattempo:
+        i thread in coda trovano il proprio evento già sincronizzato e non ripetono la fsync.
         """
-        if not os.path.exists(history_folder):
-            return None
-        
-        list_of_files = [os.path.join(history_folder, f) for f in os.listdir(history_folder) if f.startswith("classifica_apex_data_")]
-        if not list_of_files:
-            return None
-            
-        latest_file = max(list_of_files, key=os.path.getctime)
-        return latest_file
+        with self._lock_sincronizzazione:
+            if self._offset_durevole >= offset or self._file is None:
+                return
+            fine = self._offset_scritto
+            os.fsync(self._file.fileno())
+            self._offset_durevole = fine
 
-    def carica_dati(self):
+    def chiudi(self):
+        with self._lock_sincronizzazione:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._offset_durevole = self._offset_scritto
+
+# --- Archivio delle istantanee (cronologia) ---
+# Conservazione delle istantanee per fasce di età: (età massima, intervallo tra due istantanee
+# conservate). Nella stessa fascia e nello stesso intervallo si conserva la più recente.
+POLITICA_CONSERVAZIONE = [
+    (timedelta(hours=24), None),                # tutte, per le ultime 24 ore
+    (timedelta(days=30), timedelta(hours=1)),   # una all'ora fino a 30 giorni
+    (None, timedelta(days=1)),                  # poi una al giorno
+]
+
+def istantanee_da_conservare(momenti, politica, adesso):
+    """
+    Restituisce le posizioni delle istantanee (momenti in ordine crescente) da conservare
+    secondo la politica. La più recente viene sempre conservata.
+    """
+    conservate = set()
+    ultime_per_intervallo = {}
+    for posizione, momento in enumerate(momenti):
+        data = datetime.fromisoformat(momento)
+        eta = adesso - data
+        for fascia, (eta_massima, intervallo) in enumerate(politica):
+            if eta_massima is None or eta <= eta_massima:
+                break
+        else:
+            continue  # più vecchia di tutte le fasce: non viene conservata
+        if intervallo is None:
+            conservate.add(posizione)
+        else:
+            # I momenti sono crescenti: l'ultima assegnata a un intervallo è la più recente
+            ultime_per_intervallo[(fascia, (data - _EPOCA) // intervallo)] = posizione
+    conservate.update(ultime_per_intervallo.values())
+    if momenti:
+        conservate.add(len(momenti) - 1)
+    return conservate
+
+def segmento_da_conservare(inizio, fine, punti_prima, punti_conservati):
+    """
+    Vero se gli eventi con seq in (inizio, fine] servono ancora dopo la conservazione.
+    Si riapplicano a partire dal punto di ripresa `inizio`, quindi restano finché quell'istantanea
+    è conservata; se `inizio` non era un punto di ripresa (eventi registrati prima delle istantanee
+    con seq) restano finché è conservata l'istantanea `fine`.
+    """
+    if inizio in punti_prima:
+        return inizio in punti_conservati
+    return fine in punti_conservati
+
+# Mappe nome -> blocco delle istantanee passate tenute in memoria (classifiche a un momento passato)
+ISTANTANEE_MEMORIZZATE = 8
+
+class ArchivioIstantanee:
+    # Prefisso e formato dei file di cronologia scritti dalle versioni precedenti
+    PREFISSO_LEGACY = "classifica_apex_data_"
+    FORMATO_LEGACY = "%Y-%m-%d_%H-%M-%S"
+
+    def __init__(self, cartella="cronologia", intervallo_chiave=50):
         """
-        Carica i dati della classifica da un file JSON.
-        Se il caricamento fallisce, tenta un ripristino automatico dall'ultimo backup.
+        Cronologia della classifica senza copie ripetute dei dati.
+        Le azioni di ogni collaboratore sono salvate in un blocco indirizzato dal proprio
+        hash (blocchi/<hash>.json): un blocco identico viene scritto una sola volta.
+        L'indice istantanee.jsonl registra per ogni istantanea solo i blocchi cambiati
+        rispetto alla precedente, con un'istantanea completa ("chiave") ogni
+        `intervallo_chiave` istantanee per limitare le righe da leggere in un ripristino.
+        Ogni riga riporta anche il punteggio dei blocchi che introduce e, per le istantanee
+        salvate a una compattazione, il numero dell'ultimo evento del giornale che contengono
+        ("seq"): sono i punti di ripresa da cui si riapplicano solo gli eventi successivi.
         """
-        caricato_con_successo = False
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    self.dati_collaboratori = json.load(f)
-                caricato_con_successo = True
-            except json.JSONDecodeError:
-                # Il file principale è corrotto, tenta il ripristino
-                messagebox.showerror("Errore Caricamento", f"Errore: Il file '{self.filename}' è corrotto. Tentativo di ripristino automatico dall'ultimo backup...")
-                
-        if not caricato_con_successo:
-            ultimo_backup = self.trova_ultimo_backup()
-            if ultimo_backup:
+        self.cartella = cartella
+        self.cartella_blocchi = os.path.join(cartella, "blocchi")
+        self.indice = os.path.join(cartella, "istantanee.jsonl")
+        self.intervallo_chiave = intervallo_chiave
+        # Le letture della cronologia (classifiche passate) avvengono in parallelo al salvataggio
+        # delle istantanee e alla conservazione, che riscrive l'indice e cancella blocchi
+        self._lock = threading.RLock()
+        # Per ogni istantanea: momento, offset della riga nell'indice, posizione dell'ultima chiave,
+        # seq dell'ultimo evento contenuto (None per le istantanee senza giornale)
+        self._momenti = []
+        self._offset = []
+        self._chiavi = []
+        self._seq = []
+        # Blocchi dell'ultima istantanea: nome -> hash
+        self._ultimo = {}
+        self._fine_indice = 0
+        # Mappe nome -> hash delle istantanee lette di recente (posizione -> blocchi)
+        self._blocchi_recenti = OrderedDict()
+        # Punteggio contenuto in ogni blocco letto: un blocco non cambia mai, il totale resta valido
+        self._punti_blocchi = {}
+        self._leggi_indice()
+
+    def _leggi_indice(self):
+        self._momenti, self._offset, self._chiavi, self._seq = [], [], [], []
+        self._ultimo = {}
+        self._fine_indice = 0
+        self._blocchi_recenti.clear()
+        if not os.path.exists(self.indice):
+            return
+        offset = 0
+        ultima_chiave = None
+        with open(self.indice, 'rb') as f:
+            for riga in f:
+                if not riga.endswith(b"\n"):
+                    break
                 try:
-                    with open(ultimo_backup, 'r') as f:
-                        self.dati_collaboratori = json.load(f)
-                    
-                    # Sovrascrivi il file principale con i dati del backup
-                    self.salva_dati()
-                    messagebox.showinfo("Ripristino", f"Ripristino automatico riuscito!\nI dati sono stati recuperati da:\n'{os.path.basename(ultimo_backup)}'")
-                except (json.JSONDecodeError, FileNotFoundError):
-                    messagebox.showerror("Errore Ripristino", "Errore: Impossibile caricare il backup. La classifica verrà inizializzata vuota.")
-                    self.dati_collaboratori = {}
-            else:
-                messagebox.showinfo("Avviso", "Nessun backup trovato. La classifica verrà inizializzata vuota.")
-                self.dati_collaboratori = {}
+                    voce = json.loads(riga)
+                except json.JSONDecodeError:
+                    break
+                if voce.get("chiave"):
+                    ultima_chiave = len(self._momenti)
+                if ultima_chiave is None:
+                    break
+                self._momenti.append(voce["ts"])
+                self._offset.append(offset)
+                self._chiavi.append(ultima_chiave)
+                self._seq.append(voce.get("seq"))
+                self._punti_blocchi.update(voce.get("punti", ()))
+                offset += len(riga)
+        self._fine_indice = offset
+        if self._momenti:
+            self._ultimo = self._blocchi_di(len(self._momenti) - 1)
+
+    def __len__(self):
+        return len(self._momenti)
 
-    def salva_dati(self):
+    def momenti(self):
+        """Restituisce i momenti ('YYYY-MM-DD HH:MM:SS') delle istantanee, dal più vecchio."""
+        return list(self._momenti)
+
+    def _percorso_blocco(self, impronta):
+        return os.path.join(self.cartella_blocchi, impronta[:2], impronta + ".json")
+
+    def _scrivi_blocco(self, azioni):
         """
-        Salva i dati della classifica in un file JSON.
+        Scrive il blocco in modo atomico e durevole prima che l'indice vi faccia riferimento.
+        Un blocco già presente si riscrive solo se il contenuto non corrisponde al nome (ad esempio
+        un file rimasto vuoto da un'interruzione delle versioni precedenti).
         """
-        with open(self.filename, 'w') as f:
-            json.dump(self.dati_collaboratori, f, indent=4)
+        contenuto = json.dumps(azioni, ensure_ascii=False, separators=(",", ":"), default=serializza_json).encode("utf-8")
+        impronta = hashlib.sha1(contenuto).hexdigest()
+        percorso = self._percorso_blocco(impronta)
+        try:
+            with open(percorso, 'rb') as f:
+                integro = hashlib.sha1(f.read()).hexdigest() == impronta
+        except FileNotFoundError:
+            integro = False
+        if not integro:
+            crea_cartella_durevole(os.path.dirname(percorso))
+            scrivi_file_atomico(percorso, contenuto)
+        return impronta
 
-    def aggiungi_azione(self, nome_collaboratore_standardizzato, azione, quantita=1):
+    def salva(self, dati, cambiati=None, momento=None, seq=None):
         """
-        Aggiunge l'azione specificata al collaboratore con il nome standardizzato.
-        Gestisce l'aggiunta di più punti in una volta sola per azioni specifiche.
-        
-        *** MODIFICATO PER GESTIRE LA DUPLICAZIONE DEI PUNTI MEETING DAY ***
+        Registra un'istantanea di `dati` ({nome: [azioni]}).
+        Se `cambiati` è indicato, solo quei collaboratori (e quelli nuovi) vengono
+        riserializzati; per gli altri si riusa il blocco dell'istantanea precedente.
+        `seq` è il numero dell'ultimo evento del giornale contenuto nei dati, se noto.
+        Restituisce il momento registrato.
         """
-        # Acquisisci il lock per evitare race condition durante la scrittura
-        checkin_lock.acquire()
-        try:
-            punti_da_aggiungere = self.punti_azioni.get(azione, 0)
-            
-            if punti_da_aggiungere == 0:
-                return f"Errore: Azione '{azione}' non riconosciuta."
-            
-            # Se l'azione è "Meeting day", controlla se è già stata registrata oggi
-            if azione == 'Meeting day':
-                oggi_str = datetime.now().strftime("%Y-%m-%d")
-                if nome_collaboratore_standardizzato in self.dati_collaboratori:
-                    for entry in self.dati_collaboratori[nome_collaboratore_standardizzato]:
-                        if entry['azione'] == 'Meeting day' and entry['data'].startswith(oggi_str):
-                            # Trovata una voce, non aggiungere e restituisci errore
-                            return f"Errore: {nome_collaboratore_standardizzato} ha già effettuato il check-in per il Meeting day di oggi."
-
-            # Se il collaboratore non esiste, viene creato
-            if nome_collaboratore_standardizzato not in self.dati_collaboratori:
-                self.dati_collaboratori[nome_collaboratore_standardizzato] = []
-
-            # Aggiunge l'azione il numero di volte specificato
-            for _ in range(quantita):
-                self.dati_collaboratori[nome_collaboratore_standardizzato].append({
-                    "azione": azione,
-                    "punti": punti_da_aggiungere,
-                    "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-
-            self.salva_dati()
-            self.salva_cronologia()
-            self.genera_report_html_e_carica()
-            
-            if quantita > 1:
-                return f"Aggiunta l'azione '{azione}' a {nome_collaboratore_standardizzato} per {quantita} volte. (+{punti_da_aggiungere * quantita} punti totali)."
+        with self._lock:
+            return self._salva(dati, cambiati, momento, seq)
+
+    def _salva(self, dati, cambiati, momento, seq):
+        momento = momento or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        blocchi = {}
+        for nome, azioni in dati.items():
+            if cambiati is None or nome in cambiati or nome not in self._ultimo:
+                impronta = blocchi[nome] = self._scrivi_blocco(azioni)
+                self._punti_blocchi[impronta] = azioni.totale_punti() if isinstance(azioni, AzioniCompatte) else sum(voce["punti"] for voce in azioni)
             else:
-                return f"Aggiunta l'azione '{azione}' a {nome_collaboratore_standardizzato} (+{punti_da_aggiungere} punti)."
-        finally:
-            # Rilascia il lock
-            checkin_lock.release()
-        
-    def elimina_riga(self, nome_collaboratore, indice_riga):
+                blocchi[nome] = self._ultimo[nome]
+
+        chiave = not self._momenti or len(self._momenti) - self._chiavi[-1] >= self.intervallo_chiave
+        voce = self._voce_indice(momento, seq, blocchi, None if chiave else self._ultimo)
+        crea_cartella_durevole(self.cartella)
+        nuovo_indice = not os.path.exists(self.indice)
+        riga = json.dumps(voce, ensure_ascii=False).encode("utf-8") + b"\n"
+        with open(self.indice, 'ab') as f:
+            # Un'eventuale riga scritta a metà da un'interruzione viene sovrascritta
+            f.truncate(self._fine_indice)
+            f.write(riga)
+            # La riga è su disco prima che il file principale e la rotazione del giornale vi si affidino
+            f.flush()
+            os.fsync(f.fileno())
+        if nuovo_indice:
+            sincronizza_cartella(self.cartella)
+        self._momenti.append(momento)
+        self._offset.append(self._fine_indice)
+        self._chiavi.append(len(self._momenti) - 1 if chiave else self._chiavi[-1])
+        self._seq.append(seq)
+        self._fine_indice += len(riga)
+        self._ultimo = blocchi
+        return momento
+
+    def _voce_indice(self, momento, seq, blocchi, precedente):
         """
-        Elimina una riga specifica dall'elenco delle azioni di un collaboratore.
-        L'indice della riga parte da 0.
+        Riga dell'indice per un'istantanea: completa ("chiave") se `precedente` è None,
+        altrimenti con i soli blocchi cambiati rispetto a `precedente`. I punti dei blocchi
+        introdotti permettono di calcolare i punteggi senza aprirli.
         """
-        nome = self.standardizza_nome(nome_collaboratore)
-        
-        if nome not in self.dati_collaboratori:
-            return False, f"Errore: Il collaboratore '{nome}' non esiste."
-        
-        if not (0 <= indice_riga < len(self.dati_collaboratori[nome])):
-            return False, f"Errore: L'indice di riga {indice_riga + 1} non è valido per il collaboratore '{nome}'."
+        if precedente is None:
+            voce = {"ts": momento, "chiave": True, "blocchi": blocchi}
+            introdotti = blocchi
+        else:
+            introdotti = {nome: impronta for nome, impronta in blocchi.items() if precedente.get(nome) != impronta}
+            voce = {"ts": momento, "modificati": introdotti, "rimossi": [nome for nome in precedente if nome not in blocchi]}
+        if seq is not None:
+            voce["seq"] = seq
+        voce["punti"] = {impronta: self._punti_blocchi[impronta] for impronta in introdotti.values() if impronta in self._punti_blocchi}
+        return voce
 
-        azione_rimossa = self.dati_collaboratori[nome].pop(indice_riga)
-        self.salva_dati()
-        self.salva_cronologia()
-        self.genera_report_html_e_carica()
-        
-        return True, f"Rimossa l'azione '{azione_rimossa['azione']}' del collaboratore {nome} (rimossi {azione_rimossa['punti']} punti)."
-        
-    def elimina_collaboratore(self, nome_collaboratore):
+    def _blocchi_di(self, posizione):
+        """Ricostruisce la mappa nome -> hash dell'istantanea in `posizione`, partendo dalla chiave precedente."""
+        blocchi = {}
+        with open(self.indice, 'rb') as f:
+            f.seek(self._offset[self._chiavi[posizione]])
+            for _ in range(posizione - self._chiavi[posizione] + 1):
+                voce = json.loads(f.readline())
+                if voce.get("chiave"):
+                    blocchi = dict(voce["blocchi"])
+                else:
+                    blocchi.update(voce["modificati"])
+                    for nome in voce["rimossi"]:
+                        blocchi.pop(nome, None)
+        return blocchi
+
+    def ripristina(self, momento):
         """
-        Elimina un collaboratore e tutti i suoi dati dalla classifica.
+        Restituisce i dati ({nome: [azioni]}) dell'ultima istantanea registrata entro `momento`,
+        o None se non ce ne sono.
         """
-        nome = self.standardizza_nome(nome_collaboratore)
-        if nome in self.dati_collaboratori:
-            del self.dati_collaboratori[nome]
-            self.salva_dati()
-            self.salva_cronologia()
-            self.genera_report_html_e_carica()
-            return True, f"Collaboratore '{nome}' eliminato con successo."
+        with self._lock:
+            blocchi = self._blocchi_al(momento)
+            return None if blocchi is None else self.dati_blocchi(blocchi)
+
+    def _blocchi_al(self, momento):
+        """Mappa nome -> hash dell'ultima istantanea entro `momento` (None se non ce ne sono), con una piccola cache."""
+        posizione = bisect.bisect_right(self._momenti, momento) - 1
+        return None if posizione < 0 else self._blocchi_in(posizione)
+
+    def _blocchi_in(self, posizione):
+        if posizione == len(self._momenti) - 1:
+            return self._ultimo
+        blocchi = self._blocchi_recenti.get(posizione)
+        if blocchi is None:
+            blocchi = self._blocchi_recenti[posizione] = self._blocchi_di(posizione)
+            if len(self._blocchi_recenti) > ISTANTANEE_MEMORIZZATE:
+                self._blocchi_recenti.popitem(last=False)
         else:
-            return False, f"Errore: Il collaboratore '{nome}' non esiste."
-        
-    def calcola_punteggio_totale(self, nome_collaboratore):
+            self._blocchi_recenti.move_to_end(posizione)
+        return blocchi
+
+    def punto_di_ripresa(self, momento=None):
         """
-        Calcola il punteggio totale di un collaboratore.
+        Restituisce (seq, mappa nome -> hash) dell'ultima istantanea entro `momento` (la più recente
+        se None) salvata a una compattazione, cioè con il numero dell'ultimo evento che contiene;
+        None se non ce ne sono. Lo stato a `momento` si ottiene riapplicando gli eventi successivi.
         """
-        return sum(item['punti'] for item in self.dati_collaboratori.get(nome_collaboratore, []))
+        with self._lock:
+            posizione = len(self._momenti) if momento is None else bisect.bisect_right(self._momenti, momento)
+            for posizione in range(posizione - 1, -1, -1):
+                if self._seq[posizione] is not None:
+                    return self._seq[posizione], self._blocchi_in(posizione)
+            return None
 
-    def mostra_classifica(self):
+    def punti_di_ripresa(self):
+        """Come punto_di_ripresa, per ogni istantanea salvata a una compattazione, dalla più recente."""
+        for posizione in range(len(self._seq) - 1, -1, -1):
+            with self._lock:
+                if posizione < len(self._seq) and self._seq[posizione] is not None:
+                    yield self._seq[posizione], self._blocchi_in(posizione)
+
+    def seq_istantanee(self):
+        """Restituisce i seq delle istantanee salvate a una compattazione, dalla più vecchia."""
+        return [seq for seq in self._seq if seq is not None]
+
+    def azioni_blocco(self, impronta):
         """
-        Ordina i collaboratori per punteggio decrescente e restituisce la classifica come lista di stringhe.
+        Restituisce le azioni ([{"azione", "punti", "data"}]) contenute nel blocco.
+        Solleva ValueError se il contenuto non corrisponde all'hash del nome (blocco danneggiato).
         """
-        if not self.dati_collaboratori:
-            return ["La classifica è vuota."]
-        
-        punteggi_totali = {nome: self.calcola_punteggio_totale(nome) for nome in self.dati_collaboratori}
-        classifica_ordinata = sorted(punteggi_totali.items(), key=lambda item: item[1], reverse=True)
+        with open(self._percorso_blocco(impronta), 'rb') as f:
+            contenuto = f.read()
+        if hashlib.sha1(contenuto).hexdigest() != impronta:
+            raise ValueError(f"Blocco della cronologia danneggiato: {impronta}")
+        return json.loads(contenuto)
 
-        classifica_list = [f"--- CLASSIFICA APEX CHALLENGE ---"]
-        posizione = 1
-        for nome, punteggio in classifica_ordinata:
-            classifica_list.append(f"{posizione}. {nome}: {punteggio} punti")
-            posizione += 1
-        classifica_list.append("----------------------------------")
-        return classifica_list
+    def punti_blocco(self, impronta):
+        """
+        Punteggio contenuto nel blocco. I blocchi sono indirizzati dal loro hash e non cambiano mai:
+        il totale si legge dall'indice o, per le istantanee che non lo riportano, una volta sola dal blocco.
+        """
+        punti = self._punti_blocchi.get(impronta)
+        if punti is None:
+            punti = self._punti_blocchi[impronta] = sum(voce["punti"] for voce in self.azioni_blocco(impronta))
+        return punti
 
-    def mostra_dettaglio_classifica(self, nome_collaboratore):
+    def dati_blocchi(self, blocchi):
+        """Legge i blocchi di una mappa nome -> hash e restituisce i dati ({nome: [azioni]})."""
+        return {nome: self.azioni_blocco(impronta) for nome, impronta in blocchi.items()}
+
+    def punteggi_al(self, momento):
         """
-        Restituisce un report dettagliato delle azioni di un collaboratore come lista di stringhe.
+        Restituisce il punteggio di ogni collaboratore ({nome: punti}) nell'ultima istantanea
+        entro `momento`, o None se non ce ne sono.
         """
-        nome = self.standardizza_nome(nome_collaboratore)
-        if nome not in self.dati_collaboratori:
-            return [f"Errore: Il collaboratore '{nome}' non esiste."]
-        
-        dettaglio_list = [f"--- DETTAGLIO AZIONI DI {nome.upper()} ---"]
-        azioni = self.dati_collaboratori[nome]
-        if not azioni:
-            dettaglio_list.append("Nessuna azione registrata per questo collaboratore.")
-        else:
-            for i, azione in enumerate(azioni):
-                dettaglio_list.append(f"[{i+1}] Azione: {azione['azione']} (+{azione['punti']} punti) - Data: {azione['data']}")
-        dettaglio_list.append(f"\nPunteggio totale: {self.calcola_punteggio_totale(nome)} punti")
-        dettaglio_list.append("----------------------------------")
-        return dettaglio_list
-        
-    def genera_report_html(self):
+        with self._lock:
+            blocchi = self._blocchi_al(momento)
+            return None if blocchi is None else self.punteggi_blocchi(blocchi)
+
+    def punteggi_blocchi(self, blocchi):
+        """Punteggi ({nome: punti}) di una mappa nome -> hash, dai totali dei blocchi senza leggerne le azioni."""
+        with self._lock:
+            return {nome: self.punti_blocco(impronta) for nome, impronta in blocchi.items()}
+
+    def ultima(self):
+        """Restituisce i dati dell'istantanea più recente, o None se l'archivio è vuoto."""
+        return self.ripristina(self._momenti[-1]) if self._momenti else None
+
+    def _tutte_le_istantanee(self):
+        """Scorre l'indice una volta sola restituendo (momento, seq, mappa nome -> hash) per ogni istantanea."""
+        blocchi = {}
+        with open(self.indice, 'rb') as f:
+            for posizione in range(len(self._momenti)):
+                voce = json.loads(f.readline())
+                if voce.get("chiave"):
+                    blocchi = dict(voce["blocchi"])
+                else:
+                    blocchi = dict(blocchi)
+                    blocchi.update(voce["modificati"])
+                    for nome in voce["rimossi"]:
+                        blocchi.pop(nome, None)
+                yield voce["ts"], voce.get("seq"), blocchi
+
+    def applica_conservazione(self, politica=POLITICA_CONSERVAZIONE, adesso=None):
         """
-        Genera un report dettagliato in un file HTML con una grafica personalizzata,
-        inclusi un countdown e la classifica dei collaboratori.
+        Elimina le istantanee escluse dalla politica di conservazione: riscrive l'indice
+        (in un file temporaneo sostituito atomicamente) e cancella i blocchi non più usati.
+        Le copie complete delle versioni precedenti restano: si eliminano solo con pota_file_legacy.
+        Restituisce il numero di istantanee eliminate.
+        """
+        with self._lock:
+            return self._applica_conservazione(politica, adesso)
+
+    def _applica_conservazione(self, politica, adesso):
+        conservate = istantanee_da_conservare(self._momenti, politica, adesso or datetime.now())
+        eliminate = len(self._momenti) - len(conservate)
+        if not eliminate:
+            return 0
+
+        temporaneo = self.indice + ".tmp"
+        usati = set()
+        precedente = None
+        dalla_chiave = 0
+        with open(temporaneo, 'wb') as f:
+            for posizione, (momento, seq, blocchi) in enumerate(self._tutte_le_istantanee()):
+                if posizione not in conservate:
+                    continue
+                usati.update(blocchi.values())
+                if precedente is None or dalla_chiave >= self.intervallo_chiave:
+                    voce = self._voce_indice(momento, seq, blocchi, None)
+                    dalla_chiave = 0
+                else:
+                    voce = self._voce_indice(momento, seq, blocchi, precedente)
+                f.write(json.dumps(voce, ensure_ascii=False).encode("utf-8") + b"\n")
+                precedente = blocchi
+                dalla_chiave += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaneo, self.indice)
+        self._leggi_indice()
+
+        # Raccolta dei blocchi non più referenziati da alcuna istantanea
+        for cartella, _, file in os.walk(self.cartella_blocchi, topdown=False):
+            for nome_file in file:
+                if nome_file[:-len(".json")] not in usati:
+                    os.remove(os.path.join(cartella, nome_file))
+                    self._punti_blocchi.pop(nome_file[:-len(".json")], None)
+            if cartella != self.cartella_blocchi and not os.listdir(cartella):
+                os.rmdir(cartella)
+        return eliminate
+
+    def _file_legacy(self):
+        """Restituisce (momento, nome file) per le copie complete delle versioni precedenti, dalla data nel nome."""
+        if not os.path.isdir(self.cartella):
+            return []
+        file_legacy = []
+        for nome_file in os.listdir(self.cartella):
+            if not (nome_file.startswith(self.PREFISSO_LEGACY) and nome_file.endswith(".json")):
+                continue
+            try:
+                data = datetime.strptime(nome_file[len(self.PREFISSO_LEGACY):-len(".json")], self.FORMATO_LEGACY)
+            except ValueError:
+                continue
+            file_legacy.append((data.strftime("%Y-%m-%d %H:%M:%S"), nome_file))
+        return sorted(file_legacy)
+
+    def pota_file_legacy(self):
+        """Elimina le copie complete non più recenti dell'ultima istantanea: sono già nell'archivio."""
+        if not self._momenti:
+            return 0
+        eliminati = 0
+        for momento, nome_file in self._file_legacy():
+            if momento <= self._momenti[-1]:
+                os.remove(os.path.join(self.cartella, nome_file))
+                eliminati += 1
+        return eliminati
+
+    def ultima_copia_legacy(self):
+        """
+        Come importa_file_legacy, ma senza scrivere nulla: restituisce (momento, dati) della copia
+        completa più recente dell'ultima istantanea, o None.
         """
-        colore_primario = "#0d47a1"
-        colore_secondario = "#ff6f00"
+        for momento, nome_file in reversed(self._file_legacy()):
+            if self._momenti and momento <= self._momenti[-1]:
+                break
+            try:
+                with open(os.path.join(self.cartella, nome_file), 'r') as f:
+                    return momento, json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+        return None
+
+    def importa_file_legacy(self):
+        """
+        Importa le copie complete scritte dalle versioni precedenti (classifica_apex_data_<data>.json)
+        più recenti dell'ultima istantanea. Restituisce il numero di file importati.
+        """
+        importati = 0
+        for momento, nome_file in self._file_legacy():
+            if self._momenti and momento <= self._momenti[-1]:
+                continue
+            try:
+                with open(os.path.join(self.cartella, nome_file), 'r') as f:
+                    dati = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+            self.salva(dati, momento=momento)
+            importati += 1
+        return importati
+
+# --- Rappresentazione compatta delle azioni ---
+# Nomi delle azioni internati: ogni azione viene memorizzata come indice in questa tabella
+_NOMI_AZIONI = []
+_ID_AZIONI = {}
+_EPOCA = datetime(1970, 1, 1)
+
+def id_azione(nome_azione):
+    """Restituisce l'identificativo numerico dell'azione, assegnandone uno nuovo se serve."""
+    identificativo = _ID_AZIONI.get(nome_azione)
+    if identificativo is None:
+        identificativo = _ID_AZIONI[nome_azione] = len(_NOMI_AZIONI)
+        _NOMI_AZIONI.append(nome_azione)
+    return identificativo
 
-        # Legenda dei punti come lista di elementi HTML
-        leggenda_punti_html = """
+def data_a_epoca(data):
+    """Converte una data "AAAA-MM-GG HH:MM:SS" in secondi dal 1970 (senza fuso orario)."""
+    return int((datetime.fromisoformat(data) - _EPOCA).total_seconds())
+
+def epoca_a_data(secondi):
+    # str() di un datetime senza microsecondi produce esattamente "AAAA-MM-GG HH:MM:SS"
+    return str(_EPOCA + timedelta(seconds=secondi))
+
+class AzioniCompatte:
+    """
+    Elenco delle azioni di un collaboratore memorizzato in tre colonne di interi
+    (id dell'azione, punti, data in secondi) invece di un dizionario per azione.
+    Si comporta come la lista di dizionari originale: indicizzazione, iterazione,
+    append/extend/pop restituiscono e accettano voci {"azione", "punti", "data"}.
+    """
+    __slots__ = ("_azioni", "_punti", "_date")
+
+    def __init__(self, voci=()):
+        self._azioni = array("H")
+        self._punti = array("l")
+        self._date = array("q")
+        self.extend(voci)
+
+    @classmethod
+    def da_colonne(cls, azioni, punti, date):
+        compatte = cls()
+        compatte._azioni.extend(azioni)
+        compatte._punti.extend(punti)
+        compatte._date.extend(date)
+        return compatte
+
+    def colonne(self):
+        """Restituisce le tre colonne come liste (id azione, punti, secondi)."""
+        return self._azioni.tolist(), self._punti.tolist(), self._date.tolist()
+
+    def _voce(self, indice):
+        return {"azione": _NOMI_AZIONI[self._azioni[indice]], "punti": self._punti[indice], "data": epoca_a_data(self._date[indice])}
+
+    def __len__(self):
+        return len(self._punti)
+
+    def __iter__(self):
+        for indice in range(len(self._punti)):
+            yield self._voce(indice)
+
+    def __reversed__(self):
+        for indice in range(len(self._punti) - 1, -1, -1):
+            yield self._voce(indice)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._voce(i) for i in range(*indice.indices(len(self._punti)))]
+        return self._voce(range(len(self._punti))[indice])
+
+    def __delitem__(self, indice):
+        del self._azioni[indice]
+        del self._punti[indice]
+        del self._date[indice]
+
+    def __eq__(self, altro):
+        return list(self) == list(altro)
+
+    def __repr__(self):
+        return f"AzioniCompatte({list(self)!r})"
+
+    def append(self, voce):
+        self._azioni.append(id_azione(voce["azione"]))
+        self._punti.append(voce["punti"])
+        self._date.append(data_a_epoca(voce["data"]))
+
+    def extend(self, voci):
+        for voce in voci:
+            self.append(voce)
+
+    def pop(self, indice=-1):
+        voce = self[indice]
+        del self[indice]
+        return voce
+
+    def totale_punti(self):
+        return sum(self._punti)
+
+    def copia(self):
+        """Copia indipendente delle tre colonne, senza passare dai dizionari."""
+        copia = AzioniCompatte()
+        copia._azioni = self._azioni[:]
+        copia._punti = self._punti[:]
+        copia._date = self._date[:]
+        return copia
+
+    def colonne_per_giorno(self):
+        """Restituisce le colonne (giorni ordinali, nomi delle azioni, punti) come liste."""
+        return ([secondi // 86400 + _ORDINALE_EPOCA for secondi in self._date],
+                [_NOMI_AZIONI[identificativo] for identificativo in self._azioni], self._punti.tolist())
+
+    def voci_con_azione(self, nomi_azioni):
+        """Restituisce solo le voci delle azioni indicate, senza costruire le altre."""
+        ids = {_ID_AZIONI[nome] for nome in nomi_azioni if nome in _ID_AZIONI}
+        for indice, identificativo in enumerate(self._azioni):
+            if identificativo in ids:
+                yield self._voce(indice)
+
+def copia_azioni(azioni):
+    """Copia di sola lettura delle azioni per una vista: una tupla, o AzioniCompatte copiate colonna per colonna."""
+    return azioni.copia() if isinstance(azioni, AzioniCompatte) else tuple(azioni)
+
+def serializza_json(oggetto):
+    """Funzione `default` per json.dump: scrive le azioni compatte come la lista originale."""
+    if isinstance(oggetto, AzioniCompatte):
+        return list(oggetto)
+    raise TypeError(f"Oggetto di tipo {type(oggetto).__name__} non serializzabile in JSON")
+
+def applica_evento(dati, evento, contenitore=list):
+    """
+    Applica un evento del giornale a un dizionario {nome: [azioni]}, modificandolo sul posto.
+    `contenitore` è il tipo usato per gli elenchi di azioni (list o AzioniCompatte).
+    """
+    tipo = evento["tipo"]
+    if tipo == "aggiungi":
+        dati.setdefault(evento["nome"], contenitore()).extend(dict(voce) for voce in evento["voci"])
+    elif tipo == "nuovo_collaboratore":
+        dati.setdefault(evento["nome"], contenitore())
+    elif tipo == "elimina_riga":
+        dati[evento["nome"]].pop(evento["indice"])
+    elif tipo == "elimina_collaboratore":
+        del dati[evento["nome"]]
+    elif tipo == "rinomina":
+        dati[evento["a"]] = dati.pop(evento["da"])
+    elif tipo == "base":
+        # Copia completa dei dati: sostituisce lo stato precedente
+        nuovi_dati = {nome: contenitore(dict(voce) for voce in azioni) for nome, azioni in evento["dati"].items()}
+        dati.clear()
+        dati.update(nuovi_dati)
+    elif tipo == "gruppo":
+        # Più eventi registrati insieme (es. un'importazione in blocco): si applicano in ordine
+        for sotto in evento["eventi"]:
+            applica_evento(dati, sotto, contenitore)
+
+# --- Formato compatto del file principale ---
+def scrivi_file_atomico(percorso, contenuto, sincronizza=True):
+    """
+    Scrive `contenuto` (bytes) in un file temporaneo nella stessa cartella e lo sostituisce
+    al file di destinazione con os.replace: chi legge trova sempre la versione precedente
+    completa o quella nuova completa, mai un file troncato.
+    Con `sincronizza` il file (e la cartella, dove supportato) viene portato su disco con
+    fsync prima e dopo la sostituzione, così sopravvive anche a un'interruzione di corrente.
+    """
+    temporaneo = f"{percorso}.{threading.get_ident()}.tmp"
+    with open(temporaneo, 'wb') as f:
+        f.write(contenuto)
+        if sincronizza:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temporaneo, percorso)
+    if sincronizza:
+        sincronizza_cartella(os.path.dirname(os.path.abspath(percorso)))
+
+def sincronizza_cartella(cartella):
+    """Porta su disco le voci della cartella (file creati, rinominati o eliminati), dove supportato."""
+    if hasattr(os, "O_DIRECTORY"):
+        descrittore = os.open(cartella, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descrittore)
+        finally:
+            os.close(descrittore)
+
+def crea_cartella_durevole(cartella):
+    """Crea la cartella (e le intermedie) se manca, rendendo durevole la nuova voce nella cartella che la contiene."""
+    cartella = os.path.abspath(cartella)
+    if os.path.isdir(cartella):
+        return
+    crea_cartella_durevole(os.path.dirname(cartella))
+    os.makedirs(cartella, exist_ok=True)
+    sincronizza_cartella(os.path.dirname(cartella))
+
+# Chiave del corpo nella busta del file principale: l'intestazione termina con questa chiave sulla prima riga
+_CHIAVE_CORPO = b', "collaboratori": '
+_CHIUSURA_CORPO = b"\n}\n"
+
+def contenuto_file_dati(dati, seq, offset_giornale, compatto):
+    """
+    Restituisce il file principale come bytes: un unico documento JSON, leggibile anche fuori
+    dall'applicazione. La prima riga contiene l'intestazione (con lo sha256 e la lunghezza del
+    corpo) e apre la chiave "collaboratori"; seguono il corpo e la chiusura della busta.
+    Formato 2: il corpo è il dizionario {nome: [azioni]} indentato.
+    Formato 3 (compatto): la tabella delle azioni è nell'intestazione e il corpo è un array con
+    una riga per collaboratore [nome, id azioni, punti, date in secondi], senza indentazione.
+    """
+    intestazione = {"formato": 3 if compatto else 2, "seq": seq, "offset_giornale": offset_giornale}
+    if compatto:
+        righe = []
+        for nome, azioni in dati.items():
+            if not isinstance(azioni, AzioniCompatte):
+                azioni = AzioniCompatte(azioni)
+            righe.append(json.dumps([nome, *azioni.colonne()], ensure_ascii=False, separators=(",", ":")))
+        corpo = ("[\n" + ",\n".join(righe) + "\n]").encode("utf-8")
+        # "collaboratori" è la chiave del corpo: il conteggio ha un nome diverso
+        intestazione["numero_collaboratori"] = len(dati)
+        intestazione["azioni"] = list(_NOMI_AZIONI)
+    else:
+        corpo = json.dumps(dati, indent=4, default=serializza_json).encode("utf-8")
+    intestazione["lunghezza"] = len(corpo)
+    intestazione["sha256"] = hashlib.sha256(corpo).hexdigest()
+    testata = json.dumps(intestazione, ensure_ascii=False).encode("utf-8")
+    return testata[:-1] + _CHIAVE_CORPO + b"\n" + corpo + _CHIUSURA_CORPO
+
+def leggi_file_dati(f):
+    """
+    Legge il file principale (aperto in binario) in qualunque formato: originale
+    ({nome: [azioni]}), busta completa senza intestazione, formato 2 o 3 in un unico documento
+    o con la riga di intestazione separata delle versioni precedenti (il formato 3 viene
+    restituito con azioni AzioniCompatte).
+    Solleva ValueError se il file è corrotto, troncato o non corrisponde al checksum.
+    """
+    prima_riga = f.readline()
+    busta = prima_riga.endswith(_CHIAVE_CORPO + b"\n")
+    try:
+        intestazione = json.loads(prima_riga[:-len(_CHIAVE_CORPO) - 1] + b"}" if busta else prima_riga)
+    except ValueError:
+        intestazione = None
+    if not (isinstance(intestazione, dict) and ("sha256" in intestazione or intestazione.get("formato") == 3)):
+        f.seek(0)
+        return json.load(f)
+
+    corpo = f.read()
+    if busta:
+        if not corpo.endswith(_CHIUSURA_CORPO):
+            raise ValueError("File incompleto: manca la chiusura del documento.")
+        corpo = corpo[:-len(_CHIUSURA_CORPO)]
+        if intestazione["formato"] == 3:
+            intestazione["collaboratori"] = intestazione.pop("numero_collaboratori")
+    # Il controllo costa una lettura sequenziale: un file troncato o alterato viene
+    # riconosciuto prima di interpretarne il contenuto
+    if "sha256" in intestazione:
+        if len(corpo) != intestazione.pop("lunghezza") or hashlib.sha256(corpo).hexdigest() != intestazione.pop("sha256"):
+            raise ValueError("Il contenuto del file non corrisponde al checksum dell'intestazione.")
+    if intestazione["formato"] != 3:
+        intestazione["collaboratori"] = json.loads(corpo)
+        return intestazione
+
+    # Gli id del file vengono riportati a quelli della tabella in memoria
+    ids = [id_azione(nome_azione) for nome_azione in intestazione.pop("azioni")]
+    collaboratori = {}
+    for riga in corpo.splitlines():
+        # Nel documento unico le righe stanno in un array: si saltano le parentesi e le virgole finali
+        riga = riga.rstrip(b",")
+        if riga in (b"[", b"]"):
+            continue
+        nome, azioni, punti, date = json.loads(riga)
+        collaboratori[nome] = AzioniCompatte.da_colonne((ids[i] for i in azioni), punti, date)
+    if len(collaboratori) != intestazione["collaboratori"]:
+        raise ValueError(f"File incompleto: {len(collaboratori)} collaboratori su {intestazione['collaboratori']}")
+    intestazione["collaboratori"] = collaboratori
+    return intestazione
+
+# --- Modelli del report HTML ---
+# Le parti fisse della pagina (stili, legenda, script del countdown) vengono composte
+# una sola volta all'avvio; a ogni generazione si producono solo le righe variabili.
+COLORE_PRIMARIO = "#0d47a1"
+COLORE_SECONDARIO = "#ff6f00"
+# La pagina contiene solo le prime righe della classifica; il resto si carica a pagine
+PAGINA_CLASSIFICA = 50
+PAGINA_AZIONI = 20
+# Righe delle classifiche della settimana e del mese mostrate nel report
+CLASSIFICA_PERIODO_REPORT = 5
+# Copia statica dei dati per GitHub Pages, dove le API del server locale non sono raggiungibili
+CARTELLA_DATI_STATICI = "dati"
+
+# Legenda dei punti come lista di elementi HTML
+LEGGENDA_PUNTI_HTML = """
         <div class="leggenda">
             <h2>Regole Punti</h2>
             <ul>
@@ -327,9 +1025,8 @@ class ClassificaManager:
             </ul>
         </div>
         """
-        
-        if not self.dati_collaboratori:
-            report_content = f"""
+
+REPORT_VUOTO_HTML = string.Template("""
             <!DOCTYPE html>
             <html lang="it">
             <head>
@@ -342,23 +1039,19 @@ class ClassificaManager:
                 <link rel="manifest" href="manifest.json">
                 <link rel="apple-touch-icon" href="logo_512.png">
                 <style>
-                    body {{ font-family: sans-serif; text-align: center; margin-top: 50px; }}
+                    body { font-family: sans-serif; text-align: center; margin-top: 50px; }
                 </style>
             </head>
             <body>
                 <img src="logo_ubroker.png" alt="Logo Ubroker" style="max-width: 200px; margin-bottom: 20px;">
-                <h1 style="color: {colore_primario};">CLASSIFICA APEX CHALLENGE</h1>
+                <h1 style="color: ${colore_primario};">CLASSIFICA APEX CHALLENGE</h1>
                 <h2>La classifica è vuota. Inserisci dei dati per generare il report.</h2>
-                {leggenda_punti_html}
+                ${leggenda_punti_html}
             </body>
             </html>
-            """
-        else:
-            punteggi_totali = {nome: self.calcola_punteggio_totale(nome) for nome in self.dati_collaboratori}
-            classifica_ordinata = sorted(punteggi_totali.items(), key=lambda item: item[1], reverse=True)
-            max_punteggio = max(punteggi_totali.values()) if punteggi_totali else 1
+            """).substitute(colore_primario=COLORE_PRIMARIO, leggenda_punti_html=LEGGENDA_PUNTI_HTML)
 
-            html_content = f"""
+REPORT_INTESTAZIONE_HTML = string.Template("""
             <!DOCTYPE html>
             <html lang="it">
             <head>
@@ -368,44 +1061,44 @@ class ClassificaManager:
                 <link rel="manifest" href="manifest.json">
                 <link rel="apple-touch-icon" href="logo_512.png">
                 <style>
-                    body {{
+                    body {
                         font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                         background-color: #fff; /* Sfondo bianco */
                         color: #333;
                         margin: 0;
                         padding: 20px;
-                    }}
-                    .container {{
+                    }
+                    .container {
                         max-width: 900px;
                         margin: auto;
                         background: #fff;
                         padding: 30px 50px;
                         border-radius: 15px;
                         box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-                    }}
-                    .logo-container {{
+                    }
+                    .logo-container {
                         text-align: center;
                         margin-bottom: 10px; /* Alzato un po' il logo */
-                    }}
-                    .logo {{
+                    }
+                    .logo {
                         max-width: 250px;
                         height: auto;
-                    }}
-                    #countdown-timer {{
+                    }
+                    #countdown-timer {
                         text-align: center;
                         font-size: 2em;
-                        color: {colore_primario}; /* Colore blu */
+                        color: ${colore_primario}; /* Colore blu */
                         font-weight: bold;
                         margin: 20px 0;
-                    }}
-                    h1 {{
+                    }
+                    h1 {
                         text-align: center;
-                        color: {colore_primario};
+                        color: ${colore_primario};
                         text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.1);
                         font-size: 2.5em;
                         margin-bottom: 30px;
-                    }}
-                    .classifica-item {{
+                    }
+                    .classifica-item {
                         display: flex;
                         align-items: center;
                         background-color: #fafafa;
@@ -413,16 +1106,16 @@ class ClassificaManager:
                         padding: 10px 20px;
                         border-radius: 8px;
                         transition: transform 0.2s;
-                    }}
-                    .classifica-item:hover {{
+                    }
+                    .classifica-item:hover {
                         transform: translateX(10px);
                         box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-                    }}
-                    .classifica-item.primo {{ border-left: 5px solid gold; }}
-                    .classifica-item.secondo {{ border-left: 5px solid silver; }}
-                    .classifica-item.terzo {{ border-left: 5px solid #cd7f32; }}
+                    }
+                    .classifica-item.primo { border-left: 5px solid gold; }
+                    .classifica-item.secondo { border-left: 5px solid silver; }
+                    .classifica-item.terzo { border-left: 5px solid #cd7f32; }
 
-                    .posizione {{
+                    .posizione {
                         font-size: 1.5em;
                         font-weight: bold;
                         color: #999;
@@ -430,122 +1123,148 @@ class ClassificaManager:
                         display: flex;
                         align-items: center;
                         justify-content: center;
-                    }}
-                    .dettagli {{
+                    }
+                    .dettagli {
                         flex-grow: 1;
                         display: flex;
                         align-items: center;
-                    }}
-                    .nome {{
+                    }
+                    .nome {
                         font-size: 1.2em;
                         font-weight: 600;
                         color: #444;
                         margin-right: 20px;
                         min-width: 200px;
-                    }}
-                    .barra-progresso-container {{
+                    }
+                    .barra-progresso-container {
                         flex-grow: 1;
                         height: 15px;
                         background-color: #e0e0e0;
                         border-radius: 10px;
                         overflow: hidden;
                         margin-right: 10px;
-                    }}
-                    .barra-progresso {{
+                    }
+                    .barra-progresso {
                         height: 100%;
                         transition: width 0.5s ease-in-out;
-                    }}
-                    .barra-progresso.primo {{ background-color: gold; }}
-                    .barra-progresso.secondo {{ background-color: silver; }}
-                    .barra-progresso.terzo {{ background-color: #cd7f32; }}
-                    .barra-progresso.altri {{ background-color: {colore_primario}; }}
+                    }
+                    .barra-progresso.primo { background-color: gold; }
+                    .barra-progresso.secondo { background-color: silver; }
+                    .barra-progresso.terzo { background-color: #cd7f32; }
+                    .barra-progresso.altri { background-color: ${colore_primario}; }
 
-                    .punti {{
+                    .punti {
                         font-weight: bold;
-                        color: {colore_secondario};
+                        color: ${colore_secondario};
                         min-width: 80px;
                         text-align: right;
-                    }}
-                    .riepilogo {{
-                        margin-top: 50px;
-                    }}
-                    .collaboratore-dettagli {{
+                    }
+                    .classifica-item {
+                        cursor: pointer;
+                    }
+                    .dettaglio-azioni {
+                        margin: -10px 0 15px 60px;
+                        padding: 5px 20px;
+                        border-left: 2px solid ${colore_secondario};
+                    }
+                    .dettaglio-azioni ul {
+                        list-style-type: none;
+                        padding: 0;
+                        margin: 0;
+                    }
+                    .dettaglio-azioni li {
+                        padding: 5px 0;
+                        border-bottom: 1px dashed #eee;
+                    }
+                    .carica-altri {
+                        display: block;
+                        margin: 10px auto;
+                        padding: 8px 20px;
+                        border: none;
+                        border-radius: 5px;
+                        background-color: ${colore_primario};
+                        color: #fff;
+                        cursor: pointer;
+                    }
+                    .classifiche-periodo {
+                        display: flex;
+                        gap: 20px;
+                        margin-top: 40px;
+                    }
+                    .classifica-periodo {
+                        flex: 1;
                         border: 1px solid #ccc;
-                        padding: 20px;
-                        margin-bottom: 20px;
+                        padding: 10px 20px;
                         border-radius: 10px;
-                        background-color: #fafafa;
-                    }}
-                    .collaboratore-dettagli h3 {{
-                        margin-top: 0;
-                        border-bottom: 2px solid {colore_secondario};
-                        padding-bottom: 5px;
-                        display: inline-block;
-                        color: {colore_primario};
-                    }}
-                    .collaboratore-dettagli ul {{
+                    }
+                    .classifica-periodo h2 {
+                        color: ${colore_primario};
+                        font-size: 1.2em;
+                    }
+                    .classifica-periodo ol {
                         list-style-type: none;
                         padding: 0;
-                    }}
-                    .collaboratore-dettagli li {{
-                        margin-bottom: 5px;
-                        padding: 5px;
+                    }
+                    .classifica-periodo li {
+                        display: flex;
+                        justify-content: space-between;
+                        padding: 4px 0;
                         border-bottom: 1px dashed #eee;
-                    }}
-                    .collaboratore-dettagli li:last-child {{
-                        border-bottom: none;
-                    }}
-                    .leggenda {{
+                    }
+                    .leggenda {
                         margin-top: 50px;
                         text-align: left;
                         border: 1px solid #ccc;
                         padding: 20px;
                         border-radius: 10px;
                         background-color: #f9f9f9;
-                    }}
-                    .leggenda h2 {{
-                        color: {colore_primario};
-                        border-bottom: 2px solid {colore_secondario};
+                    }
+                    .leggenda h2 {
+                        color: ${colore_primario};
+                        border-bottom: 2px solid ${colore_secondario};
                         padding-bottom: 5px;
-                    }}
-                    .leggenda ul {{
+                    }
+                    .leggenda ul {
                         list-style-type: none;
                         padding-left: 0;
-                    }}
-                    .leggenda li {{
+                    }
+                    .leggenda li {
                         margin-bottom: 10px;
                         font-weight: 500;
-                    }}
+                    }
                     /* Media Queries per la visualizzazione mobile */
-                    @media (max-width: 768px) {{
-                        .classifica-item {{
+                    @media (max-width: 768px) {
+                        .classifica-item {
                             flex-direction: column;
                             align-items: flex-start;
-                        }}
-                        .posizione {{
+                        }
+                        .posizione {
                             font-size: 1.2em;
                             margin-bottom: 5px;
-                        }}
-                        .dettagli {{
+                        }
+                        .dettagli {
                             flex-direction: column;
                             align-items: flex-start;
                             width: 100%;
-                        }}
-                        .nome {{
+                        }
+                        .nome {
                             font-size: 1.1em;
                             margin-bottom: 5px;
                             min-width: auto;
-                        }}
-                        .barra-progresso-container {{
+                        }
+                        .barra-progresso-container {
                             width: 100%;
                             margin-right: 0;
                             margin-bottom: 5px;
-                        }}
-                        .punti {{
+                        }
+                        .punti {
                             min-width: auto;
                             text-align: left;
-                        }}
-                    }}
+                        }
+                        .classifiche-periodo {
+                            flex-direction: column;
+                        }
+                    }
                 </style>
             </head>
             <body>
@@ -556,130 +1275,3708 @@ class ClassificaManager:
                     <div id="countdown-timer"></div>
                     <h1>CLASSIFICA APEX CHALLENGE</h1>
                     <div class="classifica-generale">
-            """
-            
-            posizione = 1
-            for nome, punteggio in classifica_ordinata:
-                percentuale = (punteggio / max_punteggio) * 100 if max_punteggio > 0 else 0
-                
-                if posizione == 1:
-                    posizione_visualizzata = '🏆'
-                    classe_barra = "primo"
-                    classe_item = "primo"
-                elif posizione == 2:
-                    posizione_visualizzata = '🥈'
-                    classe_barra = "secondo"
-                    classe_item = "secondo"
-                elif posizione == 3:
-                    posizione_visualizzata = '🥉'
-                    classe_barra = "terzo"
-                    classe_item = "terzo"
-                else:
-                    posizione_visualizzata = posizione
-                    classe_barra = "altri"
-                    classe_item = ""
-                
-                html_content += f"""
-                        <div class="classifica-item {classe_item}">
+            """).substitute(colore_primario=COLORE_PRIMARIO, colore_secondario=COLORE_SECONDARIO)
+
+REPORT_CHIUSURA_HTML = string.Template("""
+                    ${leggenda_punti_html}
+                </div>
+                <script>
+                    // Le righe oltre la prima pagina e le azioni dei collaboratori vengono caricate
+                    // solo quando servono: dalle API del server locale o, su GitHub Pages,
+                    // dai file JSON statici nella cartella "dati".
+                    var PAGINA_CLASSIFICA = ${pagina_classifica};
+                    var PAGINA_AZIONI = ${pagina_azioni};
+                    var apiDisponibile = true;
+
+                    function scaricaJSON(url) {
+                        return fetch(url, {cache: "no-cache"}).then(function(risposta) {
+                            if (!risposta.ok) { throw new Error(risposta.status); }
+                            return risposta.json();
+                        });
+                    }
+
+                    function conRipiego(urlApi, urlStatico, adatta) {
+                        if (apiDisponibile) {
+                            return scaricaJSON(urlApi).catch(function() {
+                                apiDisponibile = false;
+                                return conRipiego(urlApi, urlStatico, adatta);
+                            });
+                        }
+                        return scaricaJSON(urlStatico).then(adatta);
+                    }
+
+                    function paginaClassifica(cursore) {
+                        return conRipiego(
+                            "api/classifica?cursore=" + cursore + "&limite=" + PAGINA_CLASSIFICA,
+                            "${cartella_dati}/classifica/pagina_" + Math.floor(cursore / PAGINA_CLASSIFICA) + ".json",
+                            function(pagina) { return pagina; }
+                        );
+                    }
+
+                    function paginaAzioni(elemento, cursore) {
+                        return conRipiego(
+                            "api/collaboratore?nome=" + encodeURIComponent(elemento.dataset.nome) + "&cursore=" + cursore + "&limite=" + PAGINA_AZIONI,
+                            elemento.dataset.file,
+                            function(dettaglio) {
+                                var fine = cursore + PAGINA_AZIONI;
+                                return {
+                                    totale: dettaglio.voci.length,
+                                    voci: dettaglio.voci.slice(cursore, fine),
+                                    cursore_successivo: fine < dettaglio.voci.length ? fine : null
+                                };
+                            }
+                        );
+                    }
+
+                    var PODIO = [["primo", "🏆"], ["secondo", "🥈"], ["terzo", "🥉"]];
+
+                    function creaRiga(voce, massimo) {
+                        var podio = PODIO[voce.posizione - 1];
+                        var riga = document.createElement("div");
+                        riga.className = "classifica-item" + (podio ? " " + podio[0] : "");
+                        riga.dataset.nome = voce.nome;
+                        riga.dataset.file = voce.file;
+                        riga.innerHTML = '<span class="posizione"></span><div class="dettagli"><span class="nome"></span>'
+                            + '<div class="barra-progresso-container"><div class="barra-progresso ' + (podio ? podio[0] : "altri") + '"></div></div>'
+                            + '<span class="punti"></span></div>';
+                        riga.querySelector(".posizione").textContent = podio ? podio[1] : voce.posizione;
+                        riga.querySelector(".nome").textContent = voce.nome;
+                        riga.querySelector(".barra-progresso").style.width = (massimo > 0 ? voce.punti / massimo * 100 : 0) + "%";
+                        riga.querySelector(".punti").textContent = voce.punti + " punti";
+                        var dettaglio = document.createElement("div");
+                        dettaglio.className = "dettaglio-azioni";
+                        dettaglio.hidden = true;
+                        return [riga, dettaglio];
+                    }
+
+                    function caricaAzioni(elemento, dettaglio, cursore) {
+                        paginaAzioni(elemento, cursore).then(function(pagina) {
+                            var elenco = dettaglio.querySelector("ul");
+                            pagina.voci.forEach(function(azione) {
+                                var voce = document.createElement("li");
+                                voce.textContent = "- Azione: " + azione.azione + " (+" + azione.punti + " punti) - Data: " + azione.data;
+                                elenco.appendChild(voce);
+                            });
+                            var vecchioPulsante = dettaglio.querySelector(".carica-altri");
+                            if (vecchioPulsante) { vecchioPulsante.remove(); }
+                            if (pagina.cursore_successivo !== null) {
+                                var pulsante = document.createElement("button");
+                                pulsante.type = "button";
+                                pulsante.className = "carica-altri";
+                                pulsante.textContent = "Mostra altre azioni";
+                                pulsante.addEventListener("click", function() {
+                                    caricaAzioni(elemento, dettaglio, pagina.cursore_successivo);
+                                });
+                                dettaglio.appendChild(pulsante);
+                            }
+                        }).catch(function() {
+                            dettaglio.dataset.caricato = "";
+                            dettaglio.textContent = "Dettaglio non disponibile.";
+                        });
+                    }
+
+                    var classificaGenerale = document.querySelector(".classifica-generale");
+                    classificaGenerale.addEventListener("click", function(evento) {
+                        var elemento = evento.target.closest(".classifica-item");
+                        if (!elemento) { return; }
+                        if (elemento.nextElementSibling.hidden) {
+                            mostraDettaglio(elemento);
+                        } else {
+                            elemento.nextElementSibling.hidden = true;
+                        }
+                    });
+
+                    function mostraDettaglio(elemento) {
+                        var dettaglio = elemento.nextElementSibling;
+                        dettaglio.hidden = false;
+                        if (!dettaglio.dataset.caricato) {
+                            dettaglio.dataset.caricato = "1";
+                            dettaglio.innerHTML = "<ul></ul>";
+                            caricaAzioni(elemento, dettaglio, 0);
+                        }
+                    }
+
+                    var pulsanteClassifica = document.getElementById("carica-classifica");
+                    pulsanteClassifica.addEventListener("click", function() {
+                        pulsanteClassifica.disabled = true;
+                        paginaClassifica(parseInt(pulsanteClassifica.dataset.cursore, 10)).then(function(pagina) {
+                            pagina.voci.forEach(function(voce) {
+                                creaRiga(voce, pagina.punteggio_massimo).forEach(function(nodo) { classificaGenerale.appendChild(nodo); });
+                            });
+                            if (pagina.cursore_successivo === null) {
+                                pulsanteClassifica.hidden = true;
+                            } else {
+                                pulsanteClassifica.dataset.cursore = pagina.cursore_successivo;
+                            }
+                            righeVolute = Math.max(PAGINA_CLASSIFICA, classificaGenerale.querySelectorAll(".classifica-item").length);
+                            // La pagina è più recente delle righe mostrate: si riallinea tutto
+                            if (flusso && !richiestaInCorso && pagina.seq !== undefined && pagina.seq !== seqClassifica) { aggiornaClassifica(); }
+                        }).finally(function() {
+                            pulsanteClassifica.disabled = false;
+                        });
+                    });
+
+                    // Sul server locale la classifica si aggiorna da sola: ogni variazione dei punteggi
+                    // porta i nuovi punti e la posizione dei collaboratori toccati, che si spostano
+                    // direttamente nella pagina. Si scaricano solo le righe mancanti in fondo o, se
+                    // si è perso un evento, le righe già visibili.
+                    var seqClassifica = parseInt(pulsanteClassifica.dataset.seq, 10);
+                    // Righe che la pagina mostra (se esistono): la prima pagina più quelle aggiunte con "Mostra altri"
+                    var righeVolute = PAGINA_CLASSIFICA;
+                    var richiestaInCorso = false;
+                    var variazioniInAttesa = [];
+                    var flusso = null;
+
+                    function puntiRiga(riga) {
+                        return parseInt(riga.querySelector(".punti").textContent, 10);
+                    }
+
+                    function inserisciRiga(voce, prima, aperto) {
+                        var nodi = creaRiga(voce, 0);
+                        classificaGenerale.insertBefore(nodi[0], prima);
+                        classificaGenerale.insertBefore(nodi[1], prima);
+                        if (aperto) { mostraDettaglio(nodi[0]); }
+                    }
+
+                    function rinumeraClassifica(totale) {
+                        var righe = classificaGenerale.querySelectorAll(".classifica-item");
+                        var massimo = righe.length ? puntiRiga(righe[0]) : 0;
+                        righe.forEach(function(riga, indice) {
+                            var podio = PODIO[indice];
+                            riga.className = "classifica-item" + (podio ? " " + podio[0] : "");
+                            riga.querySelector(".posizione").textContent = podio ? podio[1] : indice + 1;
+                            var barra = riga.querySelector(".barra-progresso");
+                            barra.className = "barra-progresso " + (podio ? podio[0] : "altri");
+                            barra.style.width = (massimo > 0 ? puntiRiga(riga) / massimo * 100 : 0) + "%";
+                        });
+                        pulsanteClassifica.dataset.cursore = righe.length;
+                        pulsanteClassifica.hidden = righe.length >= totale;
+                        return righe.length;
+                    }
+
+                    function concludiRichiesta() {
+                        richiestaInCorso = false;
+                        var inAttesa = variazioniInAttesa;
+                        variazioniInAttesa = [];
+                        inAttesa.forEach(applicaVariazione);
+                    }
+
+                    function aggiornaClassifica() {
+                        richiestaInCorso = true;
+                        var righe = classificaGenerale.querySelectorAll(".classifica-item");
+                        scaricaJSON("api/classifica?cursore=0&limite=" + righeVolute).then(function(pagina) {
+                            var aperti = {};
+                            righe.forEach(function(riga) {
+                                if (!riga.nextElementSibling.hidden) { aperti[riga.dataset.nome] = true; }
+                                classificaGenerale.removeChild(riga.nextElementSibling);
+                                classificaGenerale.removeChild(riga);
+                            });
+                            pagina.voci.forEach(function(voce) { inserisciRiga(voce, null, aperti[voce.nome]); });
+                            rinumeraClassifica(pagina.totale);
+                            seqClassifica = pagina.seq;
+                        }).catch(function() {}).then(concludiRichiesta);
+                    }
+
+                    function applicaVariazione(variazione) {
+                        if (richiestaInCorso) {
+                            variazioniInAttesa.push(variazione);
+                            return;
+                        }
+                        if (variazione.seq <= seqClassifica) { return; }
+                        if (variazione.tipo === "base" || variazione.seq !== seqClassifica + 1) {
+                            // Ripristino completo o evento perso: si ricaricano le righe visibili
+                            aggiornaClassifica();
+                            return;
+                        }
+                        seqClassifica = variazione.seq;
+                        var toccati = variazione.rimossi.concat(variazione.punteggi.map(function(voce) { return voce.nome; }));
+                        var aperti = {};
+                        classificaGenerale.querySelectorAll(".classifica-item").forEach(function(riga) {
+                            if (toccati.indexOf(riga.dataset.nome) < 0) { return; }
+                            aperti[riga.dataset.nome] = !riga.nextElementSibling.hidden;
+                            classificaGenerale.removeChild(riga.nextElementSibling);
+                            classificaGenerale.removeChild(riga);
+                        });
+                        variazione.punteggi.slice().sort(function(a, b) { return a.posizione - b.posizione; }).forEach(function(voce) {
+                            var righe = classificaGenerale.querySelectorAll(".classifica-item");
+                            // Chi finisce oltre le righe caricate comparirà con "Mostra altri"
+                            if (voce.posizione > righe.length + 1) { return; }
+                            inserisciRiga(voce, righe[voce.posizione - 1] || null, aperti[voce.nome]);
+                        });
+                        // Le righe spinte oltre quelle caricate escono dalla pagina
+                        var righe = classificaGenerale.querySelectorAll(".classifica-item");
+                        for (var indice = righe.length - 1; indice >= righeVolute; indice--) {
+                            classificaGenerale.removeChild(righe[indice].nextElementSibling);
+                            classificaGenerale.removeChild(righe[indice]);
+                        }
+                        var visibili = rinumeraClassifica(variazione.totale);
+                        var attese = Math.min(righeVolute, variazione.totale);
+                        if (visibili >= attese) { return; }
+                        // Qualcuno è sceso oltre le righe caricate: si completa la pagina con le righe successive
+                        richiestaInCorso = true;
+                        scaricaJSON("api/classifica?cursore=" + visibili + "&limite=" + (attese - visibili)).then(function(pagina) {
+                            if (pagina.seq !== seqClassifica) {
+                                richiestaInCorso = false;
+                                aggiornaClassifica();
+                                return;
+                            }
+                            pagina.voci.forEach(function(voce) { inserisciRiga(voce, null, false); });
+                            rinumeraClassifica(pagina.totale);
+                            concludiRichiesta();
+                        }).catch(concludiRichiesta);
+                    }
+
+                    if (window.EventSource && location.protocol !== "file:") {
+                        flusso = new EventSource("eventi");
+                        flusso.addEventListener("punteggi", function(evento) {
+                            applicaVariazione(JSON.parse(evento.data));
+                        });
+                        flusso.onerror = function() {
+                            // Su GitHub Pages /eventi non esiste: il browser chiude il flusso e non riprova
+                            if (flusso.readyState === EventSource.CLOSED) { flusso.close(); }
+                        };
+                    }
+
+                    // Imposta la data e l'ora di chiusura del contest (23 ottobre 2025)
+                    var countDownDate = new Date("Oct 23, 2025 23:59:59").getTime();
+
+                    // Aggiorna il countdown ogni 1 secondo
+                    var x = setInterval(function() {
+                        // Ottieni la data e l'ora attuali
+                        var now = new Date().getTime();
+
+                        // Trova la distanza tra adesso e la data del countdown
+                        var distance = countDownDate - now;
+
+                        // Calcola giorni, ore, minuti e secondi
+                        var days = Math.floor(distance / (1000 * 60 * 60 * 24));
+                        var hours = Math.floor((distance % (1000 * 60 * 60 * 24)) / (1000 * 60 * 60));
+                        var minutes = Math.floor((distance % (1000 * 60 * 60)) / (1000 * 60));
+                        var seconds = Math.floor((distance % (1000 * 60)) / 1000);
+
+                        // Mostra il risultato nell'elemento con id="countdown-timer"
+                        document.getElementById("countdown-timer").innerHTML = days + "g " + hours + "h " + minutes + "m " + seconds + "s ";
+
+                        // Se il countdown è finito, scrivi un messaggio
+                        if (distance < 0) {
+                            clearInterval(x);
+                            document.getElementById("countdown-timer").innerHTML = "Il contest è terminato!";
+                        }
+                    }, 1000);
+                </script>
+            </body>
+            </html>
+            """).substitute(leggenda_punti_html=LEGGENDA_PUNTI_HTML, pagina_classifica=PAGINA_CLASSIFICA,
+                            pagina_azioni=PAGINA_AZIONI, cartella_dati=CARTELLA_DATI_STATICI)
+
+def file_dettaglio_statico(nome):
+    """Percorso (relativo a index.html) del file JSON statico con le azioni di un collaboratore."""
+    return f"{CARTELLA_DATI_STATICI}/collaboratori/{hashlib.sha1(nome.encode('utf-8')).hexdigest()[:12]}.json"
+
+def riga_classifica_html(posizione, nome, punteggio, max_punteggio):
+    """Restituisce il frammento HTML di una riga della classifica generale."""
+    percentuale = (punteggio / max_punteggio) * 100 if max_punteggio > 0 else 0
+    
+    if posizione == 1:
+        posizione_visualizzata = '🏆'
+        classe_barra = "primo"
+        classe_item = "primo"
+    elif posizione == 2:
+        posizione_visualizzata = '🥈'
+        classe_barra = "secondo"
+        classe_item = "secondo"
+    elif posizione == 3:
+        posizione_visualizzata = '🥉'
+        classe_barra = "terzo"
+        classe_item = "terzo"
+    else:
+        posizione_visualizzata = posizione
+        classe_barra = "altri"
+        classe_item = ""
+    
+    nome_html = html.escape(nome)
+    return f"""
+                        <div class="classifica-item {classe_item}" data-nome="{nome_html}" data-file="{file_dettaglio_statico(nome)}">
                             <span class="posizione">{posizione_visualizzata}</span>
                             <div class="dettagli">
-                                <span class="nome">{nome}</span>
+                                <span class="nome">{nome_html}</span>
                                 <div class="barra-progresso-container">
                                     <div class="barra-progresso {classe_barra}" style="width: {percentuale}%;"></div>
                                 </div>
                                 <span class="punti">{punteggio} punti</span>
                             </div>
                         </div>
+                        <div class="dettaglio-azioni" hidden></div>
                 """
-                posizione += 1
-            
-            html_content += """
+
+def chiusura_classifica_html(cursore_successivo, seq):
+    """
+    Chiude l'elenco della classifica e aggiunge il pulsante per caricare le righe successive.
+    `seq` è l'ultimo evento riflesso nella pagina: le variazioni in diretta ripartono da lì.
+    """
+    nascosto = " hidden" if cursore_successivo is None else ""
+    return f"""
                     </div>
-                    <div class="riepilogo">
-                        <h2>Riepilogo Punti per Collaboratore</h2>
+                    <button type="button" class="carica-altri" id="carica-classifica" data-cursore="{cursore_successivo or 0}" data-seq="{seq}"{nascosto}>Mostra altri</button>
             """
-            for nome, _ in classifica_ordinata:
-                html_content += f"""
-                    <div class="collaboratore-dettagli">
-                        <h3>{nome} (Totale: {punteggi_totali[nome]} punti)</h3>
-                        <ul>
-                """
-                azioni = self.dati_collaboratori[nome]
-                for i, azione in enumerate(azioni):
-                    html_content += f"""
-                            <li>- Azione: {azione['azione']} (+{azione['punti']} punti) - Data: {azione['data']}</li>
-                    """
-                html_content += """
-                        </ul>
+
+def classifica_periodo_html(titolo, periodo, voci):
+    """Restituisce il riquadro con i primi classificati di un periodo (settimana o mese corrente)."""
+    if voci:
+        elementi = "".join(f"<li><span>{posizione}. {html.escape(nome)}</span><span class=\"punti\">{punti} punti</span></li>"
+                           for posizione, (nome, punti) in enumerate(voci, start=1))
+    else:
+        elementi = "<li>Nessun punto nel periodo.</li>"
+    return f"""
+                    <div class="classifica-periodo">
+                        <h2>{titolo} <small>({periodo})</small></h2>
+                        <ol>{elementi}</ol>
                     </div>
-                """
-            
-            html_content += f"""
+            """
+
+def scalatori_html(titolo, meeting, movimenti):
+    """Restituisce il riquadro con i collaboratori saliti di più in classifica dall'ultimo meeting."""
+    if meeting is None:
+        elementi = "<li>Nessun meeting registrato.</li>"
+        periodo = ""
+    else:
+        # I movimenti sono ordinati dai più saliti: ci si ferma al primo che non è salito
+        saliti = list(itertools.islice(itertools.takewhile(lambda movimento: (movimento["variazione"] or 0) > 0, movimenti),
+                                       CLASSIFICA_PERIODO_REPORT))
+        if saliti:
+            elementi = "".join(
+                f"<li><span>{movimento['posizione']}. {html.escape(movimento['nome'])}</span>"
+                f"<span class=\"punti\">+{movimento['variazione']} posizioni</span></li>"
+                for movimento in saliti
+            )
+        else:
+            elementi = "<li>Nessun cambio di posizione.</li>"
+        periodo = f" <small>({meeting})</small>"
+    return f"""
+                    <div class="classifica-periodo">
+                        <h2>{titolo}{periodo}</h2>
+                        <ol>{elementi}</ol>
                     </div>
-                    {leggenda_punti_html}
-                </div>
-                <script>
-                    // Imposta la data e l'ora di chiusura del contest (23 ottobre 2025)
-                    var countDownDate = new Date("Oct 23, 2025 23:59:59").getTime();
+            """
+
+# --- Archiviazione della classifica ---
+# ClassificaManager tiene in memoria i dati e gli indici; l'archiviazione rende durevoli
+# gli eventi e ricarica lo stato all'avvio. Sono disponibili due implementazioni con la
+# stessa interfaccia: ArchiviazioneJSON (file principale + giornale + cronologia) e
+# ArchiviazioneSQLite (database in modalità WAL con indici e aggregati SQL).
+class ArchiviazioneJSON:
+    # Le interrogazioni (totali, classifiche per periodo, anti-duplicati) usano i dati in memoria
+    indicizzata = False
+
+    def __init__(self, filename="classifica_apex_data.json", journal_filename="classifica_apex_journal.jsonl",
+                 cartella_cronologia="cronologia", politica_conservazione=POLITICA_CONSERVAZIONE, compatto=False,
+                 sola_lettura=False):
+        """
+        Il file JSON principale viene riscritto solo durante la compattazione (ogni
+        `soglia_compattazione` eventi); nel frattempo ogni modifica è un evento nel giornale.
+        A ogni compattazione si registra un'istantanea nell'archivio della cronologia (il punto
+        di ripresa) e il giornale viene ruotato: gli eventi già compattati diventano un segmento
+        in <cartella_cronologia>/giornale, quindi il giornale corrente resta breve e ogni
+        ricostruzione riparte dal punto di ripresa più vicino.
+        Con `sola_lettura` il caricamento non modifica alcun file: il giornale non viene troncato
+        né rinominato e i ripristini automatici restano in memoria. Serve ai comandi che leggono
+        senza il blocco della cartella dei dati, mentre un altro processo può scriverla.
+        """
+        self.filename = filename
+        self.compatto = compatto
+        self.sola_lettura = sola_lettura
+        self.giornale = GiornaleEventi(journal_filename)
+        self.archivio = ArchivioIstantanee(cartella_cronologia)
+        self.cartella_segmenti = os.path.join(cartella_cronologia, "giornale")
+        # Aprire l'archiviazione non scrive né cancella nulla: le copie complete delle versioni
+        # precedenti entrano nell'archivio alla prima compattazione e le istantanee vecchie
+        # vengono diradate durante le compattazioni, al più una volta ogni ora (o con pota_cronologia)
+        self._legacy_importati = False
+        self.politica_conservazione = politica_conservazione
+        self._ultima_conservazione = time.monotonic()
+        self.seq = 0
+        self.offset_giornale = 0
+        self.eventi_da_compattare = 0
+        self.soglia_compattazione = 200
+        # Versione di ogni collaboratore al momento dell'ultima istantanea in cronologia
+        self._versioni_archiviate = {}
+
+    def carica(self, contenitore=list):
+        """
+        Carica i dati dall'ultima compattazione e riapplica gli eventi registrati nel giornale
+        successivamente. Restituisce (dati, seq).
+        Se il file principale è corrotto, ricostruisce i dati dall'ultimo punto di ripresa della
+        cronologia riapplicando i segmenti e il giornale; in mancanza di eventi tenta un ripristino
+        automatico dall'ultima istantanea della cronologia.
+        """
+        dati = None
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'rb') as f:
+                    dati = self._interpreta_file(leggi_file_dati(f))
+            except ValueError:
+                # Il file principale è corrotto, tenta il ripristino
+                notifica_utente("Errore Caricamento", f"Errore: Il file '{self.filename}' è corrotto. Tentativo di ripristino automatico...", errore=True)
+
+        giornale_orfano = dati is not None and self.offset_giornale > self.giornale.dimensione()
+        if giornale_orfano and not self.sola_lettura:
+            # Il giornale non corrisponde al file principale: si riparte con un giornale nuovo
+            if self.giornale.esiste():
+                os.replace(self.giornale.filename, self.giornale.filename + ".orfano")
+            self.offset_giornale = 0
+            giornale_orfano = False
+
+        if dati is not None:
+            dati = converti_azioni(dati, contenitore)
+            if not giornale_orfano:
+                self._riapplica_giornale(dati, contenitore)
+        elif self.giornale.esiste() or self._segmenti():
+            self.seq, dati = 0, {}
+            for seq, blocchi in self.archivio.punti_di_ripresa():
+                try:
+                    dati = converti_azioni(self.archivio.dati_blocchi(blocchi), contenitore)
+                except (OSError, ValueError):
+                    # Blocco mancante o danneggiato: si riparte dal punto di ripresa precedente
+                    continue
+                self.seq = seq
+                break
+            self.offset_giornale = 0
+            eventi = 0
+            for evento in self.eventi_registrati(self.seq, solo_segmenti=True):
+                applica_evento(dati, evento, contenitore)
+                self.seq = evento["seq"]
+                eventi += 1
+            eventi += self._riapplica_giornale(dati, contenitore)
+            if not self.sola_lettura:
+                self.salva_dati(dati)
+            notifica_utente("Ripristino", f"Ripristino automatico riuscito!\nI dati sono stati ricostruiti dal giornale degli eventi ({eventi} eventi).")
+        elif self.sola_lettura:
+            # Come sotto, ma le copie complete si leggono senza importarle nell'archivio
+            copia = self.archivio.ultima_copia_legacy()
+            try:
+                dati = copia[1] if copia is not None else self.archivio.ultima() if len(self.archivio) else {}
+            except (OSError, ValueError):
+                dati = {}
+            dati = converti_azioni(dati, contenitore)
+        else:
+            # Le copie complete delle versioni precedenti possono essere l'unico backup
+            self._importa_file_legacy()
+            if len(self.archivio):
+                try:
+                    dati = converti_azioni(self.archivio.ultima(), contenitore)
+                    
+                    # Sovrascrivi il file principale con i dati del backup
+                    self.salva_dati(dati)
+                    notifica_utente("Ripristino", f"Ripristino automatico riuscito!\nI dati sono stati recuperati dall'istantanea del {self.archivio.momenti()[-1]}.")
+                except (OSError, ValueError):
+                    notifica_utente("Errore Ripristino", "Errore: Impossibile caricare il backup. La classifica verrà inizializzata vuota.", errore=True)
+                    dati = {}
+            else:
+                notifica_utente("Avviso", "Nessun backup trovato. La classifica verrà inizializzata vuota.")
+                dati = {}
+        return dati, self.seq
+
+    def _interpreta_file(self, contenuto):
+        """
+        Interpreta il contenuto del file principale.
+        Accetta sia il formato originale ({nome: [azioni]}) sia quello con intestazione
+        scritto dalla compattazione (le chiavi in minuscolo non possono essere nomi standardizzati).
+        """
+        if "formato" in contenuto and "collaboratori" in contenuto:
+            self.seq = contenuto.get("seq", 0)
+            self.offset_giornale = contenuto.get("offset_giornale", 0)
+            return contenuto["collaboratori"]
+        self.seq = 0
+        self.offset_giornale = 0
+        return contenuto
+
+    def _riapplica_giornale(self, dati, contenitore):
+        """
+        Riapplica gli eventi del giornale successivi all'ultima compattazione.
+        Gli eventi già contenuti nei dati (seq non successivo) vengono saltati: succede se
+        un'interruzione è arrivata tra la scrittura del file principale e la rotazione del giornale.
+        Restituisce il numero di eventi riapplicati.
+        """
+        eventi = 0
+        for evento, offset in self.giornale.leggi(self.offset_giornale):
+            self.offset_giornale = offset
+            if evento["seq"] <= self.seq:
+                continue
+            applica_evento(dati, evento, contenitore)
+            self.seq = evento["seq"]
+            eventi += 1
+        if self.giornale.dimensione() > self.offset_giornale and not self.sola_lettura:
+            # Ultima riga scritta a metà da un'interruzione: viene scartata (in sola lettura
+            # può essere la riga che un altro processo sta scrivendo, e viene solo ignorata)
+            self.giornale.tronca(self.offset_giornale)
+        self.eventi_da_compattare = eventi
+        return eventi
+
+    def richiede_evento_base(self):
+        """Vero se lo storico è vuoto e il primo evento deve essere una copia completa dei dati."""
+        return not self.giornale.esiste() and not self._segmenti() and self.archivio.punto_di_ripresa() is None
+
+    def registra(self, evento):
+        """
+        Scrive l'evento nel giornale senza attendere la fsync.
+        Restituisce il riferimento da passare a rendi_durevole.
+        """
+        self.seq = evento["seq"]
+        self.offset_giornale = self.giornale.scrivi(evento, durevole=False)
+        return self.offset_giornale
+
+    def rendi_durevole(self, riferimento):
+        self.giornale.rendi_durevole(riferimento)
+
+    def evento_applicato(self, dati, versioni):
+        """Chiamata dopo ogni evento (con i dati bloccati): compatta ogni `soglia_compattazione` eventi."""
+        self.eventi_da_compattare += 1
+        if self.eventi_da_compattare >= self.soglia_compattazione:
+            self.compatta(dati, versioni)
+
+    def compatta(self, dati, versioni):
+        """
+        Salva un'istantanea in cronologia (il punto di ripresa), riscrive il file principale con
+        lo stato corrente e ruota il giornale: al successivo avvio verranno riapplicati solo gli
+        eventi registrati dopo questo punto.
+        """
+        # Il file principale non deve riferirsi a eventi del giornale non ancora su disco
+        self.giornale.rendi_durevole(self.offset_giornale)
+        self._importa_file_legacy()
+        self.salva_cronologia(dati, versioni)
+        # Il file principale indica il giornale nuovo; se la rotazione non avviene (interruzione)
+        # il giornale vecchio viene riletto saltando gli eventi con seq già compattato
+        ruota = self.giornale.dimensione() > 0
+        if ruota:
+            self.offset_giornale = 0
+        self.salva_dati(dati)
+        if ruota:
+            segmenti = self._segmenti()
+            self.giornale.ruota(self._percorso_segmento(segmenti[-1][2] if segmenti else 0, self.seq))
+        self.eventi_da_compattare = 0
+        if time.monotonic() - self._ultima_conservazione >= 3600:
+            self._applica_conservazione()
+            self._ultima_conservazione = time.monotonic()
+
+    def _importa_file_legacy(self):
+        # Le copie vanno importate prima della prima istantanea: l'archivio resta in ordine di tempo
+        if not self._legacy_importati:
+            self.archivio.importa_file_legacy()
+            self._legacy_importati = True
+
+    def _applica_conservazione(self):
+        """
+        Dirada le istantanee secondo la politica ed elimina i segmenti del giornale che partivano da quelle eliminate.
+        Restituisce il numero di istantanee eliminate.
+        """
+        prima = set(self.archivio.seq_istantanee())
+        eliminate = self.archivio.applica_conservazione(self.politica_conservazione)
+        conservati = set(self.archivio.seq_istantanee())
+        for percorso, inizio, fine in self._segmenti():
+            if not segmento_da_conservare(inizio, fine, prima, conservati):
+                os.remove(percorso)
+        return eliminate
+
+    def pota_cronologia(self, elimina_legacy=False):
+        """
+        Operazione di gestione esplicita: importa le copie complete delle versioni precedenti,
+        applica subito la politica di conservazione e, solo con `elimina_legacy`, cancella le
+        copie complete ormai contenute nell'archivio.
+        Restituisce (istantanee eliminate, copie complete eliminate).
+        """
+        self._importa_file_legacy()
+        eliminate = self._applica_conservazione()
+        self._ultima_conservazione = time.monotonic()
+        return eliminate, self.archivio.pota_file_legacy() if elimina_legacy else 0
+
+    def _percorso_segmento(self, inizio, fine):
+        return os.path.join(self.cartella_segmenti, f"{inizio:012d}-{fine:012d}.jsonl")
+
+    def _segmenti(self):
+        """Segmenti del giornale già ruotati come (percorso, seq iniziale escluso, seq finale), dal più vecchio."""
+        if not os.path.isdir(self.cartella_segmenti):
+            return []
+        segmenti = []
+        for nome_file in sorted(os.listdir(self.cartella_segmenti)):
+            inizio, _, fine = nome_file[:-len(".jsonl")].partition("-")
+            if nome_file.endswith(".jsonl") and inizio.isdigit() and fine.isdigit():
+                segmenti.append((os.path.join(self.cartella_segmenti, nome_file), int(inizio), int(fine)))
+        return segmenti
+
+    def eventi_registrati(self, dopo_seq=0, solo_segmenti=False):
+        """
+        Restituisce in ordine gli eventi con seq successivo a `dopo_seq`, leggendo solo i segmenti
+        che li contengono e poi il giornale corrente (a meno di `solo_segmenti`).
+        """
+        file_eventi = [percorso for percorso, _, fine in self._segmenti() if fine > dopo_seq]
+        if not solo_segmenti:
+            file_eventi.append(self.giornale.filename)
+        for percorso in file_eventi:
+            for evento, _ in GiornaleEventi(percorso).leggi():
+                if evento["seq"] > dopo_seq:
+                    yield evento
+
+    def salva_dati(self, dati):
+        """
+        Salva i dati della classifica in un file JSON, insieme alla posizione
+        del giornale degli eventi a cui corrispondono.
+        Il file viene sostituito in modo atomico e porta il checksum del contenuto.
+        """
+        contenuto = contenuto_file_dati(dati, self.seq, self.offset_giornale, self.compatto)
+        scrivi_file_atomico(self.filename, contenuto)
+
+    def salva_cronologia(self, dati, versioni):
+        """
+        Registra un'istantanea dei dati della classifica nell'archivio della cronologia.
+        Vengono riserializzati solo i collaboratori la cui versione (`versioni`, nome -> versione)
+        è cambiata dall'istantanea precedente.
+        """
+        cambiati = {
+            nome for nome in dati
+            if nome not in self._versioni_archiviate or self._versioni_archiviate[nome] != versioni.get(nome, 0)
+        }
+        self.archivio.salva(dati, cambiati=cambiati, seq=self.seq)
+        self._versioni_archiviate = {nome: versioni.get(nome, 0) for nome in dati}
+
+    def dati_sostituiti(self):
+        """Chiamata dopo un evento "base": le versioni dei collaboratori ripartono da capo."""
+        self._versioni_archiviate.clear()
+
+    def ripresa_al(self, momento):
+        """
+        Restituisce (seq, blocchi, eventi) per ricostruire lo stato a `momento`: il punto di ripresa
+        più vicino (seq e mappa nome -> hash nell'archivio, oppure 0 e None per ripartire da zero)
+        e gli eventi successivi registrati entro `momento`.
+        """
+        seq, blocchi = self.archivio.punto_di_ripresa(momento) or (0, None)
+
+        def eventi():
+            for evento in self.eventi_registrati(seq):
+                if evento["ts"] > momento:
+                    break
+                yield evento
+        return seq, blocchi, eventi()
+
+    def istantanea_al(self, momento):
+        """Dati dell'istantanea di cronologia più recente entro `momento`, o None."""
+        return self.archivio.ripristina(momento)
+
+    def punteggi_istantanea_al(self, momento):
+        """Punteggi ({nome: punti}) dell'istantanea di cronologia più recente entro `momento`, o None."""
+        return self.archivio.punteggi_al(momento)
+
+    def chiudi(self):
+        self.giornale.chiudi()
+
+class ArchiviazioneSQLite:
+    # Totali, classifiche per periodo e controlli anti-duplicati sono interrogazioni SQL
+    indicizzata = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS collaboratori (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL UNIQUE,
+            ordine INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS azioni (
+            id INTEGER PRIMARY KEY,
+            collaboratore INTEGER NOT NULL REFERENCES collaboratori(id),
+            azione TEXT NOT NULL,
+            punti INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS azioni_per_collaboratore ON azioni(collaboratore, id);
+        CREATE INDEX IF NOT EXISTS azioni_per_data ON azioni(data, collaboratore, punti);
+        CREATE INDEX IF NOT EXISTS azioni_per_azione ON azioni(azione, collaboratore, data);
+        CREATE TABLE IF NOT EXISTS eventi (
+            seq INTEGER PRIMARY KEY,
+            ts TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            evento TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS eventi_base ON eventi(tipo, ts);
+    """
+
+    def __init__(self, filename="classifica_apex.sqlite3", cartella_cronologia="cronologia",
+                 politica_conservazione=POLITICA_CONSERVAZIONE, sola_lettura=False):
+        """
+        Archiviazione su SQLite in modalità WAL: ogni modifica aggiorna solo le righe
+        interessate (nessuna riscrittura completa) e viene registrata nella tabella eventi,
+        usata per la ricostruzione a un momento passato. Ogni `soglia_compattazione` eventi
+        si salva un'istantanea in `cartella_cronologia` (solo i collaboratori cambiati) come
+        punto di ripresa: una ricostruzione riapplica solo gli eventi successivi, e gli eventi
+        che partono da istantanee eliminate dalla conservazione vengono cancellati.
+        Per i momenti precedenti al primo evento si consulta la cronologia stessa.
+        La connessione è condivisa tra i thread e protetta da un lock; le modifiche restano
+        in una transazione aperta finché rendi_durevole non esegue il commit, così più
+        eventi ravvicinati condividono un solo commit (group commit).
+        Limite: il ClassificaManager tiene comunque tutte le azioni in memoria
+        (dati_collaboratori), quindi all'avvio carica legge l'intero database. SQLite rende
+        incrementali le scritture e le interrogazioni, non il caricamento né la memoria
+        occupata (vedi lo scenario sqlite di benchmark_apex.py, fino a 1.000.000 di azioni).
+        Con `sola_lettura` il database esistente viene aperto senza creare tabelle né cambiare
+        modalità, e la connessione rifiuta qualsiasi scrittura.
+        """
+        self.filename = filename
+        self._connessione = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        if sola_lettura:
+            self._connessione.execute("PRAGMA query_only=ON")
+        else:
+            self._connessione.execute("PRAGMA journal_mode=WAL")
+            self._connessione.execute("PRAGMA synchronous=FULL")
+            self._connessione.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._seq_registrato = 0
+        self._seq_durevole = 0
+        self._in_transazione = False
+        self._prossimo_ordine = self._connessione.execute("SELECT COALESCE(MAX(ordine), -1) + 1 FROM collaboratori").fetchone()[0]
+        self.archivio = ArchivioIstantanee(cartella_cronologia)
+        self.politica_conservazione = politica_conservazione
+        self._ultima_conservazione = time.monotonic()
+        self.eventi_da_compattare = 0
+        self.soglia_compattazione = 200
+        self._versioni_archiviate = {}
+
+    def carica(self, contenitore=list):
+        """
+        Legge tutte le azioni, nell'ordine di inserimento, per i dati in memoria del manager
+        (il costo cresce con il numero totale di azioni). Restituisce (dati, seq).
+        """
+        with self._lock:
+            dati = {}
+            righe = self._connessione.execute(
+                "SELECT c.nome, a.azione, a.punti, a.data FROM collaboratori c "
+                "LEFT JOIN azioni a ON a.collaboratore = c.id ORDER BY c.ordine, a.id"
+            )
+            for nome, azione, punti, data in righe:
+                azioni = dati.get(nome)
+                if azioni is None:
+                    azioni = dati[nome] = contenitore()
+                if azione is not None:
+                    azioni.append({"azione": azione, "punti": punti, "data": data})
+            seq = self._connessione.execute("SELECT COALESCE(MAX(seq), 0) FROM eventi").fetchone()[0]
+            self._seq_registrato = self._seq_durevole = seq
+            return dati, seq
+
+    def richiede_evento_base(self):
+        with self._lock:
+            if self._connessione.execute("SELECT 1 FROM eventi LIMIT 1").fetchone() is not None:
+                return False
+        return self.archivio.punto_di_ripresa() is None
+
+    def _id_collaboratore(self, nome, crea=True):
+        riga = self._connessione.execute("SELECT id FROM collaboratori WHERE nome = ?", (nome,)).fetchone()
+        if riga is not None or not crea:
+            return riga[0] if riga else None
+        cursore = self._connessione.execute("INSERT INTO collaboratori (nome, ordine) VALUES (?, ?)", (nome, self._prossimo_ordine))
+        self._prossimo_ordine += 1
+        return cursore.lastrowid
+
+    def _inserisci_azioni(self, id_collaboratore, voci):
+        self._connessione.executemany(
+            "INSERT INTO azioni (collaboratore, azione, punti, data) VALUES (?, ?, ?, ?)",
+            [(id_collaboratore, voce["azione"], voce["punti"], voce["data"]) for voce in voci],
+        )
+
+    def _applica_alle_tabelle(self, evento):
+        """Applica l'evento alle tabelle collaboratori e azioni; va chiamata con la transazione aperta."""
+        tipo = evento["tipo"]
+        if tipo in ("aggiungi", "nuovo_collaboratore"):
+            id_collaboratore = self._id_collaboratore(evento["nome"])
+            if tipo == "aggiungi":
+                self._inserisci_azioni(id_collaboratore, evento["voci"])
+        elif tipo == "elimina_riga":
+            self._connessione.execute(
+                "DELETE FROM azioni WHERE id = (SELECT id FROM azioni WHERE collaboratore = ? ORDER BY id LIMIT 1 OFFSET ?)",
+                (self._id_collaboratore(evento["nome"], crea=False), evento["indice"]),
+            )
+        elif tipo == "elimina_collaboratore":
+            id_collaboratore = self._id_collaboratore(evento["nome"], crea=False)
+            self._connessione.execute("DELETE FROM azioni WHERE collaboratore = ?", (id_collaboratore,))
+            self._connessione.execute("DELETE FROM collaboratori WHERE id = ?", (id_collaboratore,))
+        elif tipo == "rinomina":
+            # Come nel dizionario in memoria, il collaboratore rinominato passa in fondo all'ordine di inserimento
+            self._connessione.execute(
+                "UPDATE collaboratori SET nome = ?, ordine = ? WHERE nome = ?", (evento["a"], self._prossimo_ordine, evento["da"])
+            )
+            self._prossimo_ordine += 1
+        elif tipo == "base":
+            self._connessione.execute("DELETE FROM azioni")
+            self._connessione.execute("DELETE FROM collaboratori")
+            for nome, voci in evento["dati"].items():
+                self._inserisci_azioni(self._id_collaboratore(nome), voci)
+        elif tipo == "gruppo":
+            for sotto in evento["eventi"]:
+                self._applica_alle_tabelle(sotto)
+
+    def registra(self, evento):
+        """
+        Applica l'evento alle tabelle e lo aggiunge alla tabella eventi, nella transazione
+        aperta. Restituisce il riferimento da passare a rendi_durevole.
+        """
+        with self._lock:
+            if not self._in_transazione:
+                self._connessione.execute("BEGIN IMMEDIATE")
+                self._in_transazione = True
+            self._applica_alle_tabelle(evento)
+            self._connessione.execute(
+                "INSERT INTO eventi (seq, ts, tipo, evento) VALUES (?, ?, ?, ?)",
+                (evento["seq"], evento["ts"], evento["tipo"], json.dumps(evento, ensure_ascii=False, default=serializza_json)),
+            )
+            self._seq_registrato = evento["seq"]
+            return evento["seq"]
+
+    def rendi_durevole(self, riferimento):
+        """Esegue il commit se l'evento `riferimento` non è ancora stato confermato da un altro thread."""
+        with self._lock:
+            if self._seq_durevole >= riferimento or not self._in_transazione:
+                return
+            self._connessione.execute("COMMIT")
+            self._in_transazione = False
+            self._seq_durevole = self._seq_registrato
+
+    def evento_applicato(self, dati, versioni):
+        """Chiamata dopo ogni evento (con i dati bloccati): salva un punto di ripresa ogni `soglia_compattazione` eventi."""
+        self.eventi_da_compattare += 1
+        if self.eventi_da_compattare >= self.soglia_compattazione:
+            self.compatta(dati, versioni)
+
+    def compatta(self, dati, versioni):
+        """
+        Conferma le modifiche in sospeso, salva un'istantanea in cronologia come punto di ripresa
+        e riporta il contenuto del WAL nel database.
+        """
+        self.rendi_durevole(self._seq_registrato)
+        cambiati = {
+            nome for nome in dati
+            if nome not in self._versioni_archiviate or self._versioni_archiviate[nome] != versioni.get(nome, 0)
+        }
+        self.archivio.salva(dati, cambiati=cambiati, seq=self._seq_registrato)
+        self._versioni_archiviate = {nome: versioni.get(nome, 0) for nome in dati}
+        self.eventi_da_compattare = 0
+        if time.monotonic() - self._ultima_conservazione >= 3600:
+            self._applica_conservazione()
+            self._ultima_conservazione = time.monotonic()
+        with self._lock:
+            self._connessione.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _applica_conservazione(self):
+        """
+        Dirada le istantanee secondo la politica e cancella gli eventi che partivano da quelle eliminate.
+        Restituisce il numero di istantanee eliminate.
+        """
+        prima = self.archivio.seq_istantanee()
+        eliminate = self.archivio.applica_conservazione(self.politica_conservazione)
+        conservati = set(self.archivio.seq_istantanee())
+        # Gli eventi dopo l'ultimo punto di ripresa non vengono mai cancellati
+        intervalli = [
+            (inizio, fine) for inizio, fine in zip([0] + prima, prima)
+            if not segmento_da_conservare(inizio, fine, set(prima), conservati)
+        ]
+        with self._lock:
+            self._connessione.execute("BEGIN IMMEDIATE")
+            self._connessione.executemany("DELETE FROM eventi WHERE seq > ? AND seq <= ?", intervalli)
+            self._connessione.execute("COMMIT")
+        return eliminate
+
+    def pota_cronologia(self, elimina_legacy=False):
+        """Come ArchiviazioneJSON.pota_cronologia. Restituisce (istantanee eliminate, copie complete eliminate)."""
+        self.archivio.importa_file_legacy()
+        eliminate = self._applica_conservazione()
+        self._ultima_conservazione = time.monotonic()
+        return eliminate, self.archivio.pota_file_legacy() if elimina_legacy else 0
+
+    def dati_sostituiti(self):
+        """Chiamata dopo un evento "base": le versioni dei collaboratori ripartono da capo."""
+        self._versioni_archiviate.clear()
+
+    def ripresa_al(self, momento):
+        """
+        Restituisce (seq, blocchi, eventi) per ricostruire lo stato a `momento`: il punto di ripresa
+        più vicino nella cronologia (oppure 0 e None) e gli eventi successivi registrati entro `momento`.
+        """
+        seq, blocchi = self.archivio.punto_di_ripresa(momento) or (0, None)
+        with self._lock:
+            righe = self._connessione.execute(
+                "SELECT evento FROM eventi WHERE seq > ? AND ts <= ? ORDER BY seq", (seq, momento)
+            ).fetchall()
+        return seq, blocchi, (json.loads(evento) for evento, in righe)
+
+    def istantanea_al(self, momento):
+        """Dati dell'istantanea più recente entro `momento` nella cronologia, o None."""
+        return self.archivio.ripristina(momento)
+
+    def punteggi_istantanea_al(self, momento):
+        """Punteggi ({nome: punti}) dell'istantanea più recente entro `momento` nella cronologia, o None."""
+        return self.archivio.punteggi_al(momento)
+
+    def totali(self):
+        """Punteggio totale di ogni collaboratore, calcolato con SUM ... GROUP BY."""
+        with self._lock:
+            return dict(self._connessione.execute(
+                "SELECT c.nome, COALESCE(SUM(a.punti), 0) FROM collaboratori c "
+                "LEFT JOIN azioni a ON a.collaboratore = c.id GROUP BY c.id"
+            ))
+
+    def conta_azioni(self, nome, azione, inizio, fine):
+        """Numero di registrazioni di `azione` per `nome` con data in [inizio, fine) (usa l'indice per azione)."""
+        with self._lock:
+            return self._connessione.execute(
+                "SELECT COUNT(*) FROM azioni a JOIN collaboratori c ON c.id = a.collaboratore "
+                "WHERE a.azione = ? AND c.nome = ? AND a.data >= ? AND a.data < ?",
+                (azione, nome, inizio, fine),
+            ).fetchone()[0]
+
+    def classifica_periodo(self, inizio, fine):
+        """Classifica dei punti ottenuti con data in [inizio, fine), come lista di (nome, punti)."""
+        with self._lock:
+            return self._connessione.execute(
+                "SELECT c.nome, SUM(a.punti) AS totale FROM azioni a JOIN collaboratori c ON c.id = a.collaboratore "
+                "WHERE a.data >= ? AND a.data < ? GROUP BY c.id ORDER BY totale DESC, c.ordine",
+                (inizio, fine),
+            ).fetchall()
+
+    def importa_json(self, filename="classifica_apex_data.json", journal_filename="classifica_apex_journal.jsonl",
+                     cartella_cronologia="cronologia"):
+        """
+        Importazione una tantum da ArchiviazioneJSON: lo stato corrente (file principale più
+        giornale) diventa il contenuto delle tabelle e gli eventi del giornale vengono copiati
+        nella tabella eventi, così la ricostruzione a un momento passato resta possibile.
+        La cronologia non viene copiata nel database: le istantanee restano nella loro cartella,
+        che ArchiviazioneSQLite usa come archivio (con le impostazioni predefinite è la stessa).
+        Le copie complete delle versioni precedenti vengono importate nell'archivio come
+        istantanee, così restano consultabili anche dopo le istantanee salvate dal database.
+        Restituisce il numero di eventi importati.
+        """
+        with self._lock:
+            if self._connessione.execute("SELECT 1 FROM eventi LIMIT 1").fetchone() is not None:
+                raise ValueError(f"Il database '{self.filename}' contiene già dei dati.")
+        sorgente = ArchiviazioneJSON(filename, journal_filename, cartella_cronologia)
+        dati, seq = sorgente.carica()
+        eventi = [
+            (evento["seq"], evento["ts"], evento["tipo"], json.dumps(evento, ensure_ascii=False))
+            for evento in sorgente.eventi_registrati()
+        ]
+        sorgente.chiudi()
+        with self._lock:
+            self._connessione.execute("BEGIN IMMEDIATE")
+            self._connessione.executemany("INSERT INTO eventi (seq, ts, tipo, evento) VALUES (?, ?, ?, ?)", eventi)
+            for nome, voci in dati.items():
+                self._inserisci_azioni(self._id_collaboratore(nome), voci)
+            self._connessione.execute("COMMIT")
+            self._seq_registrato = self._seq_durevole = seq
+        if os.path.abspath(cartella_cronologia) == os.path.abspath(self.archivio.cartella):
+            self.archivio.importa_file_legacy()
+        if not eventi:
+            # Senza giornale lo stato corrente diventa il primo evento "base"
+            self.registra({"seq": seq + 1, "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "tipo": "base", "dati": dati})
+            self.rendi_durevole(seq + 1)
+        return len(eventi)
+
+    def chiudi(self):
+        self.rendi_durevole(self._seq_registrato)
+        with self._lock:
+            self._connessione.close()
+
+def converti_azioni(dati, contenitore):
+    """Porta gli elenchi di azioni letti da file alla rappresentazione in uso (liste o AzioniCompatte)."""
+    for nome, azioni in dati.items():
+        if not isinstance(azioni, contenitore):
+            dati[nome] = contenitore(azioni)
+    return dati
+
+# --- Indice dei nomi per la ricerca flessibile ---
+def a_una_modifica(a, b):
+    """
+    Vero se `b` si ottiene da `a` con al più una modifica (lettera cambiata, tolta, aggiunta
+    o due lettere adiacenti scambiate), cioè se la distanza di Damerau-Levenshtein è al più 1.
+    """
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+class IndiceNomi:
+    # Le parole più corte devono coincidere: con una lettera di differenza sarebbero nomi diversi
+    LUNGHEZZA_MINIMA_REFUSO = 4
+
+    def __init__(self, nomi=()):
+        """
+        Indice dei nomi dei collaboratori, aggiornato a ogni aggiunta, rinomina ed eliminazione.
+        - firma (parole normalizzate in ordine alfabetico) -> nomi: trova in tempo costante
+          lo stesso nome con le parole in un altro ordine, senza badare a maiuscole e accenti;
+        - parola -> nomi che la contengono, e variante della parola (anche con una lettera
+          in meno) -> parole: trova le parole a distanza 1 (refuso, lettera mancante o in più, lettere
+          scambiate) senza confrontare la parola con tutto il vocabolario.
+        """
+        self._per_firma = {}
+        self._parole_di = {}
+        self._nomi_per_parola = {}
+        self._cancellazioni = {}
+        for nome in nomi:
+            self.aggiungi(nome)
+
+    def __len__(self):
+        return len(self._parole_di)
+
+    @staticmethod
+    def normalizza(parola):
+        """Minuscole e senza accenti ('Niccolò' -> 'niccolo')."""
+        scomposta = unicodedata.normalize("NFKD", parola.lower())
+        return "".join(carattere for carattere in scomposta if not unicodedata.combining(carattere))
+
+    def parole(self, nome):
+        return tuple(sorted(self.normalizza(parola) for parola in nome.split()))
+
+    @staticmethod
+    def _varianti(parola):
+        """La parola stessa e tutte le sue versioni con una lettera in meno."""
+        return {parola} | {parola[:i] + parola[i + 1:] for i in range(len(parola))}
+
+    def aggiungi(self, nome):
+        if nome in self._parole_di:
+            return
+        parole = self.parole(nome)
+        self._parole_di[nome] = parole
+        self._per_firma.setdefault(parole, []).append(nome)
+        for parola in set(parole):
+            nomi = self._nomi_per_parola.get(parola)
+            if nomi is None:
+                nomi = self._nomi_per_parola[parola] = set()
+                if len(parola) >= self.LUNGHEZZA_MINIMA_REFUSO:
+                    for variante in self._varianti(parola):
+                        self._cancellazioni.setdefault(variante, set()).add(parola)
+            nomi.add(nome)
+
+    def rimuovi(self, nome):
+        parole = self._parole_di.pop(nome, None)
+        if parole is None:
+            return
+        omonimi = self._per_firma[parole]
+        omonimi.remove(nome)
+        if not omonimi:
+            del self._per_firma[parole]
+        for parola in set(parole):
+            nomi = self._nomi_per_parola[parola]
+            nomi.discard(nome)
+            if nomi:
+                continue
+            del self._nomi_per_parola[parola]
+            if len(parola) >= self.LUNGHEZZA_MINIMA_REFUSO:
+                for variante in self._varianti(parola):
+                    simili = self._cancellazioni[variante]
+                    simili.discard(parola)
+                    if not simili:
+                        del self._cancellazioni[variante]
+
+    def cerca(self, nome):
+        """Restituisce il nome registrato con le stesse parole (in qualsiasi ordine), o None."""
+        omonimi = self._per_firma.get(self.parole(nome))
+        return omonimi[0] if omonimi else None
+
+    def _parole_vicine(self, parola):
+        """Parole del vocabolario uguali a `parola` o a distanza 1."""
+        vicine = {parola} if parola in self._nomi_per_parola else set()
+        if len(parola) >= self.LUNGHEZZA_MINIMA_REFUSO - 1:
+            for variante in self._varianti(parola):
+                for simile in self._cancellazioni.get(variante, ()):
+                    if simile not in vicine and a_una_modifica(parola, simile):
+                        vicine.add(simile)
+        return vicine
+
+    def suggerisci(self, nome, limite=5, distanza_massima=2):
+        """
+        Restituisce fino a `limite` nomi simili come lista di (nome, distanza), dal più vicino.
+        Un nome è simile se ha lo stesso numero di parole e ogni parola coincide o differisce
+        di una sola modifica, per un totale di al più `distanza_massima` modifiche.
+        """
+        parole = self.parole(nome)
+        if not parole:
+            return []
+        # I candidati vengono dalla parola più rara: gli altri nomi non possono essere simili
+        piu_rara = None
+        for parola in parole:
+            vicine = self._parole_vicine(parola)
+            frequenza = sum(len(self._nomi_per_parola[vicina]) for vicina in vicine)
+            if frequenza == 0:
+                return []
+            if piu_rara is None or frequenza < piu_rara[0]:
+                piu_rara = (frequenza, vicine)
+        candidati = set()
+        for vicina in piu_rara[1]:
+            candidati.update(self._nomi_per_parola[vicina])
+        risultati = []
+        for candidato in candidati:
+            parole_candidato = self._parole_di[candidato]
+            if len(parole_candidato) != len(parole):
+                continue
+            distanza = self._distanza_nomi(parole, parole_candidato, distanza_massima)
+            if distanza <= distanza_massima:
+                risultati.append((distanza, candidato))
+        risultati.sort()
+        return [(candidato, distanza) for distanza, candidato in risultati[:limite]]
+
+    @staticmethod
+    def _distanza_nomi(parole, parole_candidato, massimo):
+        """Somma minima delle distanze tra le parole, abbinandole in qualsiasi ordine."""
+        if len(parole) > 4:
+            abbinamenti = [parole_candidato]
+        else:
+            abbinamenti = itertools.permutations(parole_candidato)
+        migliore = massimo + 1
+        for abbinamento in abbinamenti:
+            totale = 0
+            for parola, altra in zip(parole, abbinamento):
+                if parola != altra:
+                    totale += 1 if a_una_modifica(parola, altra) else massimo + 1
+                if totale >= migliore:
+                    break
+            migliore = min(migliore, totale)
+        return migliore
+
+# --- Indice temporale delle azioni (giorno, settimana, mese) ---
+GRANULARITA_PERIODI = ("giorno", "settimana", "mese")
+# Numero del giorno (date.toordinal) del 1970-01-01, per convertire le date delle azioni compatte
+_ORDINALE_EPOCA = _EPOCA.toordinal()
+# Le date distinte sono poche (una per giorno di attività): la conversione si memorizza
+_ORDINALI_GIORNI = {}
+
+def giorno_ordinale(data):
+    """Restituisce il numero del giorno (date.toordinal) di una data "AAAA-MM-GG[ HH:MM:SS]"."""
+    giorno = data[:10]
+    ordinale = _ORDINALI_GIORNI.get(giorno)
+    if ordinale is None:
+        ordinale = _ORDINALI_GIORNI[giorno] = date.fromisoformat(giorno).toordinal()
+    return ordinale
+
+def limiti_periodo(granularita, giorno):
+    """
+    Restituisce l'intervallo [inizio, fine) di giorni ordinali del periodo che contiene `giorno`:
+    il giorno stesso, la settimana ISO (da lunedì) o il mese di calendario.
+    """
+    if granularita == "giorno":
+        return giorno, giorno + 1
+    if granularita == "settimana":
+        inizio = giorno - date.fromordinal(giorno).weekday()
+        return inizio, inizio + 7
+    if granularita == "mese":
+        primo = date.fromordinal(giorno).replace(day=1)
+        successivo = (primo + timedelta(days=32)).replace(day=1)
+        return primo.toordinal(), successivo.toordinal()
+    raise ValueError(f"Granularità '{granularita}' non valida: usa {', '.join(GRANULARITA_PERIODI)}.")
+
+def giorno_intero(data):
+    """
+    Restituisce il giorno ordinale di un limite 'AAAA-MM-GG' (o alle 00:00:00), oppure None
+    se il limite cade a metà giornata e l'indice per giorno non basta a rispondere.
+    """
+    if len(data) == 10 or data[10:] in (" 00:00:00", "T00:00:00"):
+        return giorno_ordinale(data)
+    return None
+
+def etichetta_periodo(granularita, inizio):
+    """Etichetta leggibile del periodo che inizia il giorno ordinale `inizio` (es. 2025-09-15, 2025-W38, 2025-09)."""
+    giorno = date.fromordinal(inizio)
+    if granularita == "settimana":
+        anno, settimana, _ = giorno.isocalendar()
+        return f"{anno}-W{settimana:02d}"
+    if granularita == "mese":
+        return giorno.strftime("%Y-%m")
+    return giorno.isoformat()
+
+class SerieGiornaliera:
+    __slots__ = ("giorni", "punti", "conteggi")
+
+    def __init__(self, giorni, punti, conteggi=None):
+        """
+        Punti e numero di azioni nel tempo, memorizzati come somme prefisse: il totale di un
+        qualsiasi intervallo di giorni costa due ricerche binarie.
+        `giorni` (ordinali, crescenti) e `punti` sono colonne parallele con una riga per azione
+        oppure, se sono indicati anche i `conteggi`, una riga per giorno con i totali del giorno.
+        """
+        self.giorni = array("l", giorni)
+        self.punti = array("q", itertools.accumulate(punti, initial=0))
+        self.conteggi = None if conteggi is None else array("l", itertools.accumulate(conteggi, initial=0))
+
+    def totale(self, inizio, fine):
+        """Restituisce (punti, conteggio) dei giorni ordinali in [inizio, fine)."""
+        i = bisect.bisect_left(self.giorni, inizio)
+        j = bisect.bisect_left(self.giorni, fine)
+        conteggio = j - i if self.conteggi is None else self.conteggi[j] - self.conteggi[i]
+        return self.punti[j] - self.punti[i], conteggio
+
+    def cumulato(self, fine):
+        """Restituisce i punti accumulati prima del giorno ordinale `fine`."""
+        return self.punti[bisect.bisect_left(self.giorni, fine)]
+
+def colonne_per_giorno(azioni):
+    """
+    Restituisce le colonne (giorni ordinali, nomi delle azioni, punti) delle voci,
+    senza costruire i dizionari delle azioni compatte.
+    """
+    if isinstance(azioni, AzioniCompatte):
+        return azioni.colonne_per_giorno()
+    try:
+        giorni = [_ORDINALI_GIORNI[voce["data"][:10]] for voce in azioni]
+    except KeyError:
+        giorni = [giorno_ordinale(voce["data"]) for voce in azioni]
+    return giorni, [voce["azione"] for voce in azioni], [voce["punti"] for voce in azioni]
+
+def righe_per_giorno(azioni):
+    """Conta le voci per (giorno ordinale, azione, punti): un Counter con poche chiavi anche per molte voci."""
+    return Counter(zip(*colonne_per_giorno(azioni)))
+
+def indice_temporale(azioni):
+    """
+    Restituisce l'indice temporale delle azioni di un collaboratore: azione (None = tutte) -> SerieGiornaliera.
+    """
+    giorni, nomi, punti = colonne_per_giorno(azioni)
+    if any(precedente > successivo for precedente, successivo in zip(giorni, itertools.islice(giorni, 1, None))):
+        # Azioni registrate con una data passata: le colonne si riordinano per giorno
+        ordine = sorted(range(len(giorni)), key=giorni.__getitem__)
+        giorni = [giorni[i] for i in ordine]
+        nomi = [nomi[i] for i in ordine]
+        punti = [punti[i] for i in ordine]
+    indice = {None: SerieGiornaliera(giorni, punti)}
+    distinte = set(nomi)
+    if len(distinte) == 1:
+        # Una sola azione: la sua serie coincide con quella del totale e viene condivisa
+        indice[nomi[0]] = indice[None]
+        return indice
+    for azione in distinte:
+        scelte = [nome == azione for nome in nomi]
+        indice[azione] = SerieGiornaliera(itertools.compress(giorni, scelte), itertools.compress(punti, scelte))
+    return indice
+
+def serie_da_giorni(per_giorno):
+    """Costruisce una SerieGiornaliera da un dizionario giorno ordinale -> [punti, conteggio]."""
+    giorni = sorted(per_giorno)
+    return SerieGiornaliera(giorni, [per_giorno[giorno][0] for giorno in giorni], [per_giorno[giorno][1] for giorno in giorni])
+
+# --- Classifiche a un momento passato e movimenti in classifica ---
+def normalizza_momento(momento):
+    """
+    Restituisce il momento nel formato delle date delle azioni: 'AAAA-MM-GG' (inizio del giorno)
+    o 'AAAA-MM-GG HH:MM:SS'. Solleva ValueError se non è una data valida.
+    """
+    if len(momento) == 10:
+        return date.fromisoformat(momento).isoformat()
+    return datetime.fromisoformat(momento).strftime("%Y-%m-%d %H:%M:%S")
+
+def istante_precedente(momento):
+    """Il secondo che precede `momento`: gli eventi registrati entro questo istante sono quelli prima di `momento`."""
+    return (datetime.fromisoformat(momento) - timedelta(seconds=1)).strftime("%Y-%m-%d %H:%M:%S")
+
+def movimenti_tra(prima, dopo):
+    """
+    Confronta due classifiche (liste di (nome, punteggio) dal primo all'ultimo).
+    Per ogni collaboratore della seconda restituisce posizione, posizione precedente, variazione
+    (positiva se è salito) e punti guadagnati, dai più saliti ai più scesi; chi non era nella
+    prima ha posizione precedente e variazione None e compare in fondo.
+    """
+    precedenti = {nome: (posizione, punti) for posizione, (nome, punti) in enumerate(prima, start=1)}
+    movimenti = []
+    for posizione, (nome, punti) in enumerate(dopo, start=1):
+        posizione_precedente, punti_precedenti = precedenti.get(nome, (None, 0))
+        movimenti.append({
+            "nome": nome,
+            "posizione": posizione,
+            "posizione_precedente": posizione_precedente,
+            "variazione": None if posizione_precedente is None else posizione_precedente - posizione,
+            "punti": punti,
+            "punti_guadagnati": punti - punti_precedenti,
+        })
+    movimenti.sort(key=lambda movimento: (movimento["variazione"] is None, -(movimento["variazione"] or 0),
+                                          movimento["posizione"]))
+    return movimenti
+
+# --- Viste immutabili della classifica (copy-on-write) ---
+# Marcatori delle modifiche tra due viste (vedi MappaCondivisa.derivata)
+_RIMOSSO = object()
+_REINSERITO = object()
+_MODIFICATO = object()
+
+class MappaCondivisa(Mapping):
+    """
+    Dizionario di sola lettura che condivide con le versioni precedenti le chiavi non cambiate:
+    un dizionario di base che nessuno modifica più, le chiavi della base sostituite o rimosse e
+    le chiavi aggiunte in fondo. L'ordine delle chiavi è quello del dizionario equivalente.
+    Le modifiche si accumulano di versione in versione finché non superano circa la radice
+    quadrata delle chiavi; a quel punto la nuova versione riparte da una base completa.
+    """
+    __slots__ = ("_base", "_sostituite", "_aggiunte", "_lunghezza")
+
+    def __init__(self, base=None):
+        self._base = {} if base is None else base
+        self._sostituite = {}
+        self._aggiunte = {}
+        self._lunghezza = len(self._base)
+
+    def __getitem__(self, chiave):
+        if chiave in self._aggiunte:
+            return self._aggiunte[chiave]
+        valore = self._sostituite.get(chiave, self._base)
+        if valore is self._base:
+            return self._base[chiave]
+        if valore is _RIMOSSO:
+            raise KeyError(chiave)
+        return valore
+
+    def __contains__(self, chiave):
+        try:
+            self[chiave]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return self._lunghezza
+
+    def __iter__(self):
+        sostituite = self._sostituite
+        for chiave in self._base:
+            if sostituite.get(chiave) is not _RIMOSSO:
+                yield chiave
+        yield from self._aggiunte
+
+    def derivata(self, modifiche):
+        """
+        Restituisce una nuova versione con le `modifiche` (chiave -> (stato, valore)) applicate
+        in ordine: _RIMOSSO toglie la chiave, _REINSERITO la sposta in fondo (come un dizionario
+        dopo del e un nuovo inserimento), _MODIFICATO ne cambia il valore lasciandola al suo posto.
+        Il costo dipende dalle modifiche accumulate, non dal numero di chiavi.
+        """
+        nuova = MappaCondivisa.__new__(MappaCondivisa)
+        nuova._base = self._base
+        nuova._sostituite = dict(self._sostituite)
+        nuova._aggiunte = dict(self._aggiunte)
+        nuova._lunghezza = self._lunghezza
+        for chiave, (stato, valore) in modifiche.items():
+            presente = chiave in nuova
+            if stato is _MODIFICATO and presente:
+                if chiave in nuova._aggiunte:
+                    nuova._aggiunte[chiave] = valore
+                else:
+                    nuova._sostituite[chiave] = valore
+                continue
+            if presente:
+                nuova._lunghezza -= 1
+                if nuova._aggiunte.pop(chiave, _RIMOSSO) is _RIMOSSO:
+                    nuova._sostituite[chiave] = _RIMOSSO
+            if stato is not _RIMOSSO:
+                nuova._aggiunte[chiave] = valore
+                nuova._lunghezza += 1
+        if len(nuova._sostituite) + len(nuova._aggiunte) > max(64, int(nuova._lunghezza ** 0.5)):
+            return MappaCondivisa(dict(nuova.items()))
+        return nuova
+
+class ClassificaABlocchi:
+    """
+    Elenco ordinato delle chiavi della classifica diviso in blocchi di al più 2 * DIMENSIONE_BLOCCO.
+    Inserimento, rimozione e posizione costano un blocco; istantanea() restituisce una copia di
+    sola lettura che condivide i blocchi, e un blocco condiviso viene copiato solo quando cambia.
+    """
+    DIMENSIONE_BLOCCO = 256
+    __slots__ = ("_blocchi", "_primi", "_privati", "_lunghezza")
+
+    def __init__(self, chiavi=()):
+        chiavi = sorted(chiavi)
+        passo = self.DIMENSIONE_BLOCCO
+        self._blocchi = [chiavi[inizio:inizio + passo] for inizio in range(0, len(chiavi), passo)]
+        self._primi = [blocco[0] for blocco in self._blocchi]
+        self._privati = [True] * len(self._blocchi)
+        self._lunghezza = len(chiavi)
+
+    def __len__(self):
+        return self._lunghezza
+
+    def _posizione_blocco(self, chiave):
+        return max(bisect.bisect_right(self._primi, chiave) - 1, 0)
+
+    def _blocco_privato(self, indice):
+        if not self._privati[indice]:
+            self._blocchi[indice] = list(self._blocchi[indice])
+            self._privati[indice] = True
+        return self._blocchi[indice]
+
+    def aggiungi(self, chiave):
+        self._lunghezza += 1
+        if not self._blocchi:
+            self._blocchi, self._primi, self._privati = [[chiave]], [chiave], [True]
+            return
+        indice = self._posizione_blocco(chiave)
+        blocco = self._blocco_privato(indice)
+        bisect.insort(blocco, chiave)
+        self._primi[indice] = blocco[0]
+        if len(blocco) > 2 * self.DIMENSIONE_BLOCCO:
+            meta = len(blocco) // 2
+            self._blocchi[indice:indice + 1] = [blocco[:meta], blocco[meta:]]
+            self._primi[indice:indice + 1] = [blocco[0], blocco[meta]]
+            self._privati[indice:indice + 1] = [True, True]
+
+    def rimuovi(self, chiave):
+        indice = self._posizione_blocco(chiave)
+        blocco = self._blocco_privato(indice)
+        del blocco[bisect.bisect_left(blocco, chiave)]
+        self._lunghezza -= 1
+        if blocco:
+            self._primi[indice] = blocco[0]
+        else:
+            del self._blocchi[indice], self._primi[indice], self._privati[indice]
+
+    def posizione(self, chiave):
+        """Numero di chiavi che precedono `chiave` (la sua posizione da 0 se è presente)."""
+        indice = self._posizione_blocco(chiave)
+        precedenti = sum(len(blocco) for blocco in self._blocchi[:indice])
+        return precedenti + (bisect.bisect_left(self._blocchi[indice], chiave) if self._blocchi else 0)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocchi)
+
+    def istantanea(self):
+        """Restituisce l'elenco attuale come ClassificaCondivisa; i blocchi diventano condivisi."""
+        self._privati = [False] * len(self._blocchi)
+        return ClassificaCondivisa(list(self._blocchi), self._lunghezza)
+
+class ClassificaCondivisa(Sequence):
+    """Sequenza di sola lettura sui blocchi di una ClassificaABlocchi: indicizzazione, fette e iterazione."""
+    __slots__ = ("_blocchi", "_inizi", "_primi", "_lunghezza")
+
+    def __init__(self, blocchi, lunghezza):
+        self._blocchi = blocchi
+        self._inizi = list(itertools.accumulate((len(blocco) for blocco in blocchi[:-1]), initial=0))
+        self._primi = None
+        self._lunghezza = lunghezza
+
+    def posizione(self, chiave):
+        """Numero di chiavi che precedono `chiave` (la sua posizione da 0 se è presente)."""
+        if not self._blocchi:
+            return 0
+        if self._primi is None:
+            self._primi = [blocco[0] for blocco in self._blocchi]
+        indice = max(bisect.bisect_right(self._primi, chiave) - 1, 0)
+        return self._inizi[indice] + bisect.bisect_left(self._blocchi[indice], chiave)
+
+    def __len__(self):
+        return self._lunghezza
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocchi)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inizio, fine, passo = indice.indices(self._lunghezza)
+            if passo != 1:
+                return list(self)[indice]
+            risultato = []
+            blocco = bisect.bisect_right(self._inizi, inizio) - 1
+            while inizio < fine:
+                scostamento = inizio - self._inizi[blocco]
+                parte = self._blocchi[blocco][scostamento:scostamento + fine - inizio]
+                risultato.extend(parte)
+                inizio += len(parte)
+                blocco += 1
+            return risultato
+        if indice < 0:
+            indice += self._lunghezza
+        if not 0 <= indice < self._lunghezza:
+            raise IndexError("indice della classifica fuori intervallo")
+        blocco = bisect.bisect_right(self._inizi, indice) - 1
+        return self._blocchi[blocco][indice - self._inizi[blocco]]
+
+# Voci tenute da RegistroModifiche: oltre, i risultati più vecchi si ricalcolano da capo
+MODIFICHE_REGISTRATE = 10000
+# Classifiche per periodo tenute in memoria e aggiornate per differenza (vedi _classifica_giorni)
+CLASSIFICHE_PERIODO_MEMORIZZATE = 8
+
+class RegistroModifiche:
+    """
+    Collaboratori modificati, in ordine di contatore delle versioni (vedi _invalida_frammenti).
+    Chi ha calcolato un risultato su una vista ricava dal registro i soli nomi da ricalcolare
+    per una vista successiva. Si tengono al più `massimo` voci: per contatori più vecchi il
+    registro non sa rispondere e il risultato va ricalcolato da capo.
+    Scrive solo chi ha _lock_eventi; i lettori non prendono lock (le liste si sostituiscono, non si accorciano).
+    """
+    def __init__(self, massimo=MODIFICHE_REGISTRATE):
+        self.massimo = massimo
+        self._voci = ([], [])
+        # Le modifiche con contatore fino a _perso non sono più nel registro
+        self._perso = 0
+
+    def registra(self, contatore, nome):
+        contatori, nomi = self._voci
+        nomi.append(nome)
+        contatori.append(contatore)
+        if len(contatori) > self.massimo:
+            meta = len(contatori) // 2
+            # Prima il limite e poi le voci: un lettore concorrente trova al più un limite troppo alto
+            self._perso = contatori[meta - 1]
+            self._voci = (contatori[meta:], nomi[meta:])
+
+    def azzera(self, contatore):
+        """Tutti i collaboratori sono cambiati (caricamento o evento "base") con il `contatore` indicato."""
+        self._perso = contatore
+        self._voci = ([], [])
+
+    def cambiati(self, dal, al):
+        """Nomi modificati con contatore in (dal, al], o None se il registro non risale fino a `dal`."""
+        contatori, nomi = self._voci
+        if dal < self._perso:
+            return None
+        return set(nomi[bisect.bisect_right(contatori, dal):bisect.bisect_right(contatori, al)])
+
+class VistaClassifica:
+    __slots__ = ("seq", "contatore", "dati", "classifica", "punteggi", "ordine", "versioni", "serie_squadra")
+
+    def __init__(self, seq, contatore, dati, classifica, punteggi, ordine, versioni, serie_squadra):
+        """
+        Copia della classifica dopo l'evento `seq`, che nessuno modifica più: chi la legge
+        (report, API, GUI) non ha bisogno di lock e non vede mai una modifica a metà.
+        - dati: nome -> azioni (tupla di dizionari, o copia delle AzioniCompatte), nell'ordine
+          di inserimento dei collaboratori;
+        - classifica: sequenza di (-punti, ordine di inserimento, nome), dal primo all'ultimo;
+        - contatore: contatore delle versioni alla creazione, per RegistroModifiche;
+        - punteggi, ordine e versioni: nome -> totale, ordine di inserimento e versione
+          (vedi _invalida_frammenti);
+        - serie_squadra: azione (None = tutte) -> SerieGiornaliera dell'intera squadra,
+          o None finché nessuno ha chiesto l'indice temporale della squadra.
+        dati, punteggi, ordine e versioni sono MappaCondivisa e la classifica una ClassificaCondivisa:
+        le parti non modificate sono condivise con la vista precedente.
+        """
+        self.seq = seq
+        self.contatore = contatore
+        self.dati = dati
+        self.classifica = classifica
+        self.punteggi = punteggi
+        self.ordine = ordine
+        self.versioni = versioni
+        self.serie_squadra = serie_squadra
+
+    def classifica_ordinata(self):
+        return [(nome, -punti_negativi) for punti_negativi, _, nome in self.classifica]
+
+    def top_k(self, k):
+        return [(nome, -punti_negativi) for punti_negativi, _, nome in self.classifica[:k]]
+
+def chiave_periodo(vista, nome, punti):
+    """
+    Chiave di ordinamento delle classifiche per periodo: punti nel periodo e, a parità,
+    l'ordine della classifica generale della vista.
+    """
+    return (-punti, -vista.punteggi.get(nome, 0), vista.ordine.get(nome, -1), nome)
+
+class ClassificaDelPeriodo:
+    """
+    Classifica dei punti di un intervallo di giorni aggiornata per differenza: le chiavi
+    (chiave_periodo) dei collaboratori con punti nel periodo in una ClassificaABlocchi.
+    `contatore` è quello della vista su cui è calcolata (vedi RegistroModifiche).
+    """
+    __slots__ = ("contatore", "_chiavi", "_ordinata", "_posizioni")
+
+    def __init__(self, vista, punti_per_nome):
+        self.contatore = vista.contatore
+        self._chiavi = {nome: chiave_periodo(vista, nome, punti) for nome, punti in punti_per_nome if punti}
+        self._ordinata = ClassificaABlocchi(self._chiavi.values())
+        self._posizioni = None
+
+    def aggiorna(self, vista, nome, punti):
+        """Riposiziona `nome` con i suoi `punti` nel periodo (0 se non ne ha o non esiste più)."""
+        chiave = chiave_periodo(vista, nome, punti) if punti else None
+        precedente = self._chiavi.pop(nome, None)
+        if precedente == chiave:
+            if chiave is not None:
+                self._chiavi[nome] = chiave
+            return
+        if precedente is not None:
+            self._ordinata.rimuovi(precedente)
+        if chiave is not None:
+            self._chiavi[nome] = chiave
+            self._ordinata.aggiungi(chiave)
+        self._posizioni = None
+
+    def voci(self, limite=None):
+        """Le prime `limite` righe (tutte se None) come lista di (nome, punti)."""
+        return [(chiave[3], -chiave[0]) for chiave in itertools.islice(self._ordinata, limite)]
+
+    def posizioni(self):
+        """nome -> (posizione da 1, punti), ricalcolato solo dopo un cambiamento dell'ordine."""
+        if self._posizioni is None:
+            self._posizioni = {chiave[3]: (posizione, -chiave[0]) for posizione, chiave in enumerate(self._ordinata, start=1)}
+        return self._posizioni
+
+# --- Importazione di azioni in blocco ---
+# Righe lette per riconoscere il separatore di un file di presenze
+RIGHE_CAMPIONE_PRESENZE = 20
+
+def leggi_righe_presenze(testo, azione_predefinita="Meeting day"):
+    """
+    Interpreta un file CSV di presenze e restituisce una lista di (nome, azione, quantita, riga),
+    dove `riga` è il numero della riga nel file (da 1, contando intestazione e righe vuote).
+    Ogni riga contiene il nome e, facoltativamente, azione e quantità; un semplice elenco
+    di nomi (uno per riga) registra `azione_predefinita` una volta per ciascuno.
+    Sono accettati i separatori virgola, punto e virgola e tabulazione, e una riga di intestazione;
+    un nome che contiene il separatore va scritto tra virgolette (es. "Rossi, Mario").
+    Il separatore si riconosce dalle prime righe dopo l'intestazione. Solleva ValueError se una
+    riga non è un CSV valido: in quel caso nessuna riga viene registrata.
+    """
+    righe_testo = [(numero, riga) for numero, riga in enumerate(testo.splitlines(), start=1) if riga.strip()]
+    if righe_testo:
+        primo_campo = righe_testo[0][1]
+        for separatore in ",;\t":
+            primo_campo = primo_campo.split(separatore)[0]
+        if primo_campo.strip().strip('"').lower() in ("nome", "collaboratore"):
+            righe_testo = righe_testo[1:]
+    if not righe_testo:
+        return []
+    campione = [riga for _, riga in righe_testo[:RIGHE_CAMPIONE_PRESENZE]]
+    try:
+        dialetto = csv.Sniffer().sniff("\n".join(campione), delimiters=",;\t")
+        separatore = dialetto.delimiter
+    except csv.Error:
+        # Righe con un numero di campi diverso: vale il separatore presente in più righe
+        dialetto = csv.excel
+        separatore = max(",;\t", key=lambda candidato: sum(candidato in riga for riga in campione))
+    righe = []
+    for numero, riga in righe_testo:
+        # Ogni riga si legge da sola, così gli errori e gli esiti riportano il numero di riga del file
+        try:
+            campi = [campo.strip() for campo in next(csv.reader([riga], dialetto, delimiter=separatore))]
+        except csv.Error as e:
+            raise ValueError(f"Riga {numero}: {e}") from e
+        azione = campi[1] if len(campi) > 1 and campi[1] else azione_predefinita
+        quantita = campi[2] if len(campi) > 2 and campi[2] else 1
+        righe.append((campi[0], azione, quantita, numero))
+    return righe
+
+# Registrazioni massime della stessa azione in una volta sola (ognuna è una voce dell'evento)
+QUANTITA_MASSIMA = 100
+
+class ClassificaManager:
+    def __init__(self, filename="classifica_apex_data.json", pubblicatore=None, journal_filename="classifica_apex_journal.jsonl",
+                 compatto=False, cartella_cronologia="cronologia", politica_conservazione=POLITICA_CONSERVAZIONE,
+                 archiviazione=None):
+        """
+        Gestisce la classifica dei collaboratori per l'Apex Challenge.
+        Se viene fornito un `pubblicatore`, il caricamento su GitHub avviene in background.
+        Ogni modifica viene registrata dall'`archiviazione`: per impostazione predefinita
+        ArchiviazioneJSON con i file indicati, oppure ad esempio ArchiviazioneSQLite.
+        Con `compatto=True` le azioni sono tenute in memoria come AzioniCompatte e il file
+        principale viene scritto nel formato compatto (formato 3); i formati precedenti
+        vengono comunque letti.
+        """
+        self.pubblicatore = pubblicatore
+        self.compatto = compatto
+        self.contenitore_azioni = AzioniCompatte if compatto else list
+        # Facoltativo: PianificatoreReport che accorpa le rigenerazioni del report
+        self.pianificatore = None
+        # Funzioni chiamate con la variazione dei punteggi dopo ogni modifica (es. DiffusoreEventi)
+        self.ascoltatori = []
+        # Indice dei nomi per cerca_collaboratore_flessibile e i suggerimenti
+        self.indice_nomi = IndiceNomi()
+        if archiviazione is None:
+            archiviazione = ArchiviazioneJSON(filename, journal_filename, cartella_cronologia, politica_conservazione, compatto)
+        self.archiviazione = archiviazione
+        # Unico scrittore: ogni modifica (verifica compresa) avviene con questo lock.
+        # È rientrante perché i metodi pubblici verificano e poi chiamano _registra_evento.
+        # I lettori usano vista() e non lo attendono, salvo per copiare le modifiche nella nuova vista.
+        self._lock_eventi = threading.RLock()
+        self._vista = None
+        self._nomi_da_copiare = {}
+        # Il report (e le sue cache) si genera da una vista, con un lock proprio
+        self._lock_report = threading.Lock()
+        self.seq = 0
+        self.dati_collaboratori = {}
+        # Indice dei punteggi: totale per collaboratore e classifica ordinata a blocchi (bisect).
+        # A parità di punti vale l'ordine di inserimento, come nell'ordinamento stabile del dizionario.
+        self.punteggi = {}
+        self._ordine_inserimento = {}
+        self._prossimo_ordine = 0
+        self._classifica = ClassificaABlocchi()
+        self.punti_azioni = {
+            "Meeting day": 50,
+            "Change your life": 50,
+            "Incentive da 5": 50,
+            "Collaboratore diretto": 100,
+            "Ospite step one": 25,
+        }
+        # Azioni registrabili una sola volta per periodo ("giorno" o "settimana")
+        self.regole_frequenza = {
+            "Meeting day": "giorno",
+        }
+        # Indice anti-duplicati: (nome, periodo, azione) -> numero di registrazioni
+        self._registrazioni_periodo = {}
+        # Indice temporale. Per collaboratore: nome -> (versione, indice_temporale), costruito
+        # alla prima richiesta e ricostruito solo quando la versione del collaboratore cambia.
+        # Per la squadra: azione -> giorno -> [punti, conteggio], costruito alla prima richiesta
+        # e poi aggiornato voce per voce; le serie si ricostruiscono solo per le azioni cambiate.
+        self._indici_temporali = {}
+        self._giorni_squadra = None
+        self._serie_squadra = {}
+        # Classifiche per periodo già calcolate, (inizio, fine, azione) -> ClassificaDelPeriodo:
+        # a ogni richiesta si aggiornano solo i collaboratori cambiati (vedi RegistroModifiche)
+        self._classifiche_periodo = OrderedDict()
+        self._lock_periodi = threading.Lock()
+        # Punteggi registrati nel giornale e nella cronologia a momenti passati (istante -> {nome: punti}):
+        # il passato non cambia, quindi restano validi; il lock protegge solo la cache
+        self._punteggi_registrati = OrderedDict()
+        self._lock_storico = threading.Lock()
+        # Cache dei frammenti del report: ogni collaboratore ha una versione che cambia
+        # a ogni modifica delle sue azioni; si rigenera solo ciò che è cambiato.
+        self._contatore_versioni = 0
+        self._versioni = {}
+        self._registro_modifiche = RegistroModifiche()
+        self._cache_righe = {}
+        self.frammenti_rigenerati = {"righe": 0, "dettagli": 0}
+        # Copia statica in JSON di classifica e dettagli (per GitHub Pages): per ogni pagina
+        # il testo scritto, per ogni collaboratore la versione scritta.
+        self._pagine_statiche = {}
+        self._dettagli_statici = {}
+        self._dati_statici_allineati = False
+        # Vista dell'ultima scrittura dei dati statici, per riscrivere solo ciò che è cambiato
+        self._vista_statica = None
+        self.carica_dati()
+
+    def standardizza_nome(self, nome_completo):
+        """
+        Standardizza un nome e cognome, rendendoli uniformi (es. '  igor Claudio  previtera' -> 'Igor Claudio Previtera').
+        La funzione rimuove gli spazi in eccesso e mette ogni parola in maiuscolo, senza cambiarne l'ordine.
+        """
+        return " ".join(word.capitalize() for word in nome_completo.strip().split())
+
+    def cerca_collaboratore_flessibile(self, nome_input):
+        """
+        Cerca un collaboratore esistente in modo flessibile.
+        Restituisce il nome standardizzato del collaboratore trovato o None se non c'è corrispondenza.
+        """
+        nome_input_std = self.standardizza_nome(nome_input)
+        
+        # 1. Cerca corrispondenza esatta con il nome standardizzato
+        if nome_input_std in self.dati_collaboratori:
+            return nome_input_std
+        
+        # 2. Cerca corrispondenza flessibile (parole in qualsiasi ordine, senza accenti) nell'indice dei nomi
+        return self.indice_nomi.cerca(nome_input_std)
+
+    def suggerisci_collaboratori(self, nome_input, limite=5):
+        """
+        Restituisce i nomi dei collaboratori simili a `nome_input` (refusi, lettere mancanti,
+        in più o scambiate), dal più simile, per proporli quando la ricerca esatta non trova nulla.
+        """
+        # L'indice cambia con le modifiche: la ricerca (breve) avviene con il lock dello scrittore
+        with self._lock_eventi:
+            return [nome for nome, _ in self.indice_nomi.suggerisci(self.standardizza_nome(nome_input), limite)]
+
+    def modifica_nome_collaboratore(self, nome_attuale, nuovo_nome):
+        """
+        Modifica il nome di un collaboratore e aggiorna i dati.
+        """
+        nome_attuale_std = self.standardizza_nome(nome_attuale)
+        nuovo_nome_std = self.standardizza_nome(nuovo_nome)
+
+        with self._lock_eventi:
+            if nome_attuale_std not in self.dati_collaboratori:
+                return False, f"Errore: Il collaboratore '{nome_attuale_std}' non esiste."
+            # Controllo per evitare sovrascritture accidentali
+            if nuovo_nome_std in self.dati_collaboratori and nuovo_nome_std != nome_attuale_std:
+                return False, f"Errore: Il nome '{nuovo_nome_std}' esiste già."
+            
+            riferimento = self._registra_evento({"tipo": "rinomina", "da": nome_attuale_std, "a": nuovo_nome_std},
+                                                attendi_durabilita=False)
+        self.archiviazione.rendi_durevole(riferimento)
+        self.genera_report_html_e_carica()
+        return True, f"Nome '{nome_attuale_std}' modificato in '{nuovo_nome_std}'."
+        
+    def carica_dati(self):
+        """
+        Carica i dati della classifica dall'archiviazione e ricostruisce gli indici in memoria.
+        I ripristini automatici (file corrotto, giornale, cronologia) sono gestiti dall'archiviazione.
+        """
+        self.dati_collaboratori, self.seq = self.archiviazione.carica(self.contenitore_azioni)
+        self._ricostruisci_indici()
+
+        # Il primo evento di uno storico nuovo è una copia completa dei dati: è il punto di
+        # partenza per ogni ripristino successivo. Viene registrato con la prima modifica,
+        # così i comandi di sola lettura non scrivono nulla.
+        self._evento_base_in_sospeso = self.archiviazione.richiede_evento_base()
+
+    def chiudi(self):
+        """Rende durevoli gli eventi in sospeso e chiude l'archiviazione."""
+        with self._lock_eventi:
+            self.archiviazione.chiudi()
+
+    def _applica_evento(self, evento):
+        """Applica un evento del giornale ai dati in memoria e aggiorna gli indici."""
+        tipo = evento["tipo"]
+        if tipo == "gruppo":
+            for sotto in evento["eventi"]:
+                self._applica_evento(sotto)
+            return
+        if tipo == "elimina_riga":
+            voce_rimossa = self.dati_collaboratori[evento["nome"]][evento["indice"]]
+            self._indicizza_periodo(evento["nome"], voce_rimossa, -1)
+            self._aggiorna_giorni_squadra(righe_per_giorno([voce_rimossa]), -1)
+        elif tipo in ("elimina_collaboratore", "rinomina"):
+            nome = evento["nome"] if tipo == "elimina_collaboratore" else evento["da"]
+            for voce in self.dati_collaboratori[nome]:
+                self._indicizza_periodo(nome, voce, -1)
+            if tipo == "elimina_collaboratore":
+                self._aggiorna_giorni_squadra(righe_per_giorno(self.dati_collaboratori[nome]), -1)
+
+        if tipo in ("aggiungi", "nuovo_collaboratore"):
+            self.indice_nomi.aggiungi(evento["nome"])
+        elif tipo == "elimina_collaboratore":
+            self.indice_nomi.rimuovi(evento["nome"])
+        elif tipo == "rinomina":
+            self.indice_nomi.rimuovi(evento["da"])
+            self.indice_nomi.aggiungi(evento["a"])
+
+        applica_evento(self.dati_collaboratori, evento, self.contenitore_azioni)
+        self._invalida_frammenti(evento)
+
+        if tipo == "aggiungi":
+            self._aggiorna_punteggio(evento["nome"], sum(voce["punti"] for voce in evento["voci"]))
+            for voce in evento["voci"]:
+                self._indicizza_periodo(evento["nome"], voce, 1)
+            self._aggiorna_giorni_squadra(righe_per_giorno(evento["voci"]), 1)
+        elif tipo == "nuovo_collaboratore":
+            self._aggiorna_punteggio(evento["nome"], 0)
+        elif tipo == "elimina_riga":
+            self._aggiorna_punteggio(evento["nome"], -voce_rimossa["punti"])
+        elif tipo == "elimina_collaboratore":
+            self._rimuovi_punteggio(evento["nome"])
+        elif tipo == "rinomina":
+            punteggio = self._rimuovi_punteggio(evento["da"])
+            self._aggiorna_punteggio(evento["a"], punteggio)
+            for voce in self.dati_collaboratori[evento["a"]]:
+                self._indicizza_periodo(evento["a"], voce, 1)
+        elif tipo == "base":
+            self._ricostruisci_indici()
+
+    def _invalida_frammenti(self, evento):
+        """
+        Aggiorna le versioni dei collaboratori toccati dall'evento (il report rigenera i frammenti
+        con una versione nuova) e li segna da copiare nella prossima vista.
+        """
+        tipo = evento["tipo"]
+        if tipo == "base":
+            # Tutti i dati sono nuovi: ogni collaboratore riceve una versione mai usata
+            self._contatore_versioni += 1
+            self._versioni = dict.fromkeys(self.dati_collaboratori, self._contatore_versioni)
+            self._registro_modifiche.azzera(self._contatore_versioni)
+            self._vista = None
+            self.archiviazione.dati_sostituiti()
+            return
+        if tipo == "rinomina":
+            rimossi, modificati = [evento["da"]], [evento["a"]]
+        elif tipo == "elimina_collaboratore":
+            rimossi, modificati = [evento["nome"]], []
+        else:
+            rimossi, modificati = [], [evento["nome"]]
+        for nome in rimossi:
+            self._contatore_versioni += 1
+            self._registro_modifiche.registra(self._contatore_versioni, nome)
+            self._versioni.pop(nome, None)
+            self._nomi_da_copiare[nome] = _RIMOSSO
+        for nome in modificati:
+            self._contatore_versioni += 1
+            self._registro_modifiche.registra(self._contatore_versioni, nome)
+            self._versioni[nome] = self._contatore_versioni
+            stato = self._nomi_da_copiare.get(nome)
+            if stato is _RIMOSSO:
+                # Un nome eliminato e ricreato torna in fondo, anche nella vista
+                del self._nomi_da_copiare[nome]
+                self._nomi_da_copiare[nome] = _REINSERITO
+            elif stato is None:
+                self._nomi_da_copiare[nome] = _MODIFICATO
+
+    # --- Viste per i lettori ---
+    def vista(self):
+        """
+        Restituisce la VistaClassifica aggiornata all'ultimo evento registrato.
+        La vista si crea solo quando qualcuno la chiede dopo una modifica, copiando i soli
+        collaboratori cambiati; le letture successive la riusano senza alcun lock.
+        """
+        vista = self._vista
+        if vista is not None and vista.seq == self.seq:
+            return vista
+        with self._lock_eventi:
+            if self._vista is None or self._vista.seq != self.seq:
+                self._vista = self._crea_vista(self._vista)
+            return self._vista
+
+    def _crea_vista(self, precedente):
+        """
+        Crea la vista dello stato corrente. Dalla vista precedente si copiano solo i collaboratori
+        cambiati (_nomi_da_copiare): dati, punteggi e versioni sono MappaCondivisa e la classifica
+        condivide i blocchi non modificati, quindi il costo non cresce con l'intera classifica.
+        """
+        if precedente is None:
+            dati = MappaCondivisa({nome: copia_azioni(azioni) for nome, azioni in self.dati_collaboratori.items()})
+            punteggi = MappaCondivisa(dict(self.punteggi))
+            ordine = MappaCondivisa(dict(self._ordine_inserimento))
+            versioni = MappaCondivisa(dict(self._versioni))
+        else:
+            modifiche_dati, modifiche_punteggi, modifiche_ordine, modifiche_versioni = {}, {}, {}, {}
+            for nome, stato in self._nomi_da_copiare.items():
+                azioni = self.dati_collaboratori.get(nome)
+                if azioni is None:
+                    modifiche_dati[nome] = modifiche_punteggi[nome] = modifiche_ordine[nome] = \
+                        modifiche_versioni[nome] = (_RIMOSSO, None)
+                else:
+                    modifiche_dati[nome] = (stato, copia_azioni(azioni))
+                    modifiche_punteggi[nome] = (stato, self.punteggi[nome])
+                    modifiche_ordine[nome] = (stato, self._ordine_inserimento[nome])
+                    modifiche_versioni[nome] = (stato, self._versioni.get(nome, 0))
+            dati = precedente.dati.derivata(modifiche_dati)
+            punteggi = precedente.punteggi.derivata(modifiche_punteggi)
+            ordine = precedente.ordine.derivata(modifiche_ordine)
+            versioni = precedente.versioni.derivata(modifiche_versioni)
+        self._nomi_da_copiare.clear()
+        serie_squadra = None
+        if self._giorni_squadra is not None:
+            # Si ricostruiscono solo le serie della squadra delle azioni cambiate dall'ultima vista
+            for chiave, giorni in self._giorni_squadra.items():
+                if chiave not in self._serie_squadra:
+                    self._serie_squadra[chiave] = serie_da_giorni(giorni)
+            serie_squadra = dict(self._serie_squadra)
+        return VistaClassifica(self.seq, self._contatore_versioni, dati, self._classifica.istantanea(), punteggi, ordine,
+                               versioni, serie_squadra)
+
+    # --- Indice dei punteggi ---
+    def _ricostruisci_indici(self):
+        """Ricostruisce da zero gli indici derivati da dati_collaboratori (usato al caricamento)."""
+        self.punteggi = {}
+        self._ordine_inserimento = {}
+        self._prossimo_ordine = 0
+        # Con un'archiviazione indicizzata i totali arrivano già aggregati dal database
+        totali = self.archiviazione.totali() if self.archiviazione.indicizzata else None
+        for nome, azioni in self.dati_collaboratori.items():
+            if totali is not None:
+                self.punteggi[nome] = totali.get(nome, 0)
+            else:
+                self.punteggi[nome] = azioni.totale_punti() if self.compatto else sum(item['punti'] for item in azioni)
+            self._ordine_inserimento[nome] = self._prossimo_ordine
+            self._prossimo_ordine += 1
+        self._classifica = ClassificaABlocchi((-punti, self._ordine_inserimento[nome], nome) for nome, punti in self.punteggi.items())
+        self.indice_nomi = IndiceNomi(self.dati_collaboratori)
+        self._vista = None
+        self._nomi_da_copiare.clear()
+        self._contatore_versioni += 1
+        self._registro_modifiche.azzera(self._contatore_versioni)
+        self._ricostruisci_indice_periodi()
+        # L'indice temporale si ricostruisce alla prima richiesta
+        self._indici_temporali = {}
+        self._giorni_squadra = None
+        self._serie_squadra = {}
+        with self._lock_storico:
+            self._punteggi_registrati.clear()
+
+    def _chiave_classifica(self, nome):
+        return (-self.punteggi[nome], self._ordine_inserimento[nome], nome)
+
+    def _aggiorna_punteggio(self, nome, delta):
+        """Somma `delta` al totale del collaboratore (creandolo se serve) e lo riposiziona in classifica."""
+        if nome in self.punteggi:
+            self._classifica.rimuovi(self._chiave_classifica(nome))
+        else:
+            self.punteggi[nome] = 0
+            self._ordine_inserimento[nome] = self._prossimo_ordine
+            self._prossimo_ordine += 1
+        self.punteggi[nome] += delta
+        self._classifica.aggiungi(self._chiave_classifica(nome))
+
+    def _rimuovi_punteggio(self, nome):
+        """Toglie il collaboratore dall'indice e ne restituisce il punteggio."""
+        self._classifica.rimuovi(self._chiave_classifica(nome))
+        del self._ordine_inserimento[nome]
+        return self.punteggi.pop(nome)
+
+    # --- Indice temporale (classifiche per periodo e andamento nel tempo) ---
+    def _indice_temporale_di(self, vista, nome):
+        """
+        Restituisce l'indice temporale (azione -> SerieGiornaliera) del collaboratore nella vista.
+        Si costruisce alla prima richiesta e si riusa finché la versione del collaboratore non cambia:
+        dopo un check-in si ricostruisce solo quello del collaboratore modificato.
+        """
+        versione = vista.versioni.get(nome)
+        memorizzato = self._indici_temporali.get(nome)
+        if memorizzato is not None and memorizzato[0] == versione:
+            return memorizzato[1]
+        indice = indice_temporale(vista.dati[nome])
+        self._indici_temporali[nome] = (versione, indice)
+        return indice
+
+    def _vista_con_serie_squadra(self):
+        """Restituisce la vista corrente con le serie della squadra, costruendone l'indice alla prima richiesta."""
+        vista = self.vista()
+        if vista.serie_squadra is not None:
+            return vista
+        with self._lock_eventi:
+            if self._giorni_squadra is None:
+                self._giorni_squadra = {}
+                righe = Counter()
+                for azioni in self.dati_collaboratori.values():
+                    righe.update(zip(*colonne_per_giorno(azioni)))
+                self._aggiorna_giorni_squadra(righe, 1)
+            if self._vista is None or self._vista.serie_squadra is None or self._vista.seq != self.seq:
+                self._vista = self._crea_vista(self._vista)
+            return self._vista
+
+    def _aggiorna_giorni_squadra(self, righe, segno):
+        """
+        Somma (segno=1) o toglie (segno=-1) dai totali della squadra le righe indicate,
+        come Counter di (giorno ordinale, azione, punti) -> numero di voci.
+        """
+        if self._giorni_squadra is None:
+            return
+        for (giorno, azione, punti), volte in righe.items():
+            for chiave in (None, azione):
+                giorni = self._giorni_squadra.get(chiave)
+                if giorni is None:
+                    giorni = self._giorni_squadra[chiave] = {}
+                valori = giorni.get(giorno)
+                if valori is None:
+                    valori = giorni[giorno] = [0, 0]
+                valori[0] += segno * punti * volte
+                valori[1] += segno * volte
+                if valori[1] == 0:
+                    del giorni[giorno]
+                    if not giorni:
+                        del self._giorni_squadra[chiave]
+                self._serie_squadra.pop(chiave, None)
+
+    # --- Indice anti-duplicati per periodo ---
+    def _periodo(self, azione, data):
+        """
+        Restituisce la chiave del periodo (giorno o settimana ISO) in cui cade `data`
+        per un'azione soggetta a regola di frequenza, altrimenti None.
+        """
+        regola = self.regole_frequenza.get(azione)
+        if regola == "giorno":
+            return data[:10]
+        if regola == "settimana":
+            anno, settimana, _ = datetime.strptime(data[:10], "%Y-%m-%d").isocalendar()
+            return f"{anno}-W{settimana:02d}"
+        return None
+
+    def _limiti_periodo(self, azione, data):
+        """Restituisce l'intervallo di date [inizio, fine) del periodo in cui cade `data` per l'azione."""
+        giorno = datetime.strptime(data[:10], "%Y-%m-%d")
+        if self.regole_frequenza[azione] == "settimana":
+            giorno -= timedelta(days=giorno.weekday())
+            durata = timedelta(days=7)
+        else:
+            durata = timedelta(days=1)
+        return giorno.strftime("%Y-%m-%d"), (giorno + durata).strftime("%Y-%m-%d")
+
+    def _indicizza_periodo(self, nome, voce, delta):
+        if self.archiviazione.indicizzata:
+            # I controlli anti-duplicati interrogano direttamente il database
+            return
+        periodo = self._periodo(voce['azione'], voce['data'])
+        if periodo is None:
+            return
+        chiave = (nome, periodo, voce['azione'])
+        conteggio = self._registrazioni_periodo.get(chiave, 0) + delta
+        if conteggio > 0:
+            self._registrazioni_periodo[chiave] = conteggio
+        else:
+            self._registrazioni_periodo.pop(chiave, None)
+
+    def _ricostruisci_indice_periodi(self):
+        self._registrazioni_periodo = {}
+        if self.archiviazione.indicizzata:
+            return
+        for nome, azioni in self.dati_collaboratori.items():
+            # Solo le azioni con una regola di frequenza entrano nell'indice
+            voci = azioni.voci_con_azione(self.regole_frequenza) if self.compatto else azioni
+            for voce in voci:
+                self._indicizza_periodo(nome, voce, 1)
+
+    def imposta_regola_frequenza(self, azione, regola):
+        """
+        Imposta quante volte può essere registrata un'azione: "giorno" (una volta al giorno),
+        "settimana" (una volta a settimana) o None (senza limiti).
+        Le regole configurate in REGOLE_FREQUENZA vengono applicate da crea_classifica_manager.
+        """
+        if azione not in self.punti_azioni:
+            raise ValueError(f"Azione '{azione}' non riconosciuta.")
+        if regola not in ("giorno", "settimana", None):
+            raise ValueError(f"Regola di frequenza '{regola}' non valida.")
+        # Regole e indice anti-duplicati cambiano insieme, senza check-in in mezzo
+        with self._lock_eventi:
+            if regola is None:
+                self.regole_frequenza.pop(azione, None)
+            else:
+                self.regole_frequenza[azione] = regola
+            self._ricostruisci_indice_periodi()
+
+    def _verifica_frequenza(self, nome, azione, data, quantita=1, in_sospeso=()):
+        """
+        Controlla la regola di frequenza dell'azione in tempo costante (con un'archiviazione
+        indicizzata, con un conteggio sull'indice per azione del database).
+        `in_sospeso` contiene le chiavi (nome, periodo, azione) già accettate ma non ancora
+        registrate, come le righe precedenti di un'importazione in blocco.
+        Restituisce il messaggio di errore se la registrazione non è consentita, altrimenti None.
+        """
+        periodo = self._periodo(azione, data)
+        if periodo is None:
+            return None
+        quando = "oggi" if self.regole_frequenza[azione] == "giorno" else "questa settimana"
+        if (nome, periodo, azione) in in_sospeso:
+            gia_registrata = True
+        elif self.archiviazione.indicizzata:
+            gia_registrata = self.archiviazione.conta_azioni(nome, azione, *self._limiti_periodo(azione, data)) > 0
+        else:
+            gia_registrata = (nome, periodo, azione) in self._registrazioni_periodo
+        if gia_registrata:
+            if azione == 'Meeting day':
+                return f"Errore: {nome} ha già effettuato il check-in per il Meeting day di {quando}."
+            return f"Errore: L'azione '{azione}' è già stata registrata per {nome} {quando}."
+        if quantita > 1:
+            return f"Errore: L'azione '{azione}' può essere registrata una sola volta {quando}."
+        return None
+
+    def classifica_ordinata(self):
+        """Restituisce la classifica come lista di (nome, punteggio), dal primo all'ultimo."""
+        return self.vista().classifica_ordinata()
+
+    def top_k(self, k):
+        """Restituisce i primi `k` collaboratori come lista di (nome, punteggio)."""
+        return self.vista().top_k(k)
+
+    def posizione_di(self, nome_collaboratore):
+        """
+        Restituisce la posizione in classifica (da 1) del collaboratore, o None se non esiste.
+        Legge l'indice corrente: va usata dallo scrittore (con _lock_eventi acquisito).
+        """
+        if nome_collaboratore not in self.punteggi:
+            return None
+        return self._classifica.posizione(self._chiave_classifica(nome_collaboratore)) + 1
+
+    def classifica_periodo(self, inizio, fine, azione=None):
+        """
+        Restituisce la classifica dei soli punti ottenuti con data in [inizio, fine)
+        ('YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS') come lista di (nome, punteggio),
+        eventualmente limitata a una sola `azione`.
+        Con limiti a giorni interi risponde dall'indice temporale; con un orario intermedio
+        è un'aggregazione SQL (archiviazione indicizzata) o una scansione dei dati.
+        """
+        vista = self.vista()
+        giorno_inizio, giorno_fine = giorno_intero(inizio), giorno_intero(fine)
+        if giorno_inizio is not None and giorno_fine is not None:
+            return self._classifica_giorni(vista, giorno_inizio, giorno_fine, azione)
+        if self.archiviazione.indicizzata and azione is None:
+            punteggi = self.archiviazione.classifica_periodo(inizio, fine)
+        else:
+            punteggi = []
+            for nome, azioni in vista.dati.items():
+                punti = sum(voce["punti"] for voce in azioni
+                            if inizio <= voce["data"] < fine and (azione is None or voce["azione"] == azione))
+                if punti:
+                    punteggi.append((nome, punti))
+        # Stesso ordine delle classifiche a giorni interi (vedi chiave_periodo)
+        return sorted(punteggi, key=lambda elemento: chiave_periodo(vista, *elemento))
+
+    def _classifica_giorni(self, vista, inizio, fine, azione=None, limite=None):
+        """
+        Classifica dei giorni ordinali [inizio, fine) dalle somme prefisse dei collaboratori,
+        limitata alle prime `limite` righe se indicato. La classifica di ogni periodo resta in
+        memoria (ClassificaDelPeriodo) e a ogni richiesta si ricalcolano solo i collaboratori
+        cambiati dalla vista precedente; da capo la prima volta o dopo molte modifiche.
+        """
+        with self._lock_periodi:
+            return self._classifica_periodo_aggiornata(vista, inizio, fine, azione).voci(limite)
+
+    def _classifica_periodo_aggiornata(self, vista, inizio, fine, azione=None):
+        """ClassificaDelPeriodo dei giorni [inizio, fine) aggiornata alla vista; va chiamata con _lock_periodi."""
+        chiave = (inizio, fine, azione)
+        classifica = self._classifiche_periodo.get(chiave)
+        cambiati = None
+        if classifica is not None and classifica.contatore <= vista.contatore:
+            cambiati = self._registro_modifiche.cambiati(classifica.contatore, vista.contatore)
+        if cambiati is None or len(cambiati) > len(vista.dati) // 4:
+            calcolata = ClassificaDelPeriodo(
+                vista, ((nome, self._punti_nel_periodo(vista, nome, inizio, fine, azione)) for nome in vista.dati))
+            self._pulisci_indici_temporali(vista)
+            if classifica is not None and classifica.contatore > vista.contatore:
+                # Vista più vecchia di quella in memoria: il risultato non si conserva
+                return calcolata
+            classifica = calcolata
+        else:
+            for nome in cambiati:
+                punti = self._punti_nel_periodo(vista, nome, inizio, fine, azione) if nome in vista.dati else 0
+                classifica.aggiorna(vista, nome, punti)
+            classifica.contatore = vista.contatore
+        self._classifiche_periodo[chiave] = classifica
+        self._classifiche_periodo.move_to_end(chiave)
+        if len(self._classifiche_periodo) > CLASSIFICHE_PERIODO_MEMORIZZATE:
+            self._classifiche_periodo.popitem(last=False)
+        return classifica
+
+    def _punti_nel_periodo(self, vista, nome, inizio, fine, azione):
+        """Punti del collaboratore nei giorni [inizio, fine), dal suo indice temporale."""
+        memorizzato = self._indici_temporali.get(nome)
+        if memorizzato is not None and memorizzato[0] == vista.versioni.get(nome):
+            serie = memorizzato[1].get(azione)
+        else:
+            serie = self._indice_temporale_di(vista, nome).get(azione)
+        if serie is None:
+            return 0
+        # Come SerieGiornaliera.totale, svolto qui perché è il ciclo più caldo
+        giorni = serie.giorni
+        i = bisect.bisect_left(giorni, inizio)
+        return serie.punti[bisect.bisect_left(giorni, fine, i)] - serie.punti[i]
+
+    def _pulisci_indici_temporali(self, vista):
+        if len(self._indici_temporali) > len(vista.dati):
+            # Collaboratori eliminati o rinominati: i loro indici non servono più
+            # (list() copia le chiavi in un colpo solo: altri lettori possono aggiungerne nel frattempo)
+            for nome in list(self._indici_temporali):
+                if nome not in vista.dati:
+                    self._indici_temporali.pop(nome, None)
+
+    def classifica_del_periodo(self, granularita="settimana", data=None, azione=None):
+        """
+        Restituisce la classifica del giorno, della settimana ISO o del mese che contiene `data`
+        ('YYYY-MM-DD', oggi se None) come dizionario con periodo, inizio, fine (esclusa) e classifica.
+        """
+        giorno = giorno_ordinale(data) if data else date.today().toordinal()
+        inizio, fine = limiti_periodo(granularita, giorno)
+        return {
+            "periodo": etichetta_periodo(granularita, inizio),
+            "inizio": date.fromordinal(inizio).isoformat(),
+            "fine": date.fromordinal(fine).isoformat(),
+            "classifica": self._classifica_giorni(self.vista(), inizio, fine, azione),
+        }
+
+    def riepilogo_azioni(self, inizio, fine, nome_collaboratore=None):
+        """
+        Restituisce punti e numero di registrazioni per azione nei giorni [inizio, fine) ('YYYY-MM-DD'),
+        dell'intera squadra o di un solo collaboratore, come {azione: {"punti", "conteggio"}}.
+        Restituisce None se il collaboratore non esiste.
+        """
+        giorno_inizio, giorno_fine = giorno_ordinale(inizio), giorno_ordinale(fine)
+        if nome_collaboratore is None:
+            serie = self._vista_con_serie_squadra().serie_squadra
+        else:
+            vista = self.vista()
+            if nome_collaboratore not in vista.dati:
+                return None
+            serie = self._indice_temporale_di(vista, nome_collaboratore)
+        riepilogo = {}
+        for azione, serie_azione in serie.items():
+            if azione is None:
+                continue
+            punti, conteggio = serie_azione.totale(giorno_inizio, giorno_fine)
+            if conteggio:
+                riepilogo[azione] = {"punti": punti, "conteggio": conteggio}
+        return riepilogo
+
+    def serie_punteggio(self, nome_collaboratore=None, granularita="giorno", inizio=None, fine=None, azione=None,
+                        massimo_periodi=None):
+        """
+        Restituisce l'andamento dei punti per giorno, settimana o mese, dell'intera squadra o di
+        un collaboratore: per ogni periodo i punti ottenuti e il totale accumulato fino alla sua fine.
+        Senza `inizio` e `fine` ('YYYY-MM-DD') copre dal primo all'ultimo giorno con azioni.
+        Restituisce None se il collaboratore non esiste; solleva ValueError oltre `massimo_periodi`.
+        """
+        if granularita not in GRANULARITA_PERIODI:
+            raise ValueError(f"Granularità '{granularita}' non valida: usa {', '.join(GRANULARITA_PERIODI)}.")
+        if nome_collaboratore is None:
+            serie = self._vista_con_serie_squadra().serie_squadra.get(azione)
+        else:
+            vista = self.vista()
+            if nome_collaboratore not in vista.dati:
+                return None
+            serie = self._indice_temporale_di(vista, nome_collaboratore).get(azione)
+        if serie is None or not serie.giorni:
+            return []
+        primo = giorno_ordinale(inizio) if inizio else serie.giorni[0]
+        ultimo = giorno_ordinale(fine) if fine else serie.giorni[-1] + 1
+        andamento = []
+        giorno = limiti_periodo(granularita, primo)[0]
+        while giorno < ultimo:
+            if massimo_periodi is not None and len(andamento) >= massimo_periodi:
+                raise ValueError(f"l'intervallo supera {massimo_periodi} periodi.")
+            successivo = limiti_periodo(granularita, giorno)[1]
+            andamento.append({
+                "periodo": etichetta_periodo(granularita, giorno),
+                "punti": serie.totale(giorno, successivo)[0],
+                "cumulato": serie.cumulato(successivo),
+            })
+            giorno = successivo
+        return andamento
+
+    # --- Classifica a un momento passato e movimenti ---
+    def classifica_al(self, momento, registrata=False, vista=None):
+        """
+        Restituisce la classifica com'era prima di `momento` ('YYYY-MM-DD', cioè all'inizio del giorno,
+        o 'YYYY-MM-DD HH:MM:SS') come lista di (nome, punteggio), dal primo all'ultimo.
+        Di norma si calcola dalle date delle azioni attuali, con l'indice temporale: correzioni,
+        eliminazioni e rinomine successive valgono anche per il passato.
+        Con registrata=True è invece la classifica registrata allora nel giornale degli eventi o,
+        prima del giornale, nella cronologia; None se nessuno dei due copre quel momento.
+        Solleva ValueError se il momento non è una data valida.
+        """
+        momento = normalizza_momento(momento)
+        if not registrata:
+            giorno = giorno_intero(momento)
+            if giorno is not None:
+                return self._classifica_giorni(vista or self.vista(), 0, giorno)
+            return self.classifica_periodo("", momento)
+        punteggi = self._punteggi_registrati_al(istante_precedente(momento))
+        if punteggi is None:
+            return None
+        return sorted(punteggi.items(), key=lambda elemento: -elemento[1])
+
+    def _punteggi_registrati_al(self, istante):
+        """
+        Punteggi ({nome: punti}) registrati entro `istante`: dagli eventi del giornale oppure
+        dall'istantanea della cronologia, di cui si leggono solo i totali dei blocchi mai letti.
+        I risultati per istanti già trascorsi si memorizzano.
+        """
+        with self._lock_storico:
+            punteggi = self._punteggi_registrati.get(istante)
+            if punteggi is not None:
+                self._punteggi_registrati.move_to_end(istante)
+                return punteggi
+        # Un istante non ancora trascorso può ricevere altri eventi: non si memorizza
+        trascorso = istante < datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        punteggi = self._punteggi_dagli_eventi(istante)
+        if punteggi is None:
+            punteggi = self.archiviazione.punteggi_istantanea_al(istante)
+        if punteggi is not None and trascorso:
+            with self._lock_storico:
+                self._punteggi_registrati[istante] = punteggi
+                if len(self._punteggi_registrati) > ISTANTANEE_MEMORIZZATE:
+                    self._punteggi_registrati.popitem(last=False)
+        return punteggi
+
+    def movimenti_classifica(self, dal, al=None, registrata=False, vista=None):
+        """
+        Confronta la classifica prima di `dal` con quella prima di `al` (la classifica attuale se None),
+        calcolate come in classifica_al: per ogni collaboratore posizione, posizione precedente,
+        variazione e punti guadagnati, dai più saliti (vedi movimenti_tra).
+        Restituisce None se con registrata=True uno dei due momenti non è coperto.
+        """
+        vista = vista or self.vista()
+        prima = self.classifica_al(dal, registrata, vista)
+        dopo = vista.classifica_ordinata() if al is None else self.classifica_al(al, registrata, vista)
+        if prima is None or dopo is None:
+            return None
+        return movimenti_tra(prima, dopo)
+
+    def ultimo_meeting(self, prima_di=None, vista=None):
+        """
+        Restituisce il giorno ('YYYY-MM-DD') dell'ultimo Meeting day con almeno un check-in
+        prima del giorno `prima_di` (oggi se None), o None se non ce ne sono.
+        Con le serie della squadra nella vista costa una ricerca binaria.
+        """
+        limite = giorno_ordinale(prima_di) if prima_di else date.today().toordinal()
+        vista = vista or self.vista()
+        if vista.serie_squadra is not None:
+            elenco_serie = [vista.serie_squadra.get("Meeting day")]
+        else:
+            elenco_serie = [self._indice_temporale_di(vista, nome).get("Meeting day") for nome in vista.dati]
+        ultimo = None
+        for serie in elenco_serie:
+            if serie is None:
+                continue
+            posizione = bisect.bisect_left(serie.giorni, limite)
+            if posizione and (ultimo is None or serie.giorni[posizione - 1] > ultimo):
+                ultimo = serie.giorni[posizione - 1]
+        return None if ultimo is None else date.fromordinal(ultimo).isoformat()
+
+    def movimenti_dall_ultimo_meeting(self, registrata=False, vista=None):
+        """
+        Movimenti in classifica dalla fine dell'ultimo Meeting day a oggi, come dizionario con
+        il giorno del meeting, l'inizio del confronto e i movimenti; None se non ci sono meeting.
+        """
+        vista = vista or self.vista()
+        meeting = self.ultimo_meeting(vista=vista)
+        if meeting is None:
+            return None
+        dal = date.fromordinal(giorno_ordinale(meeting) + 1).isoformat()
+        movimenti = self.movimenti_classifica(dal, registrata=registrata, vista=vista)
+        if movimenti is None:
+            return None
+        return {"meeting": meeting, "dal": dal, "movimenti": movimenti}
+
+    def scalatori_dall_ultimo_meeting(self, vista, limite=CLASSIFICA_PERIODO_REPORT):
+        """
+        Per il report: (giorno dell'ultimo meeting o None, i `limite` collaboratori saliti di più
+        dalla fine del meeting), con i campi di movimenti_tra. La classifica di partenza resta in
+        memoria per il giorno del meeting e si aggiorna solo per i collaboratori cambiati (vedi
+        _classifica_giorni); la classifica della vista si scorre una volta, senza ordinare i movimenti.
+        """
+        meeting = self.ultimo_meeting(vista=vista)
+        if meeting is None:
+            return None, []
+        with self._lock_periodi:
+            precedenti = self._classifica_periodo_aggiornata(vista, 0, giorno_ordinale(meeting) + 1).posizioni()
+        candidati = []
+        for posizione, (_, _, nome) in enumerate(vista.classifica, start=1):
+            precedente = precedenti.get(nome)
+            if precedente is not None and precedente[0] > posizione:
+                candidati.append((precedente[0] - posizione, -posizione, nome))
+        saliti = []
+        for variazione, posizione, nome in heapq.nlargest(limite, candidati):
+            punti = vista.punteggi[nome]
+            saliti.append({
+                "nome": nome,
+                "posizione": -posizione,
+                "posizione_precedente": precedenti[nome][0],
+                "variazione": variazione,
+                "punti": punti,
+                "punti_guadagnati": punti - precedenti[nome][1],
+            })
+        return meeting, saliti
+
+    def _registra_evento(self, evento, attendi_durabilita=True):
+        """
+        Registra l'evento nell'archiviazione e poi lo applica ai dati in memoria.
+        Il costo non dipende dalla dimensione della classifica.
+        L'attesa della durabilità avviene dopo aver rilasciato il lock, così gli eventi registrati
+        in contemporanea condividono una sola sincronizzazione. Con attendi_durabilita=False
+        l'attesa spetta al chiamante (archiviazione.rendi_durevole con il riferimento restituito).
+        """
+        with self._lock_eventi:
+            momento = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if self._evento_base_in_sospeso:
+                self._evento_base_in_sospeso = False
+                if evento["tipo"] != "base":
+                    # I dati in memoria sono già quelli dell'evento base: basta registrarlo
+                    self.seq += 1
+                    self.archiviazione.registra({"seq": self.seq, "ts": momento, "tipo": "base", "dati": self.dati_collaboratori})
+            self.seq += 1
+            evento = {"seq": self.seq, "ts": momento, **evento}
+            riferimento = self.archiviazione.registra(evento)
+            self._applica_evento(evento)
+            self.archiviazione.evento_applicato(self.dati_collaboratori, self._versioni)
+            if self.ascoltatori:
+                self._notifica_ascoltatori(evento)
+        if attendi_durabilita:
+            self.archiviazione.rendi_durevole(riferimento)
+        return riferimento
+
+    def aggiungi_ascoltatore(self, ascoltatore):
+        """
+        Registra una funzione chiamata dopo ogni modifica con la variazione dei punteggi.
+        Viene chiamata mentre i dati sono bloccati: deve essere rapida e non usare il manager.
+        """
+        self.ascoltatori.append(ascoltatore)
+
+    def _variazione_punteggi(self, evento):
+        """Descrive l'effetto dell'evento sulla classifica: nuovi punteggi e posizioni dei collaboratori toccati."""
+        tipo = evento["tipo"]
+        variazione = {"seq": evento["seq"], "tipo": tipo, "totale": len(self._classifica)}
+        if tipo == "base":
+            # Ripristino completo: i client ricaricano tutta la classifica
+            variazione.update(punteggi=[], rimossi=[])
+            return variazione
+        if tipo == "rinomina":
+            toccati, rimossi = [evento["a"]], [evento["da"]]
+        elif tipo == "elimina_collaboratore":
+            toccati, rimossi = [], [evento["nome"]]
+        elif tipo == "gruppo":
+            toccati, rimossi = list(dict.fromkeys(sotto["nome"] for sotto in evento["eventi"])), []
+        else:
+            toccati, rimossi = [evento["nome"]], []
+        variazione["punteggi"] = [
+            {"nome": nome, "punti": self.punteggi[nome], "posizione": self.posizione_di(nome), "file": file_dettaglio_statico(nome)}
+            for nome in toccati if nome in self.punteggi
+        ]
+        variazione["rimossi"] = rimossi
+        return variazione
+
+    def _notifica_ascoltatori(self, evento):
+        variazione = self._variazione_punteggi(evento)
+        for ascoltatore in self.ascoltatori:
+            try:
+                ascoltatore(variazione)
+            except Exception as e:
+                # La modifica è già registrata: un ascoltatore difettoso non deve annullarla
+                print(f"Errore nella notifica della modifica: {e}")
+
+    def compatta(self):
+        """
+        Consolida l'archiviazione con lo stato corrente (per ArchiviazioneJSON: riscrive il file
+        principale e salva un'istantanea in cronologia).
+        """
+        with self._lock_eventi:
+            self.archiviazione.compatta(self.dati_collaboratori, self._versioni)
+
+    def pota_cronologia(self, elimina_legacy=False):
+        """
+        Applica subito la politica di conservazione alla cronologia (di norma applicata dalle
+        compattazioni del servizio). Le copie complete delle versioni precedenti vengono
+        cancellate solo con `elimina_legacy`, dopo essere state importate nell'archivio.
+        """
+        with self._lock_eventi:
+            eliminate, legacy = self.archiviazione.pota_cronologia(elimina_legacy)
+        messaggio = f"Istantanee eliminate: {eliminate}."
+        if elimina_legacy:
+            messaggio += f" Copie complete delle versioni precedenti eliminate: {legacy}."
+        return True, messaggio
+
+    def stato_al(self, momento):
+        """
+        Ricostruisce i dati della classifica com'erano al momento indicato
+        ('YYYY-MM-DD HH:MM:SS') riapplicando gli eventi registrati.
+        Per i momenti precedenti agli eventi usa l'istantanea più vicina della cronologia.
+        Restituisce None se né gli eventi né la cronologia coprono quel momento.
+        """
+        ricostruiti = self._stato_dagli_eventi(momento)
+        if ricostruiti is None:
+            ricostruiti = self.archiviazione.istantanea_al(momento)
+        return ricostruiti
+
+    def _stato_dagli_eventi(self, momento):
+        """
+        Dati a `momento` ricostruiti dal punto di ripresa più vicino (istantanea salvata a una
+        compattazione) riapplicando solo gli eventi successivi; None se né i punti di ripresa
+        né gli eventi coprono quel momento.
+        """
+        seq, blocchi, eventi = self.archiviazione.ripresa_al(momento)
+        ricostruiti = None if blocchi is None else self.archiviazione.archivio.dati_blocchi(blocchi)
+        for evento in eventi:
+            if evento["tipo"] != "base" and (ricostruiti is None or evento["seq"] != seq + 1):
+                # Eventi eliminati dalla conservazione insieme al loro punto di ripresa:
+                # la ricostruzione si ferma all'ultimo stato completo
+                break
+            if ricostruiti is None:
+                ricostruiti = {}
+            applica_evento(ricostruiti, evento)
+            seq = evento["seq"]
+        return ricostruiti
+
+    def _punteggi_dagli_eventi(self, momento):
+        """
+        Come _stato_dagli_eventi, ma per i soli punteggi ({nome: punti}): si parte dai totali dei
+        blocchi del punto di ripresa, riportati nell'indice della cronologia, e le azioni si leggono
+        solo per i collaboratori di cui un evento elimina una riga (per sapere quanti punti togliere).
+        """
+        seq, blocchi, eventi = self.archiviazione.ripresa_al(momento)
+        archivio = self.archiviazione.archivio
+        punteggi = None if blocchi is None else archivio.punteggi_blocchi(blocchi)
+        origine = None          # dati dell'ultimo evento "base", se la ripresa li ha sostituiti
+        azioni = {}             # nome -> azioni complete, per i collaboratori già letti o nuovi
+        aggiunte = {}           # nome -> voci aggiunte a un collaboratore non ancora letto
+        nomi_originali = {}     # nome attuale -> nome nel punto di ripresa, dopo una rinomina
+
+        def azioni_di(nome):
+            if nome not in azioni:
+                originale = nomi_originali.pop(nome, nome)
+                lette = origine[originale] if origine is not None else archivio.azioni_blocco(blocchi[originale])
+                azioni[nome] = list(lette) + aggiunte.pop(nome, [])
+            return azioni[nome]
+
+        for evento in eventi:
+            tipo = evento["tipo"]
+            if tipo != "base" and (punteggi is None or evento["seq"] != seq + 1):
+                # Stesso criterio di _stato_dagli_eventi: ci si ferma all'ultimo stato completo
+                break
+            seq = evento["seq"]
+            if tipo == "base":
+                origine = evento["dati"]
+                punteggi = {nome: sum(voce["punti"] for voce in elenco) for nome, elenco in origine.items()}
+                azioni.clear()
+                aggiunte.clear()
+                nomi_originali.clear()
+                continue
+            # Un gruppo (es. importazione in blocco) si scompone nei suoi eventi, in ordine
+            for singolo in (evento["eventi"] if tipo == "gruppo" else (evento,)):
+                tipo = singolo["tipo"]
+                nome = singolo.get("nome")
+                if tipo in ("aggiungi", "nuovo_collaboratore") and nome not in punteggi:
+                    punteggi[nome] = 0
+                    azioni[nome] = []
+                if tipo == "aggiungi":
+                    punteggi[nome] += sum(voce["punti"] for voce in singolo["voci"])
+                    (azioni[nome] if nome in azioni else aggiunte.setdefault(nome, [])).extend(singolo["voci"])
+                elif tipo == "elimina_riga":
+                    punteggi[nome] -= azioni_di(nome).pop(singolo["indice"])["punti"]
+                elif tipo == "elimina_collaboratore":
+                    del punteggi[nome]
+                    for letti in (azioni, aggiunte, nomi_originali):
+                        letti.pop(nome, None)
+                elif tipo == "rinomina":
+                    da, a = singolo["da"], singolo["a"]
+                    punteggi[a] = punteggi.pop(da)
+                    for letti in (azioni, aggiunte, nomi_originali):
+                        letti.pop(a, None)
+                    if da in azioni:
+                        azioni[a] = azioni.pop(da)
+                    else:
+                        nomi_originali[a] = nomi_originali.pop(da, da)
+                        if da in aggiunte:
+                            aggiunte[a] = aggiunte.pop(da)
+        return punteggi
+
+    def ripristina_al(self, momento):
+        """
+        Riporta la classifica allo stato del momento indicato.
+        Il ripristino è a sua volta registrato nel giornale, quindi può essere annullato.
+        """
+        dati = self.stato_al(momento)
+        if dati is None:
+            return False, f"Errore: Né il giornale degli eventi né la cronologia contengono dati precedenti a {momento}."
+        self._registra_evento({"tipo": "base", "dati": dati})
+        self.genera_report_html_e_carica()
+        return True, f"Classifica ripristinata allo stato del {momento}."
+
+    def aggiungi_azione(self, nome_collaboratore_standardizzato, azione, quantita=1, aggiorna_report=True):
+        """
+        Aggiunge l'azione specificata al collaboratore con il nome standardizzato.
+        Gestisce l'aggiunta di più punti in una volta sola per azioni specifiche.
+        Con aggiorna_report=False il report non viene rigenerato: se ne occupa il chiamante.
+        
+        *** MODIFICATO PER GESTIRE LA DUPLICAZIONE DEI PUNTI MEETING DAY ***
+        """
+        # Verifica e registrazione avvengono con il lock dello scrittore, senza race condition
+        with self._lock_eventi:
+            data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            messaggio, offset = self._aggiungi_azione_bloccato(nome_collaboratore_standardizzato, azione, quantita, data)
+        if offset is not None:
+            # Solo dopo aver rilasciato il lock attende che l'evento sia su disco:
+            # i check-in concorrenti condividono la stessa fsync
+            self.archiviazione.rendi_durevole(offset)
+            if aggiorna_report:
+                self.genera_report_html_e_carica()
+        return messaggio
+
+    def _aggiungi_azione_bloccato(self, nome_collaboratore_standardizzato, azione, quantita, data):
+        """
+        Valida e registra un'azione; va chiamata con _lock_eventi acquisito.
+        Restituisce (messaggio, riferimento dell'evento) oppure (messaggio di errore, None).
+        """
+        messaggio, evento = self._prepara_azione(nome_collaboratore_standardizzato, azione, quantita, data)
+        if evento is None:
+            return messaggio, None
+        return messaggio, self._registra_evento(evento, attendi_durabilita=False)
+
+    def _prepara_azione(self, nome_collaboratore_standardizzato, azione, quantita, data, in_sospeso=()):
+        """
+        Valida un'azione e prepara l'evento "aggiungi", senza registrarlo; va chiamata con
+        _lock_eventi acquisito. Restituisce (messaggio, evento) oppure (messaggio di errore, None).
+        """
+        punti_da_aggiungere = self.punti_azioni.get(azione, 0)
+        
+        if punti_da_aggiungere == 0:
+            return f"Errore: Azione '{azione}' non riconosciuta.", None
+
+        if not 1 <= quantita <= QUANTITA_MASSIMA:
+            return f"Errore: Quantità '{quantita}' non valida (da 1 a {QUANTITA_MASSIMA}).", None
+        
+        # Per le azioni con una regola di frequenza (es. "Meeting day" una volta al giorno)
+        # controlla nell'indice se sono già state registrate nel periodo corrente
+        errore = self._verifica_frequenza(nome_collaboratore_standardizzato, azione, data, quantita, in_sospeso)
+        if errore:
+            return errore, None
+
+        # Aggiunge l'azione il numero di volte specificato
+        # (se il collaboratore non esiste, viene creato)
+        voci = [{"azione": azione, "punti": punti_da_aggiungere, "data": data} for _ in range(quantita)]
+        evento = {"tipo": "aggiungi", "nome": nome_collaboratore_standardizzato, "voci": voci}
+        
+        if quantita > 1:
+            return f"Aggiunta l'azione '{azione}' a {nome_collaboratore_standardizzato} per {quantita} volte. (+{punti_da_aggiungere * quantita} punti totali).", evento
+        return f"Aggiunta l'azione '{azione}' a {nome_collaboratore_standardizzato} (+{punti_da_aggiungere} punti).", evento
+
+    def aggiungi_azioni_bulk(self, righe, crea_mancanti=False, aggiorna_report=True):
+        """
+        Registra in blocco le azioni di una lista di (nome, azione, quantita), ad esempio le
+        presenze di un intero meeting (vedi leggi_righe_presenze per i file CSV); un quarto
+        elemento facoltativo indica il numero di riga da riportare nell'esito.
+        I nomi vengono risolti con cerca_collaboratore_flessibile (una consultazione
+        dell'indice dei nomi per riga); i nomi sconosciuti creano un nuovo collaboratore solo
+        con `crea_mancanti`, altrimenti l'esito riporta i nomi simili. Tutte le righe sono applicate con una sola acquisizione del lock,
+        le righe valide sono registrate nel giornale come un unico evento "gruppo" (un'interruzione
+        non lascia mai un'importazione a metà), la durabilità viene attesa una volta sola e il report
+        viene rigenerato una volta sola.
+        Restituisce un esito per riga: {"riga", "nome", "azione", "quantita", "esito", "messaggio"}.
+        """
+        esiti = []
+        offset = None
+        with self._lock_eventi:
+            data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            eventi = []
+            in_sospeso = set()      # (nome, periodo, azione) delle righe già accettate, per le regole di frequenza
+
+            for posizione, riga in enumerate(righe, start=1):
+                nome_input, azione, quantita = riga[:3]
+                numero = riga[3] if len(riga) > 3 else posizione
+                nome_std = self.standardizza_nome(str(nome_input))
+                esito = {"riga": numero, "nome": nome_std, "azione": azione, "quantita": quantita,
+                         "esito": "errore", "messaggio": ""}
+                esiti.append(esito)
+                try:
+                    quantita = esito["quantita"] = int(quantita)
+                except (TypeError, ValueError):
+                    quantita = 0
+                if not nome_std:
+                    esito["messaggio"] = "Errore: Nome non fornito."
+                    continue
+                if quantita < 1:
+                    esito["messaggio"] = f"Errore: Quantità '{esito['quantita']}' non valida."
+                    continue
+                nome_trovato = self.cerca_collaboratore_flessibile(nome_std)
+                if nome_trovato is None:
+                    if not crea_mancanti:
+                        esito["messaggio"] = f"Errore: Collaboratore '{nome_std}' non trovato."
+                        simili = self.suggerisci_collaboratori(nome_std, limite=3)
+                        if simili:
+                            esito["messaggio"] += f" Forse intendevi: {', '.join(simili)}?"
+                        continue
+                    nome_trovato = nome_std
+                esito["nome"] = nome_trovato
+                messaggio, evento = self._prepara_azione(nome_trovato, azione, quantita, data, in_sospeso)
+                esito["messaggio"] = messaggio
+                if evento is not None:
+                    esito["esito"] = "ok"
+                    eventi.append(evento)
+                    periodo = self._periodo(azione, data)
+                    if periodo is not None:
+                        in_sospeso.add((nome_trovato, periodo, azione))
+            if eventi:
+                offset = self._registra_evento({"tipo": "gruppo", "eventi": eventi}, attendi_durabilita=False)
+        if offset is not None:
+            self.archiviazione.rendi_durevole(offset)
+            if aggiorna_report:
+                self.genera_report_html_e_carica()
+        return esiti
+        
+    def elimina_riga(self, nome_collaboratore, indice_riga):
+        """
+        Elimina una riga specifica dall'elenco delle azioni di un collaboratore.
+        L'indice della riga parte da 0.
+        """
+        nome = self.standardizza_nome(nome_collaboratore)
+        
+        with self._lock_eventi:
+            if nome not in self.dati_collaboratori:
+                return False, f"Errore: Il collaboratore '{nome}' non esiste."
+            
+            if not (0 <= indice_riga < len(self.dati_collaboratori[nome])):
+                return False, f"Errore: L'indice di riga {indice_riga + 1} non è valido per il collaboratore '{nome}'."
+
+            azione_rimossa = self.dati_collaboratori[nome][indice_riga]
+            riferimento = self._registra_evento({"tipo": "elimina_riga", "nome": nome, "indice": indice_riga},
+                                                attendi_durabilita=False)
+        self.archiviazione.rendi_durevole(riferimento)
+        self.genera_report_html_e_carica()
+        
+        return True, f"Rimossa l'azione '{azione_rimossa['azione']}' del collaboratore {nome} (rimossi {azione_rimossa['punti']} punti)."
+        
+    def elimina_collaboratore(self, nome_collaboratore):
+        """
+        Elimina un collaboratore e tutti i suoi dati dalla classifica.
+        """
+        nome = self.standardizza_nome(nome_collaboratore)
+        with self._lock_eventi:
+            if nome not in self.dati_collaboratori:
+                return False, f"Errore: Il collaboratore '{nome}' non esiste."
+            riferimento = self._registra_evento({"tipo": "elimina_collaboratore", "nome": nome}, attendi_durabilita=False)
+        self.archiviazione.rendi_durevole(riferimento)
+        self.genera_report_html_e_carica()
+        return True, f"Collaboratore '{nome}' eliminato con successo."
+
+    def aggiungi_collaboratore(self, nome_collaboratore):
+        """
+        Aggiunge un nuovo collaboratore senza azioni.
+        """
+        nome = self.standardizza_nome(nome_collaboratore)
+        with self._lock_eventi:
+            if nome in self.dati_collaboratori:
+                return False, "Collaboratore già esistente."
+            riferimento = self._registra_evento({"tipo": "nuovo_collaboratore", "nome": nome}, attendi_durabilita=False)
+        self.archiviazione.rendi_durevole(riferimento)
+        self.genera_report_html_e_carica()
+        return True, f"Collaboratore '{nome}' aggiunto."
+        
+    def calcola_punteggio_totale(self, nome_collaboratore):
+        """
+        Calcola il punteggio totale di un collaboratore.
+        """
+        return self.vista().punteggi.get(nome_collaboratore, 0)
+
+    def mostra_classifica(self):
+        """
+        Ordina i collaboratori per punteggio decrescente e restituisce la classifica come lista di stringhe.
+        """
+        vista = self.vista()
+        if not vista.dati:
+            return ["La classifica è vuota."]
+        
+        classifica_ordinata = vista.classifica_ordinata()
+
+        classifica_list = [f"--- CLASSIFICA APEX CHALLENGE ---"]
+        posizione = 1
+        for nome, punteggio in classifica_ordinata:
+            classifica_list.append(f"{posizione}. {nome}: {punteggio} punti")
+            posizione += 1
+        classifica_list.append("----------------------------------")
+        return classifica_list
+
+    def mostra_dettaglio_classifica(self, nome_collaboratore):
+        """
+        Restituisce un report dettagliato delle azioni di un collaboratore come lista di stringhe.
+        """
+        nome = self.standardizza_nome(nome_collaboratore)
+        vista = self.vista()
+        if nome not in vista.dati:
+            return [f"Errore: Il collaboratore '{nome}' non esiste."]
+        
+        dettaglio_list = [f"--- DETTAGLIO AZIONI DI {nome.upper()} ---"]
+        azioni = vista.dati[nome]
+        if not azioni:
+            dettaglio_list.append("Nessuna azione registrata per questo collaboratore.")
+        else:
+            for i, azione in enumerate(azioni):
+                dettaglio_list.append(f"[{i+1}] Azione: {azione['azione']} (+{azione['punti']} punti) - Data: {azione['data']}")
+        dettaglio_list.append(f"\nPunteggio totale: {vista.punteggi[nome]} punti")
+        dettaglio_list.append("----------------------------------")
+        return dettaglio_list
+        
+    def genera_report_html(self):
+        """
+        Genera un report dettagliato in un file HTML con una grafica personalizzata,
+        inclusi un countdown e la classifica dei collaboratori.
+        """
+        # Il report si genera da una vista immutabile: i check-in possono continuare nel frattempo.
+        # La vista porta le serie della squadra, così l'ultimo meeting si trova senza scorrere i collaboratori.
+        with self._lock_report:
+            return self._genera_report_html(self._vista_con_serie_squadra())
+
+    def _genera_report_html(self, vista):
+        if not vista.dati:
+            report_content = REPORT_VUOTO_HTML
+            self.frammenti_rigenerati = {"righe": 0, "dettagli": 0}
+        else:
+            prima_pagina = vista.top_k(PAGINA_CLASSIFICA)
+            max_punteggio = prima_pagina[0][1]
+
+            # La pagina contiene solo le prime PAGINA_CLASSIFICA righe, ricomposte dai frammenti
+            # in cache: si rigenerano solo quelle che hanno cambiato posizione o punteggio.
+            # Le righe successive e le azioni si caricano a richiesta dal browser.
+            righe_rigenerate = 0
+            righe = []
+            cache_righe = {}
+            for posizione, (nome, punteggio) in enumerate(prima_pagina, start=1):
+                chiave_riga = (posizione, punteggio, max_punteggio)
+                riga = self._cache_righe.get(nome)
+                if riga is None or riga[0] != chiave_riga:
+                    riga = (chiave_riga, riga_classifica_html(posizione, nome, punteggio, max_punteggio))
+                    righe_rigenerate += 1
+                cache_righe[nome] = riga
+                righe.append(riga[1])
+            # In cache restano solo le righe della pagina attuale
+            self._cache_righe = cache_righe
+            self.frammenti_rigenerati = {"righe": righe_rigenerate, "dettagli": 0}
+
+            cursore_successivo = PAGINA_CLASSIFICA if len(vista.classifica) > PAGINA_CLASSIFICA else None
+            parti = [REPORT_INTESTAZIONE_HTML]
+            parti.extend(righe)
+            parti.append(chiusura_classifica_html(cursore_successivo, vista.seq))
+            parti.append('<div class="classifiche-periodo">')
+            oggi = date.today().toordinal()
+            for titolo, granularita in (("Classifica della settimana", "settimana"), ("Classifica del mese", "mese")):
+                inizio, fine = limiti_periodo(granularita, oggi)
+                voci = self._classifica_giorni(vista, inizio, fine, limite=CLASSIFICA_PERIODO_REPORT)
+                parti.append(classifica_periodo_html(titolo, etichetta_periodo(granularita, inizio), voci))
+            meeting, saliti = self.scalatori_dall_ultimo_meeting(vista)
+            parti.append(scalatori_html("Scalatori dall'ultimo meeting", meeting, saliti))
+            parti.append('</div>')
+            parti.append(REPORT_CHIUSURA_HTML)
+            report_content = "".join(parti)
+        self._scrivi_dati_statici(vista)
+
+        report_filename = "index.html"
+        scrivi_file_atomico(report_filename, report_content.encode("utf-8"))
+        
+        return f"Report HTML generato con successo. Lo trovi nel file '{report_filename}'."
+
+    # --- Classifica e dettagli a pagine ---
+    def _voci_classifica(self, vista, cursore, limite):
+        return [
+            {"posizione": posizione, "nome": nome, "punti": -punti_negativi, "file": file_dettaglio_statico(nome)}
+            for posizione, (punti_negativi, _, nome) in enumerate(vista.classifica[cursore:cursore + limite], start=cursore + 1)
+        ]
+
+    def _pagina_classifica(self, vista, cursore, limite):
+        totale = len(vista.classifica)
+        fine = cursore + limite
+        return {
+            "totale": totale,
+            "punteggio_massimo": -vista.classifica[0][0] if vista.classifica else 0,
+            "voci": self._voci_classifica(vista, cursore, limite),
+            "cursore_successivo": fine if fine < totale else None,
+        }
+
+    def pagina_classifica(self, cursore=0, limite=PAGINA_CLASSIFICA):
+        """
+        Restituisce `limite` righe della classifica a partire dalla posizione `cursore` (da 0),
+        con il totale e il cursore della pagina successiva (None se è l'ultima).
+        """
+        vista = self.vista()
+        pagina = self._pagina_classifica(vista, max(cursore, 0), limite)
+        # Ultimo evento riflesso nella pagina: il report vi riallinea le variazioni in diretta
+        pagina["seq"] = vista.seq
+        return pagina
+
+    def pagina_azioni(self, nome_collaboratore, cursore=0, limite=PAGINA_AZIONI):
+        """
+        Restituisce `limite` azioni del collaboratore, dalla più recente, a partire da `cursore`.
+        Restituisce None se il collaboratore non esiste.
+        """
+        vista = self.vista()
+        azioni = vista.dati.get(nome_collaboratore)
+        if azioni is None:
+            return None
+        cursore = max(cursore, 0)
+        fine = cursore + limite
+        totale = len(azioni)
+        # Le azioni sono in ordine di inserimento: si leggono dal fondo senza copiarle
+        voci = [azioni[totale - 1 - i] for i in range(cursore, min(fine, totale))]
+        return {
+            "nome": nome_collaboratore,
+            "punti": vista.punteggi[nome_collaboratore],
+            "totale": totale,
+            "voci": voci,
+            "cursore_successivo": fine if fine < totale else None,
+        }
+
+    def _scrivi_dati_statici(self, vista):
+        """
+        Aggiorna la copia statica dei dati in CARTELLA_DATI_STATICI, usata dal report quando
+        le API non sono raggiungibili: le pagine della classifica e un file per collaboratore.
+        Si considerano solo i collaboratori cambiati dall'ultima scrittura (vedi RegistroModifiche)
+        e si riserializzano solo le pagine dalla prima posizione che hanno occupato, prima o dopo;
+        tutte se sono cambiati il numero di collaboratori o il punteggio massimo, che ogni pagina riporta.
+        """
+        cartella_classifica = os.path.join(CARTELLA_DATI_STATICI, "classifica")
+        cartella_collaboratori = os.path.join(CARTELLA_DATI_STATICI, "collaboratori")
+        os.makedirs(cartella_classifica, exist_ok=True)
+        os.makedirs(cartella_collaboratori, exist_ok=True)
+
+        precedente = self._vista_statica
+        cambiati = None
+        if precedente is not None and precedente.contatore <= vista.contatore:
+            cambiati = self._registro_modifiche.cambiati(precedente.contatore, vista.contatore)
+        prima_posizione = 0
+        if cambiati is not None and len(vista.classifica) == len(precedente.classifica) \
+                and vista.classifica[:1] == precedente.classifica[:1]:
+            prima_posizione = len(vista.classifica)
+            for nome in cambiati:
+                for versione_vista in (precedente, vista):
+                    if nome in versione_vista.punteggi:
+                        chiave = (-versione_vista.punteggi[nome], versione_vista.ordine[nome], nome)
+                        prima_posizione = min(prima_posizione, versione_vista.classifica.posizione(chiave))
+
+        numero_pagine = max(1, -(-len(vista.classifica) // PAGINA_CLASSIFICA))
+        for numero in range(min(prima_posizione // PAGINA_CLASSIFICA, numero_pagine - 1), numero_pagine):
+            testo = json.dumps(self._pagina_classifica(vista, numero * PAGINA_CLASSIFICA, PAGINA_CLASSIFICA), ensure_ascii=False)
+            if self._pagine_statiche.get(numero) != testo:
+                # Sostituzione atomica senza fsync: i file statici vengono comunque rigenerati
+                scrivi_file_atomico(os.path.join(cartella_classifica, f"pagina_{numero}.json"), testo.encode("utf-8"), sincronizza=False)
+                self._pagine_statiche[numero] = testo
+        for numero in [n for n in self._pagine_statiche if n >= numero_pagine]:
+            del self._pagine_statiche[numero]
+            try:
+                os.remove(os.path.join(cartella_classifica, f"pagina_{numero}.json"))
+            except FileNotFoundError:
+                pass
+
+        dettagli_scritti = 0
+        for nome in vista.dati if cambiati is None else cambiati:
+            azioni = vista.dati.get(nome)
+            if azioni is None:
+                continue
+            versione = vista.versioni.get(nome, 0)
+            if self._dettagli_statici.get(nome) == versione:
+                continue
+            dettaglio = {"nome": nome, "punti": vista.punteggi[nome], "voci": azioni[::-1]}
+            scrivi_file_atomico(file_dettaglio_statico(nome), json.dumps(dettaglio, ensure_ascii=False).encode("utf-8"), sincronizza=False)
+            self._dettagli_statici[nome] = versione
+            dettagli_scritti += 1
+        self.frammenti_rigenerati["dettagli"] = dettagli_scritti
+
+        rimossi = self._dettagli_statici if cambiati is None else cambiati
+        for nome in [n for n in rimossi if n in self._dettagli_statici and n not in vista.dati]:
+            del self._dettagli_statici[nome]
+            try:
+                os.remove(file_dettaglio_statico(nome))
+            except FileNotFoundError:
+                pass
+
+        if not self._dati_statici_allineati:
+            # Alla prima scrittura si eliminano i file rimasti da collaboratori che non esistono più
+            validi = {os.path.basename(file_dettaglio_statico(nome)) for nome in vista.dati}
+            for file in os.listdir(cartella_collaboratori):
+                if file not in validi:
+                    os.remove(os.path.join(cartella_collaboratori, file))
+            for file in os.listdir(cartella_classifica):
+                if file.startswith("pagina_") and file[len("pagina_"):-len(".json")].isdigit() \
+                        and int(file[len("pagina_"):-len(".json")]) >= numero_pagine:
+                    os.remove(os.path.join(cartella_classifica, file))
+            self._dati_statici_allineati = True
+        self._vista_statica = vista
+
+    def genera_report_html_e_carica(self):
+        """
+        Genera il report HTML e lo carica su GitHub.
+        Con un pianificatore attivo segnala solo che il report va aggiornato: la generazione
+        avviene dopo un periodo di quiete, accorpando le modifiche ravvicinate.
+        Con un pubblicatore attivo il push viene solo accodato, senza attenderne l'esito.
+        """
+        if self.pianificatore:
+            self.pianificatore.segnala_modifica()
+            return
+        self.genera_report_html()
+        if self.pubblicatore:
+            self.pubblicatore.richiedi_pubblicazione()
+        else:
+            carica_su_github()
+
+# --- Rigenerazione del report accorpata (debounce) ---
+class PianificatoreReport(threading.Thread):
+    def __init__(self, genera_report, pubblicatore=None, periodo_quiete=2.0, ritardo_massimo=10.0):
+        """
+        Rigenera il report in background quando le modifiche si fermano per `periodo_quiete`
+        secondi (e comunque entro `ritardo_massimo` secondi dalla prima modifica in sospeso),
+        poi accoda la pubblicazione. Una raffica di modifiche produce una sola generazione.
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.genera_report = genera_report
+        self.pubblicatore = pubblicatore
+        self.periodo_quiete = periodo_quiete
+        self.ritardo_massimo = ritardo_massimo
+        self._condizione = threading.Condition()
+        self._lock_generazione = threading.Lock()
+        self._in_sospeso = 0
+        self._prima_modifica = None
+        self._ultima_modifica = None
+        self._in_chiusura = False
+        self.richieste = 0
+        self.generazioni = 0
+        self.generazioni_risparmiate = 0
+
+    def segnala_modifica(self):
+        """Segna il report come da rigenerare e ritorna subito."""
+        with self._condizione:
+            adesso = time.monotonic()
+            if self._in_sospeso == 0:
+                self._prima_modifica = adesso
+            self._ultima_modifica = adesso
+            self._in_sospeso += 1
+            self.richieste += 1
+            self._condizione.notify()
+
+    def stato(self):
+        """Restituisce richieste ricevute, generazioni eseguite e generazioni risparmiate."""
+        with self._condizione:
+            return {
+                "richieste": self.richieste,
+                "generazioni": self.generazioni,
+                "risparmiate": self.generazioni_risparmiate,
+                "in_sospeso": self._in_sospeso,
+            }
+
+    def run(self):
+        while True:
+            with self._condizione:
+                while self._in_sospeso == 0 and not self._in_chiusura:
+                    self._condizione.wait()
+                if self._in_sospeso == 0:
+                    return
+                # Attende che le modifiche si fermino, senza superare il ritardo massimo
+                while not self._in_chiusura:
+                    scadenza = min(self._ultima_modifica + self.periodo_quiete, self._prima_modifica + self.ritardo_massimo)
+                    restante = scadenza - time.monotonic()
+                    if restante <= 0 or self._in_sospeso == 0:
+                        break
+                    self._condizione.wait(restante)
+            self.genera_ora(solo_se_in_sospeso=True)
+
+    def genera_ora(self, solo_se_in_sospeso=False):
+        """
+        Rigenera subito il report (e ne accoda la pubblicazione) nel thread chiamante.
+        Restituisce True se il report è stato generato.
+        """
+        with self._lock_generazione:
+            with self._condizione:
+                accorpate = self._in_sospeso
+                if solo_se_in_sospeso and accorpate == 0:
+                    return False
+                self._in_sospeso = 0
+            self.genera_report()
+            with self._condizione:
+                self.generazioni += 1
+                self.generazioni_risparmiate += max(accorpate - 1, 0)
+        if self.pubblicatore:
+            self.pubblicatore.richiedi_pubblicazione()
+        return True
+
+    def ferma(self, timeout=None):
+        """Genera l'eventuale report in sospeso e termina il thread."""
+        with self._condizione:
+            self._in_chiusura = True
+            self._condizione.notify()
+        self.join(timeout)
+
+# --- Risorse statiche servite dalla memoria ---
+def scegli_codifica(accept_encoding, disponibili):
+    """
+    Restituisce la codifica di `disponibili` (in ordine di preferenza del server) con il valore q
+    più alto nell'intestazione Accept-Encoding, o None se nessuna è accettata.
+    I valori sono confrontati come token: una codifica con q=0, indicata direttamente
+    o tramite '*', non viene mai usata.
+    """
+    qualita = {}
+    for elemento in accept_encoding.split(','):
+        nome, *parametri = elemento.split(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametri:
+            chiave, _, valore = parametro.partition('=')
+            if chiave.strip().lower() == 'q':
+                try:
+                    q = float(valore)
+                except ValueError:
+                    q = 0.0
+        qualita[nome] = q
+    scelta, q_scelta = None, 0.0
+    for codifica in disponibili:
+        q = qualita.get(codifica, qualita.get('*', 0.0))
+        if q > q_scelta:
+            scelta, q_scelta = codifica, q
+    return scelta
+
+class RisorsaStatica:
+    __slots__ = ("contenuto", "gzip", "brotli", "content_type", "etag", "last_modified", "cache_control", "mtime_ns", "dimensione")
+
+class CacheRisorseStatiche:
+    TIPI = {
+        ".html": "text/html; charset=utf-8",
+        ".json": "application/json; charset=utf-8",
+        ".png": "image/png",
+    }
+    # Le pagine cambiano spesso (index.html a ogni check-in): il browser deve sempre rivalidarle con l'ETag
+    CACHE_CONTROL = {
+        ".html": "no-cache",
+        ".json": "no-cache",
+        ".png": "public, max-age=86400",
+    }
+
+    def __init__(self, cartella="."):
+        """
+        Tiene in memoria i file serviti dal server (pagine, manifest e loghi), già compressi
+        e con il relativo ETag. Un file viene riletto dal disco solo se la sua data di modifica cambia.
+        """
+        self.cartella = cartella
+        self._risorse = {}
+        self._lock = threading.Lock()
+
+    def precarica(self, filenames):
+        for filename in filenames:
+            self.ottieni(filename)
+
+    def ottieni(self, filename):
+        """Restituisce la RisorsaStatica aggiornata per `filename`, o None se il file non esiste."""
+        percorso = os.path.join(self.cartella, filename)
+        try:
+            stat = os.stat(percorso)
+        except FileNotFoundError:
+            self._risorse.pop(filename, None)
+            return None
+        risorsa = self._risorse.get(filename)
+        if risorsa is None or risorsa.mtime_ns != stat.st_mtime_ns or risorsa.dimensione != stat.st_size:
+            with self._lock:
+                risorsa = self._carica(filename, percorso, stat)
+                self._risorse[filename] = risorsa
+        return risorsa
+
+    def _carica(self, filename, percorso, stat):
+        with open(percorso, 'rb') as f:
+            contenuto = f.read()
+        estensione = os.path.splitext(filename)[1].lower()
+        risorsa = RisorsaStatica()
+        risorsa.contenuto = contenuto
+        risorsa.content_type = self.TIPI.get(estensione, "application/octet-stream")
+        risorsa.cache_control = self.CACHE_CONTROL.get(estensione, "no-cache")
+        risorsa.etag = '"' + hashlib.sha1(contenuto).hexdigest()[:20] + '"'
+        risorsa.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        risorsa.mtime_ns = stat.st_mtime_ns
+        risorsa.dimensione = stat.st_size
+        testo = risorsa.content_type.startswith(("text/", "application/json"))
+        risorsa.gzip = gzip.compress(contenuto, 9, mtime=0) if testo else None
+        risorsa.brotli = brotli.compress(contenuto) if testo and brotli else None
+        return risorsa
+
+# File statici serviti dal server locale: percorso URL -> file
+FILE_STATICI = {
+    '/': 'checkin.html',
+    '/checkin.html': 'checkin.html',
+    '/index.html': 'index.html',
+    '/manifest.json': 'manifest.json',
+    '/logo_ubroker.png': 'logo_ubroker.png',
+    '/logo_192.png': 'logo_192.png',
+    '/logo_512.png': 'logo_512.png',
+}
+risorse_statiche = CacheRisorseStatiche()
+
+# --- Check-in idempotenti ---
+class RegistroIdempotenza:
+    def __init__(self, capienza=2000):
+        """
+        Ricorda l'esito delle ultime `capienza` operazioni per token, così un modulo
+        inviato di nuovo da una rete mobile instabile non viene eseguito due volte.
+        """
+        self.capienza = capienza
+        self._esiti = OrderedDict()
+        self._lock = threading.Lock()
+
+    def esegui(self, token, funzione):
+        """
+        Esegue `funzione` una sola volta per `token`. Restituisce (risultato, eseguito_ora):
+        le ripetizioni ricevono il risultato originale con eseguito_ora=False.
+        """
+        if not token:
+            return funzione(), True
+        with self._lock:
+            voce = self._esiti.get(token)
+            proprietario = voce is None
+            if proprietario:
+                # [evento di completamento, risultato]
+                voce = [threading.Event(), None]
+                self._esiti[token] = voce
+                while len(self._esiti) > self.capienza:
+                    self._esiti.popitem(last=False)
+            else:
+                self._esiti.move_to_end(token)
+
+        if proprietario:
+            try:
+                voce[1] = funzione()
+            except Exception:
+                with self._lock:
+                    self._esiti.pop(token, None)
+                raise
+            finally:
+                voce[0].set()
+            return voce[1], True
+
+        # Stesso token già in corso su un'altra connessione: si attende il suo esito
+        voce[0].wait()
+        if voce[1] is None:
+            return self.esegui(token, funzione)
+        return voce[1], False
+
+# Dimensione massima accettata per il corpo di una richiesta POST
+MAX_CORPO_POST = 16 * 1024
+# Per /api/checkin_bulk (elenco di presenze in CSV o JSON)
+MAX_CORPO_BULK = 1024 * 1024
+# Righe massime restituite da una singola richiesta alle API paginate
+LIMITE_MASSIMO_PAGINA = 200
+# Periodi massimi di una serie restituita da /api/andamento (oltre tre anni giorno per giorno)
+MAX_PERIODI_ANDAMENTO = 1200
+checkin_idempotenti = RegistroIdempotenza()
+
+# --- Aggiornamenti in tempo reale (Server-Sent Events) ---
+class DiffusoreEventi(threading.Thread):
+    # Dati non ancora inviati oltre i quali un client è considerato bloccato e viene scollegato
+    MAX_ARRETRATO = 256 * 1024
+    # Commento inviato ai client inattivi per tenere aperta la connessione e scoprire quelle cadute
+    INTERVALLO_HEARTBEAT = 15
+
+    def __init__(self, max_client=1000):
+        """
+        Invia gli eventi SSE a tutti i browser collegati a /eventi con un solo thread.
+        Il server HTTP invia le intestazioni e poi stacca la connessione, che resta in un
+        selettore non bloccante finché il client non si scollega: un client inattivo non
+        occupa alcun thread del pool.
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.max_client = max_client
+        self.selettore = selectors.DefaultSelector()
+        # Coppia di socket usata dagli altri thread per svegliare select()
+        self._risveglio_lettura, self._risveglio_scrittura = socket.socketpair()
+        self._risveglio_lettura.setblocking(False)
+        self._risveglio_scrittura.setblocking(False)
+        self.selettore.register(self._risveglio_lettura, selectors.EVENT_READ)
+        self._lock = threading.Lock()
+        self._nuovi_client = []
+        self._messaggi = []
+        self._id_evento = 0
+        # Connessione -> dati ancora da inviare (usato solo dal thread del diffusore)
+        self._arretrati = {}
+        self._in_esecuzione = threading.Event()
+        self.client_scollegati_lenti = 0
+
+    def client_collegati(self):
+        return len(self._arretrati)
+
+    def aggiungi_client(self, connessione):
+        """
+        Prende in carico una connessione a cui sono già state inviate le intestazioni SSE.
+        Restituisce False se è stato raggiunto il numero massimo di client.
+        """
+        with self._lock:
+            if len(self._arretrati) + len(self._nuovi_client) >= self.max_client:
+                return False
+            self._nuovi_client.append(connessione)
+        self._risveglia()
+        return True
+
+    def pubblica(self, tipo, dati):
+        """Accoda un evento per tutti i client collegati, senza attendere l'invio."""
+        with self._lock:
+            self._id_evento += 1
+            self._messaggi.append(
+                f"id: {self._id_evento}\nevent: {tipo}\ndata: {json.dumps(dati, ensure_ascii=False)}\n\n".encode("utf-8")
+            )
+        self._risveglia()
+
+    def pubblica_variazione(self, variazione):
+        """Ascoltatore per ClassificaManager.aggiungi_ascoltatore."""
+        self.pubblica("punteggi", variazione)
+
+    def _risveglia(self):
+        try:
+            self._risveglio_scrittura.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # c'è già un risveglio in attesa, oppure il diffusore è fermo
+
+    def run(self):
+        self._in_esecuzione.set()
+        ultimo_invio = time.monotonic()
+        while self._in_esecuzione.is_set():
+            for chiave, eventi in self.selettore.select(timeout=self.INTERVALLO_HEARTBEAT):
+                connessione = chiave.fileobj
+                if connessione is self._risveglio_lettura:
+                    try:
+                        while connessione.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                if connessione not in self._arretrati:
+                    continue
+                if eventi & selectors.EVENT_READ:
+                    # Dopo la richiesta il browser non invia più nulla: una lettura vuota è la chiusura
+                    try:
+                        if not connessione.recv(4096):
+                            self._scollega(connessione)
+                            continue
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        self._scollega(connessione)
+                        continue
+                if eventi & selectors.EVENT_WRITE:
+                    self._invia(connessione)
+
+            with self._lock:
+                nuovi, self._nuovi_client = self._nuovi_client, []
+                messaggi, self._messaggi = self._messaggi, []
+            for connessione in nuovi:
+                connessione.setblocking(False)
+                self._arretrati[connessione] = bytearray()
+                self.selettore.register(connessione, selectors.EVENT_READ)
+
+            ora = time.monotonic()
+            if not messaggi and ora - ultimo_invio >= self.INTERVALLO_HEARTBEAT:
+                messaggi = [b": ping\n\n"]
+            if messaggi:
+                ultimo_invio = ora
+                blocco = b"".join(messaggi)
+                for connessione in list(self._arretrati):
+                    self._arretrati[connessione] += blocco
+                    self._invia(connessione)
+
+        for connessione in list(self._arretrati):
+            self._scollega(connessione)
+        self.selettore.close()
+
+    def _invia(self, connessione):
+        arretrato = self._arretrati[connessione]
+        try:
+            del arretrato[:connessione.send(arretrato)]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._scollega(connessione)
+            return
+        if len(arretrato) > self.MAX_ARRETRATO:
+            self.client_scollegati_lenti += 1
+            self._scollega(connessione)
+            return
+        # Si attende la scrivibilità solo finché resta qualcosa da inviare
+        self.selettore.modify(connessione, selectors.EVENT_READ | (selectors.EVENT_WRITE if arretrato else 0))
+
+    def _scollega(self, connessione):
+        self._arretrati.pop(connessione, None)
+        try:
+            self.selettore.unregister(connessione)
+        except (KeyError, ValueError):
+            pass
+        try:
+            connessione.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connessione.close()
+
+    def ferma(self, timeout=5):
+        """Chiude tutte le connessioni e termina il thread."""
+        self._in_esecuzione.clear()
+        self._risveglia()
+        if self.is_alive():
+            self.join(timeout)
+
+diffusore_eventi = DiffusoreEventi()
+
+# --- Gestione server web e QR code ---
+class MyHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 per il keep-alive: ogni risposta deve quindi dichiarare Content-Length
+    protocol_version = "HTTP/1.1"
+    # Timeout (in secondi) sul socket durante una richiesta: chiude i client lenti
+    timeout = 10
+    # Attesa massima della richiesta successiva su una connessione keep-alive: nel frattempo la
+    # connessione occupa un thread del pool, quindi un telefono inattivo lo libera subito
+    timeout_inattivita = 2
+
+    def handle(self):
+        """Come BaseHTTPRequestHandler.handle, ma tra una richiesta e l'altra attende al più timeout_inattivita."""
+        self.handle_one_request()
+        while not self.close_connection and self._richiesta_in_arrivo():
+            self.handle_one_request()
+
+    def _richiesta_in_arrivo(self):
+        """Attende l'inizio della richiesta successiva (o la trova già nel buffer) per al più timeout_inattivita."""
+        self.connection.settimeout(self.timeout_inattivita)
+        try:
+            arrivata = bool(self.rfile.peek(1))
+        except OSError:
+            # Timeout o connessione chiusa dal client
+            arrivata = False
+        self.connection.settimeout(self.timeout)
+        return arrivata
+
+    def _invia_risposta(self, codice, corpo, content_type='text/html; charset=utf-8'):
+        """Invia una risposta completa con Content-Length, compatibile con il keep-alive."""
+        self.send_response(codice)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _invia_json(self, dati, codice=200):
+        """Invia un oggetto come JSON non memorizzabile in cache, compresso se il client lo accetta."""
+        corpo = json.dumps(dati, ensure_ascii=False).encode('utf-8')
+        compresso = len(corpo) > 1024 and scegli_codifica(self.headers.get('Accept-Encoding', ''), ('gzip',)) is not None
+        if compresso:
+            corpo = gzip.compress(corpo, 6)
+        self.send_response(codice)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if compresso:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _apri_flusso_eventi(self):
+        """Risponde con un flusso SSE e passa la connessione al diffusore degli eventi."""
+        if not diffusore_eventi.is_alive():
+            self._invia_risposta(503, b"Aggiornamenti in tempo reale non disponibili.", 'text/plain')
+            return
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        # Il flusso non ha lunghezza: termina solo con la chiusura della connessione
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(b"retry: 2000\n\n")
+        self.wfile.flush()
+        # Da qui la connessione appartiene al diffusore: il server non deve chiuderla
+        self.server.stacca_connessione(self.connection)
+        if not diffusore_eventi.aggiungi_client(self.connection):
+            self.server.riattacca_connessione(self.connection)
+
+    def _parametri_pagina(self, query_components, limite_predefinito):
+        """Legge cursore e limite dalla query string; restituisce None se non sono numeri validi."""
+        try:
+            cursore = int(query_components.get('cursore', ['0'])[0])
+            limite = int(query_components.get('limite', [str(limite_predefinito)])[0])
+        except ValueError:
+            return None
+        return max(cursore, 0), min(max(limite, 1), LIMITE_MASSIMO_PAGINA)
+
+    def _invia_statistiche_periodo(self, path, query_components):
+        """
+        Risponde alle API sui periodi, calcolate dall'indice temporale:
+        - /api/classifica_periodo: classifica tra `inizio` e `fine` (esclusa), oppure del giorno,
+          della settimana o del mese (`granularita`) che contiene `data`; `azione` e `limite` facoltativi;
+        - /api/riepilogo_azioni: punti e registrazioni per azione tra `inizio` e `fine`, anche per un solo `nome`;
+        - /api/andamento: punti per periodo e totale accumulato, della squadra o di un `nome`.
+        """
+        def parametro(chiave, predefinito=None):
+            return query_components.get(chiave, [predefinito])[0]
+
+        azione = parametro('azione') or None
+        nome = parametro('nome') or None
+        try:
+            if path == '/api/classifica_periodo':
+                limite = min(max(int(parametro('limite', str(PAGINA_CLASSIFICA))), 1), LIMITE_MASSIMO_PAGINA)
+                if parametro('inizio') and parametro('fine'):
+                    risposta = {"inizio": parametro('inizio'), "fine": parametro('fine'),
+                                "classifica": classifica_manager.classifica_periodo(parametro('inizio'), parametro('fine'), azione)}
+                else:
+                    risposta = classifica_manager.classifica_del_periodo(parametro('granularita', 'settimana'), parametro('data'), azione)
+                classifica = risposta.pop("classifica")
+                risposta["totale"] = len(classifica)
+                risposta["voci"] = [{"posizione": posizione, "nome": nome_voce, "punti": punti}
+                                    for posizione, (nome_voce, punti) in enumerate(classifica[:limite], start=1)]
+            elif path == '/api/riepilogo_azioni':
+                if not parametro('inizio') or not parametro('fine'):
+                    self._invia_json({"errore": "Parametri 'inizio' e 'fine' obbligatori."}, 400)
+                    return
+                risposta = classifica_manager.riepilogo_azioni(parametro('inizio'), parametro('fine'), nome)
+            else:
+                risposta = classifica_manager.serie_punteggio(nome, parametro('granularita', 'giorno'), parametro('inizio'),
+                                                              parametro('fine'), azione, massimo_periodi=MAX_PERIODI_ANDAMENTO)
+        except ValueError as e:
+            self._invia_json({"errore": f"Parametri non validi: {e}"}, 400)
+            return
+        if risposta is None:
+            self._invia_json({"errore": f"Collaboratore '{nome}' non trovato."}, 404)
+        else:
+            self._invia_json(risposta)
+
+    def _invia_storico(self, path, query_components):
+        """
+        Risponde alle API sulla classifica passata:
+        - /api/classifica_al: classifica prima di `momento`, dalle date delle azioni o, con
+          `registrata=1`, com'era registrata allora (giornale e cronologia); `limite` facoltativo;
+        - /api/movimenti: variazioni di posizione da `dal` ad `al` (ora se assente); senza `dal`
+          dalla fine dell'ultimo Meeting day.
+        """
+        def parametro(chiave, predefinito=None):
+            return query_components.get(chiave, [predefinito])[0]
 
-                    // Aggiorna il countdown ogni 1 secondo
-                    var x = setInterval(function() {{
-                        // Ottieni la data e l'ora attuali
-                        var now = new Date().getTime();
+        registrata = parametro('registrata') in ('1', 'true')
+        try:
+            limite = min(max(int(parametro('limite', str(PAGINA_CLASSIFICA))), 1), LIMITE_MASSIMO_PAGINA)
+            if path == '/api/classifica_al':
+                if not parametro('momento'):
+                    self._invia_json({"errore": "Parametro 'momento' obbligatorio."}, 400)
+                    return
+                classifica = classifica_manager.classifica_al(parametro('momento'), registrata)
+                risposta = None if classifica is None else {
+                    "momento": parametro('momento'),
+                    "totale": len(classifica),
+                    "voci": [{"posizione": posizione, "nome": nome, "punti": punti}
+                             for posizione, (nome, punti) in enumerate(classifica[:limite], start=1)],
+                }
+            elif parametro('dal'):
+                movimenti = classifica_manager.movimenti_classifica(parametro('dal'), parametro('al'), registrata)
+                risposta = None if movimenti is None else {"dal": parametro('dal'), "al": parametro('al'), "movimenti": movimenti}
+            else:
+                risposta = classifica_manager.movimenti_dall_ultimo_meeting(registrata)
+        except ValueError as e:
+            self._invia_json({"errore": f"Parametri non validi: {e}"}, 400)
+            return
+        if risposta is None:
+            self._invia_json({"errore": "Nessun dato disponibile per il periodo richiesto."}, 404)
+            return
+        if "movimenti" in risposta:
+            risposta["totale"] = len(risposta["movimenti"])
+            risposta["movimenti"] = risposta["movimenti"][:limite]
+        self._invia_json(risposta)
 
-                        // Trova la distanza tra adesso e la data del countdown
-                        var distance = countDownDate - now;
+    def _invia_risorsa_statica(self, filename):
+        """
+        Serve un file dalla cache in memoria, con ETag/Last-Modified e compressione se accettata.
+        Risponde 304 se il client ha già la versione corrente.
+        """
+        risorsa = risorse_statiche.ottieni(filename)
+        if risorsa is None:
+            if filename == 'checkin.html':
+                notifica_utente("Errore", "File 'checkin.html' non trovato. Assicurati che sia nella stessa cartella dell'applicazione.", errore=True)
+                self._invia_risposta(200, b"Errore: File 'checkin.html' non trovato.", 'text/html')
+            else:
+                self._invia_risposta(404, b"File non trovato.", 'text/plain')
+            return
 
-                        // Calcola giorni, ore, minuti e secondi
-                        var days = Math.floor(distance / (1000 * 60 * 60 * 24));
-                        var hours = Math.floor((distance % (1000 * 60 * 60 * 24)) / (1000 * 60 * 60));
-                        var minutes = Math.floor((distance % (1000 * 60 * 60)) / (1000 * 60));
-                        var seconds = Math.floor((distance % (1000 * 60)) / 1000);
+        compresse = {'br': risorsa.brotli, 'gzip': risorsa.gzip}
+        codifica = scegli_codifica(self.headers.get('Accept-Encoding', ''),
+                                   [nome for nome, contenuto in compresse.items() if contenuto is not None])
+        corpo = compresse[codifica] if codifica else risorsa.contenuto
 
-                        // Mostra il risultato nell'elemento con id="countdown-timer"
-                        document.getElementById("countdown-timer").innerHTML = days + "g " + hours + "h " + minutes + "m " + seconds + "s ";
+        # Ogni codifica è una rappresentazione diversa: l'ETag ne riporta il suffisso
+        etag = risorsa.etag[:-1] + f'-{codifica}"' if codifica else risorsa.etag
 
-                        // Se il countdown è finito, scrivi un messaggio
-                        if (distance < 0) {{
-                            clearInterval(x);
-                            document.getElementById("countdown-timer").innerHTML = "Il contest è terminato!";
-                        }}
-                    }}, 1000);
-                </script>
-            </body>
-            </html>
-            """
-            report_content = html_content
-            
-        report_filename = "index.html"
-        with open(report_filename, "w", encoding="utf-8") as f:
-            f.write(report_content)
-        
-        return f"Report HTML generato con successo. Lo trovi nel file '{report_filename}'."
+        if self._versione_client_aggiornata(risorsa):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', risorsa.cache_control)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', risorsa.content_type)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', risorsa.last_modified)
+        self.send_header('Cache-Control', risorsa.cache_control)
+        if risorsa.gzip is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        if codifica:
+            self.send_header('Content-Encoding', codifica)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _versione_client_aggiornata(self, risorsa):
+        """Verifica If-None-Match (o, in sua assenza, If-Modified-Since) rispetto alla risorsa."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            for etag in if_none_match.split(','):
+                etag = etag.strip().removeprefix('W/')
+                if etag == '*' or etag.replace('-gzip"', '"').replace('-br"', '"') == risorsa.etag:
+                    return True
+            return False
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(risorsa.last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
 
-    def genera_report_html_e_carica(self):
-        """Genera il report HTML e lo carica su GitHub."""
-        self.genera_report_html()
-        carica_su_github()
-    
-# --- Gestione server web e QR code ---
-class MyHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         global classifica_manager
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         query_components = parse_qs(parsed_path.query)
 
-        if path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            try:
-                with open('checkin.html', 'r') as file:
-                    self.wfile.write(file.read().encode())
-            except FileNotFoundError:
-                messagebox.showerror("Errore", "File 'checkin.html' non trovato. Assicurati che sia nella stessa cartella dell'applicazione.")
-                self.wfile.write(b"Errore: File 'checkin.html' non trovato.")
+        if path in FILE_STATICI:
+            self._invia_risorsa_statica(FILE_STATICI[path])
         elif path == '/conferma_checkin':
             nome_collaboratore = query_components.get('nome', [''])[0]
             if nome_collaboratore:
@@ -712,27 +5009,215 @@ class MyHandler(BaseHTTPRequestHandler):
                 </body>
                 </html>
                 """
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.end_headers()
-                self.wfile.write(risposta_html.encode('utf-8'))
+                self._invia_risposta(200, risposta_html.encode('utf-8'))
             else:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b"Errore: Nome non fornito per la conferma.")
+                self._invia_risposta(400, b"Errore: Nome non fornito per la conferma.", 'text/plain')
         elif path == '/esegui_checkin':
             nome_collaboratore = query_components.get('nome', [''])[0]
             if nome_collaboratore:
                 messaggio = classifica_manager.aggiungi_azione(nome_collaboratore, "Meeting day")
-                
-                if "Errore" in messaggio:
-                    titolo = "Attenzione!"
-                    colore = "#ff6f00"
+                self._invia_risposta(200, self._pagina_esito_checkin(messaggio))
+            else:
+                self._invia_risposta(400, b"Errore: Nome non fornito per l'esecuzione del check-in.", 'text/plain')
+        elif path == '/api/classifica':
+            parametri = self._parametri_pagina(query_components, PAGINA_CLASSIFICA)
+            if parametri is None:
+                self._invia_json({"errore": "Parametri di paginazione non validi."}, 400)
+            else:
+                self._invia_json(classifica_manager.pagina_classifica(*parametri))
+        elif path == '/api/collaboratore':
+            nome_collaboratore = query_components.get('nome', [''])[0]
+            parametri = self._parametri_pagina(query_components, PAGINA_AZIONI)
+            if parametri is None:
+                self._invia_json({"errore": "Parametri di paginazione non validi."}, 400)
+            else:
+                pagina = classifica_manager.pagina_azioni(nome_collaboratore, *parametri)
+                if pagina is None:
+                    self._invia_json({"errore": f"Collaboratore '{nome_collaboratore}' non trovato."}, 404)
                 else:
-                    titolo = "Check-in Completato!"
-                    colore = "#0d47a1"
-                
-                risposta_finale_html = f"""
+                    self._invia_json(pagina)
+        elif path in ('/api/classifica_periodo', '/api/riepilogo_azioni', '/api/andamento'):
+            self._invia_statistiche_periodo(path, query_components)
+        elif path in ('/api/classifica_al', '/api/movimenti'):
+            self._invia_storico(path, query_components)
+        elif path == '/eventi':
+            self._apri_flusso_eventi()
+        elif path == '/favicon.ico':
+            self.send_response(204)
+            self.end_headers()
+        else:
+            self._invia_risposta(404, b"Pagina non trovata.", 'text/plain')
+
+    def do_POST(self):
+        global classifica_manager
+        path = urlparse(self.path).path
+
+        if path == '/api/checkin_bulk' and not self._amministratore_autorizzato():
+            self.close_connection = True
+            self._invia_json({"errore": "Token di amministrazione mancante o non valido."}, 403)
+            return
+
+        lunghezza = self._lunghezza_corpo()
+        if lunghezza is None:
+            return
+        if lunghezza > (MAX_CORPO_BULK if path == '/api/checkin_bulk' else MAX_CORPO_POST):
+            self.close_connection = True
+            self._invia_risposta(413, b"Errore: Richiesta troppo grande.", 'text/plain')
+            return
+        corpo = self.rfile.read(lunghezza).decode('utf-8', errors='replace')
+
+        if path == '/submit_checkin':
+            campi = parse_qs(corpo)
+            nome_input = campi.get('nome', [''])[0].strip()
+            token = campi.get('token', [''])[0].strip()
+            if not nome_input:
+                self._invia_risposta(400, b"Errore: Nome non fornito per il check-in.", 'text/plain')
+                return
+
+            # Nome sconosciuto ma simile a nomi esistenti (probabile refuso): si chiede conferma
+            # prima di creare un nuovo collaboratore, a meno che la conferma non sia già arrivata
+            if campi.get('nuovo', [''])[0] != '1' and classifica_manager.cerca_collaboratore_flessibile(nome_input) is None:
+                simili = classifica_manager.suggerisci_collaboratori(nome_input, limite=3)
+                if simili:
+                    if 'application/json' in self.headers.get('Accept', ''):
+                        self._invia_json({"esito": "suggerimenti", "suggerimenti": simili})
+                    else:
+                        self._invia_risposta(200, self._pagina_suggerimenti(nome_input, token, simili))
+                    return
+
+            def esegui_checkin():
+                nome_std = classifica_manager.cerca_collaboratore_flessibile(nome_input) or classifica_manager.standardizza_nome(nome_input)
+                return classifica_manager.aggiungi_azione(nome_std, "Meeting day", aggiorna_report=False)
+
+            # Un invio ripetuto con lo stesso token riceve la risposta originale senza contare di nuovo i punti
+            messaggio, eseguito_ora = checkin_idempotenti.esegui(token, esegui_checkin)
+
+            if 'application/json' in self.headers.get('Accept', ''):
+                self._invia_json({"esito": "errore" if "Errore" in messaggio else "ok", "messaggio": messaggio})
+            else:
+                self._invia_risposta(200, self._pagina_esito_checkin(messaggio))
+
+            # Il report viene rigenerato solo dopo aver risposto al telefono
+            if eseguito_ora and "Errore" not in messaggio:
+                classifica_manager.genera_report_html_e_carica()
+        elif path == '/api/checkin_bulk':
+            self._checkin_bulk(corpo)
+        else:
+            self._invia_risposta(404, b"Pagina non trovata.", 'text/plain')
+
+    def _lunghezza_corpo(self):
+        """
+        Restituisce la lunghezza del corpo dichiarata in Content-Length. Se manca risponde 411
+        (i POST devono dichiararla), se non è un intero non negativo risponde 400; in entrambi
+        i casi chiude la connessione e restituisce None.
+        """
+        valore = self.headers.get('Content-Length')
+        if valore is None:
+            self.close_connection = True
+            self._invia_risposta(411, b"Errore: Intestazione Content-Length mancante.", 'text/plain')
+            return None
+        valore = valore.strip()
+        if not (valore.isascii() and valore.isdigit()):
+            self.close_connection = True
+            self._invia_risposta(400, b"Errore: Intestazione Content-Length non valida.", 'text/plain')
+            return None
+        return int(valore)
+
+    def _amministratore_autorizzato(self):
+        """
+        Verifica l'intestazione "Authorization: Bearer <token>" rispetto alla variabile
+        d'ambiente APEX_ADMIN_TOKEN; senza la variabile le API di amministrazione sono disattivate.
+        """
+        token_atteso = os.environ.get("APEX_ADMIN_TOKEN")
+        if not token_atteso:
+            return False
+        intestazione = self.headers.get('Authorization', '')
+        if not intestazione.startswith('Bearer '):
+            return False
+        return hmac.compare_digest(intestazione[len('Bearer '):].strip().encode('utf-8'), token_atteso.encode('utf-8'))
+
+    def _checkin_bulk(self, corpo):
+        """
+        Registra in blocco le righe ricevute: JSON ({"righe": [{"nome", "azione", "quantita"}],
+        "azione": predefinita, "crea_mancanti": bool} oppure direttamente la lista) o testo CSV.
+        """
+        crea_mancanti = False
+        if 'application/json' in self.headers.get('Content-Type', ''):
+            try:
+                richiesta = json.loads(corpo)
+                if isinstance(richiesta, list):
+                    richiesta = {"righe": richiesta}
+                azione_predefinita = richiesta.get("azione", "Meeting day")
+                crea_mancanti = bool(richiesta.get("crea_mancanti", False))
+                righe = [
+                    (riga.get("nome", ""), riga.get("azione") or azione_predefinita, riga.get("quantita", 1))
+                    for riga in richiesta["righe"]
+                ]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self._invia_json({"errore": "Corpo JSON non valido: atteso {\"righe\": [{\"nome\": ...}]}."}, 400)
+                return
+        else:
+            try:
+                righe = leggi_righe_presenze(corpo)
+            except ValueError as e:
+                self._invia_json({"errore": f"CSV non valido: {e}"}, 400)
+                return
+        esiti = classifica_manager.aggiungi_azioni_bulk(righe, crea_mancanti=crea_mancanti)
+        registrate = sum(1 for esito in esiti if esito["esito"] == "ok")
+        self._invia_json({"registrate": registrate, "errori": len(esiti) - registrate, "righe": esiti})
+
+    def _pagina_suggerimenti(self, nome_input, token, simili):
+        """
+        Pagina HTML (in bytes) che propone i nomi simili a quello inserito, più la conferma del nome
+        così com'è. Ogni scelta ha un proprio token derivato da quello del modulo, quindi resta idempotente.
+        """
+        def pulsante(nome, indice, nuovo=False):
+            campo_nuovo = '<input type="hidden" name="nuovo" value="1">' if nuovo else ''
+            return f"""
+                    <form action="/submit_checkin" method="post">
+                        <input type="hidden" name="nome" value="{html.escape(nome)}">
+                        <input type="hidden" name="token" value="{html.escape(f'{token}-{indice}' if token else '')}">
+                        {campo_nuovo}
+                        <button type="submit">{html.escape(nome)}</button>
+                    </form>"""
+
+        pulsanti = "".join(pulsante(nome, i) for i, nome in enumerate(simili, start=1))
+        pagina = f"""
+                <!DOCTYPE html>
+                <html lang="it">
+                <head>
+                    <meta charset="UTF-8">
+                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+                    <title>Forse intendevi...</title>
+                    <style>
+                        body {{ font-family: sans-serif; text-align: center; margin-top: 50px; }}
+                        h1 {{ color: #0d47a1; }}
+                        p {{ font-size: 1.2em; }}
+                        button {{ background-color: #ff6f00; color: #fff; border: none; border-radius: 5px; padding: 10px 20px; margin: 5px; font-size: 1.1em; }}
+                        .nuovo button {{ background-color: #0d47a1; }}
+                    </style>
+                </head>
+                <body>
+                    <h1>Forse intendevi...</h1>
+                    <p>Nessun collaboratore si chiama "{html.escape(nome_input)}". Scegli il tuo nome:</p>
+                    {pulsanti}
+                    <p>Oppure registrati come nuovo collaboratore:</p>
+                    <div class="nuovo">{pulsante(nome_input, 0, nuovo=True)}</div>
+                </body>
+                </html>
+                """
+        return pagina.encode('utf-8')
+
+    def _pagina_esito_checkin(self, messaggio):
+        """Restituisce la pagina HTML (in bytes) con l'esito di un check-in."""
+        if "Errore" in messaggio:
+            titolo = "Attenzione!"
+            colore = "#ff6f00"
+        else:
+            titolo = "Check-in Completato!"
+            colore = "#0d47a1"
+        
+        risposta_finale_html = f"""
                 <!DOCTYPE html>
                 <html lang="it">
                 <head>
@@ -747,41 +5232,61 @@ class MyHandler(BaseHTTPRequestHandler):
                 </head>
                 <body>
                     <h1>{titolo}</h1>
-                    <p>{messaggio}</p>
+                    <p>{html.escape(messaggio)}</p>
                 </body>
                 </html>
                 """
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.end_headers()
-                self.wfile.write(risposta_finale_html.encode('utf-8'))
-            else:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b"Errore: Nome non fornito per l'esecuzione del check-in.")
-        elif path == '/logo_ubroker.png':
-            try:
-                self.send_response(200)
-                self.send_header('Content-type', 'image/png')
-                self.end_headers()
-                with open('logo_ubroker.png', 'rb') as file:
-                    self.wfile.write(file.read())
-            except FileNotFoundError:
-                self.send_response(404)
-                self.end_headers()
-                self.wfile.write(b"File non trovato.")
-        elif path == '/favicon.ico':
-            self.send_response(204)
-            self.end_headers()
-        else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b"Pagina non trovata.")
+        return risposta_finale_html.encode('utf-8')
+
+# --- Server HTTP concorrente con pool di thread limitato ---
+class ServerHTTPConcorrente(HTTPServer):
+    # Connessioni in attesa di accept() durante i picchi di check-in
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_thread=32):
+        """
+        HTTPServer che gestisce ogni connessione su un pool limitato di thread,
+        così un client lento non blocca gli altri e il numero di thread resta sotto controllo.
+        """
+        HTTPServer.__init__(self, server_address, handler_class)
+        self.esecutore = ThreadPoolExecutor(max_workers=max_thread, thread_name_prefix="http")
+        # Connessioni passate ad altri componenti (flussi SSE), da non chiudere a fine richiesta
+        self._connessioni_staccate = set()
+        self._lock_staccate = threading.Lock()
+
+    def process_request(self, request, client_address):
+        self.esecutore.submit(self._gestisci_connessione, request, client_address)
+
+    def _gestisci_connessione(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def stacca_connessione(self, request):
+        with self._lock_staccate:
+            self._connessioni_staccate.add(request)
+
+    def riattacca_connessione(self, request):
+        with self._lock_staccate:
+            self._connessioni_staccate.discard(request)
+
+    def shutdown_request(self, request):
+        with self._lock_staccate:
+            if request in self._connessioni_staccate:
+                self._connessioni_staccate.discard(request)
+                return
+        HTTPServer.shutdown_request(self, request)
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self.esecutore.shutdown(wait=False)
 
 # --- Avvio del server in un thread separato ---
 class ServerThread(threading.Thread):
-    def __init__(self, port, server_class=HTTPServer, handler_class=MyHandler):
+    def __init__(self, port, server_class=ServerHTTPConcorrente, handler_class=MyHandler):
         threading.Thread.__init__(self)
         self.port = port
         self.server_class = server_class
@@ -807,9 +5312,308 @@ class ServerThread(threading.Thread):
             self.httpd.server_close()
             print("Server arrestato.")
 
+# --- Tunnel ngrok e QR code della pagina di check-in ---
+def avvia_ngrok(porta):
+    """Apre un tunnel ngrok verso il server locale e salva il QR code per il check-in in qrcode.png."""
+    global public_url
+    try:
+        from pyngrok import ngrok
+        import qrcode
+        tunnel = ngrok.connect(porta)
+        public_url = tunnel.public_url
+        # L'URL per il QR code dovrebbe puntare al server web locale
+        qrcode_url = f"{public_url}/?nome=nome_collaboratore"
+        qrcode_img = qrcode.make(qrcode_url)
+        qrcode_img.save("qrcode.png")
+        return True, f"ngrok è stato avviato con successo. URL: {public_url}"
+    except Exception as e:
+        return False, f"Errore durante l'avvio di ngrok: {e}"
+
+def arresta_ngrok(rimuovi_qrcode=True):
+    """Chiude i tunnel ngrok aperti e, se richiesto, elimina il QR code che vi puntava."""
+    global public_url
+    try:
+        from pyngrok import ngrok
+        ngrok.kill()
+        public_url = None
+        if rimuovi_qrcode and os.path.exists("qrcode.png"):
+            os.remove("qrcode.png")
+        return True, "ngrok è stato arrestato con successo."
+    except Exception as e:
+        return False, f"Errore durante l'arresto di ngrok: {e}"
+
+# --- Servizi condivisi da interfaccia grafica e modalità server ---
+def crea_classifica_manager(pubblicatore=None, sola_lettura=False):
+    """
+    Crea il ClassificaManager con l'archiviazione scelta da AZIONI_COMPATTE e ARCHIVIAZIONE_SQLITE.
+    Con `sola_lettura` il caricamento non scrive nulla nella cartella dei dati (vedi
+    ArchiviazioneJSON): il manager va usato solo per leggere.
+    """
+    archiviazione = None
+    da_importare = ARCHIVIAZIONE_SQLITE and not os.path.exists(DATABASE_SQLITE)
+    if sola_lettura and (da_importare or not ARCHIVIAZIONE_SQLITE):
+        # Senza database (o prima di crearlo) si leggono i file JSON, quelli che verrebbero importati
+        archiviazione = ArchiviazioneJSON(compatto=AZIONI_COMPATTE, sola_lettura=True)
+    elif ARCHIVIAZIONE_SQLITE:
+        archiviazione = ArchiviazioneSQLite(DATABASE_SQLITE, sola_lettura=sola_lettura)
+        if da_importare and os.path.exists("classifica_apex_data.json"):
+            archiviazione.importa_json()
+    manager = ClassificaManager(pubblicatore=pubblicatore, compatto=AZIONI_COMPATTE, archiviazione=archiviazione)
+    for azione, regola in REGOLE_FREQUENZA.items():
+        manager.imposta_regola_frequenza(azione, regola)
+    return manager
+
+# --- Accesso esclusivo alla cartella dei dati ---
+# File tenuto bloccato dal processo che usa la classifica (escluso da git in .gitignore)
+FILE_BLOCCO = "classifica_apex.lock"
+
+class BloccoCartellaDati:
+    """
+    Blocco esclusivo della cartella dei dati: interfaccia grafica, server e comandi di gestione
+    che modificano la classifica lo acquisiscono all'avvio, così due processi non scrivono mai
+    insieme il giornale e il file principale. È un blocco del sistema operativo (flock, o
+    msvcrt.locking su Windows): si libera da solo anche se il processo termina all'improvviso.
+    Il file contiene il PID del processo che lo tiene, per il messaggio di errore.
+    """
+    def __init__(self, percorso=FILE_BLOCCO):
+        self.percorso = percorso
+        self._file = None
+
+    def acquisisci(self):
+        """Acquisisce il blocco senza attendere. Restituisce False se un altro processo lo tiene."""
+        f = open(self.percorso, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def proprietario(self):
+        """PID del processo che tiene il blocco, o None se non si riesce a leggerlo."""
+        try:
+            with open(self.percorso) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def rilascia(self):
+        """Rilascia il blocco chiudendo il file (il file resta, per non creare race con chi lo apre)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def blocca_cartella_dati():
+    """Acquisisce il blocco della cartella dei dati. Restituisce (blocco, None) oppure (None, messaggio di errore)."""
+    blocco = BloccoCartellaDati()
+    if blocco.acquisisci():
+        return blocco, None
+    pid = blocco.proprietario()
+    processo = f"un altro processo (PID {pid})" if pid else "un altro processo"
+    return None, (f"Errore: La classifica è già in uso da {processo}: interfaccia grafica, server di check-in "
+                  f"o comando di gestione. Chiudilo e riprova.")
+
+def avvia_servizi(porta, pubblica=True):
+    """
+    Carica la classifica e avvia i servizi in background: pubblicazione su GitHub (se `pubblica`),
+    rigenerazione del report, aggiornamenti in tempo reale e server web sulla `porta`.
+    Restituisce (pianificatore del report, funzione che arresta tutti i servizi).
+    """
+    global classifica_manager
+    pubblicatore = None
+    if pubblica:
+        pubblicatore = PubblicatoreGitHub()
+        pubblicatore.start()
+    classifica_manager = crea_classifica_manager(pubblicatore)
+    pianificatore = PianificatoreReport(classifica_manager.genera_report_html, pubblicatore)
+    pianificatore.start()
+    classifica_manager.pianificatore = pianificatore
+    diffusore_eventi.start()
+    classifica_manager.aggiungi_ascoltatore(diffusore_eventi.pubblica_variazione)
+
+    risorse_statiche.precarica(set(FILE_STATICI.values()))
+    server_thread = ServerThread(porta)
+    server_thread.daemon = True
+    server_thread.start()
+
+    def chiudi_servizi():
+        if server_thread and server_thread.is_running:
+            server_thread.stop()
+        diffusore_eventi.ferma()
+        if public_url:
+            arresta_ngrok(rimuovi_qrcode=False)
+        # Riscrive il file principale, genera il report in sospeso e completa l'eventuale push prima di uscire
+        classifica_manager.compatta()
+        pianificatore.ferma(timeout=30)
+        classifica_manager.chiudi()
+        if pubblicatore:
+            pubblicatore.ferma(timeout=120)
+
+    return pianificatore, chiudi_servizi
+
+# --- Moduli della GUI importati all'avvio dell'interfaccia ---
+def importa_moduli_gui():
+    """Importa Tkinter e rende disponibili i suoi moduli alle funzioni dell'interfaccia grafica."""
+    global tk, messagebox, simpledialog, filedialog, Toplevel, scrolledtext, ttk
+    import tkinter as tk
+    from tkinter import messagebox, simpledialog, filedialog, Toplevel, scrolledtext, ttk
+
+# --- Operazioni della GUI eseguite in background ---
+class EsecutoreGUI:
+    def __init__(self, finestra, max_thread=4, intervallo_ms=50):
+        """
+        Esegue le operazioni lente avviate dalla GUI (salvataggi, report, git, ngrok) su un pool
+        di thread, così la finestra resta reattiva. I risultati tornano al thread di Tk tramite
+        una coda controllata con `after`, insieme alle notifiche accodate da notifica_utente.
+        """
+        self.finestra = finestra
+        self.intervallo_ms = intervallo_ms
+        self.esecutore = ThreadPoolExecutor(max_workers=max_thread, thread_name_prefix="gui")
+        self._risultati = queue.Queue()
+        self._in_corso = {}
+        self._contatore = itertools.count(1)
+        self._in_chiusura = False
+        self.testo_stato = tk.StringVar(finestra, value="Pronto.")
+        self._barra = None
+
+    def crea_barra_stato(self, contenitore):
+        """Crea la barra di stato con il messaggio corrente e l'indicatore di avanzamento."""
+        cornice = tk.Frame(contenitore, bd=1, relief=tk.SUNKEN)
+        tk.Label(cornice, textvariable=self.testo_stato, anchor="w").pack(side=tk.LEFT, fill='x', expand=True, padx=5)
+        self._barra = ttk.Progressbar(cornice, mode="indeterminate", length=120)
+        self._barra.pack(side=tk.RIGHT, padx=5, pady=2)
+        return cornice
+
+    def avvia(self):
+        """Inizia a controllare la coda dei risultati dal thread di Tk."""
+        self.finestra.after(self.intervallo_ms, self._controlla)
+
+    def esegui(self, descrizione, funzione, *args, al_termine=None, pulsante=None):
+        """
+        Esegue funzione(*args) in background e ritorna subito.
+        Al termine chiama al_termine(risultato) nel thread di Tk; un'eccezione viene mostrata come errore.
+        Il pulsante indicato resta disattivato finché l'operazione è in corso.
+        """
+        if self._in_chiusura:
+            return
+        identificativo = next(self._contatore)
+        self._in_corso[identificativo] = (descrizione, time.monotonic())
+        if pulsante is not None:
+            pulsante.config(state=tk.DISABLED)
+        self._aggiorna_stato()
+
+        def lavoro():
+            try:
+                esito = (True, funzione(*args))
+            except Exception as e:
+                esito = (False, e)
+            self._risultati.put((identificativo, esito, al_termine, pulsante))
+
+        self.esecutore.submit(lavoro)
+
+    def chiudi(self, funzione, al_termine):
+        """
+        Rifiuta nuove operazioni, attende quelle in corso e poi esegue funzione in background;
+        al_termine viene chiamata nel thread di Tk anche se funzione fallisce.
+        """
+        if self._in_chiusura:
+            return
+        self._in_chiusura = True
+        identificativo = next(self._contatore)
+        self._in_corso[identificativo] = ("Chiusura in corso", time.monotonic())
+        self._aggiorna_stato()
+
+        def lavoro():
+            self.esecutore.shutdown(wait=True)
+            try:
+                esito = (True, funzione())
+            except Exception as e:
+                print(f"Errore durante la chiusura: {e}")
+                esito = (True, None)
+            self._risultati.put((identificativo, esito, al_termine, None))
+
+        threading.Thread(target=lavoro, daemon=True).start()
+
+    def _controlla(self):
+        while True:
+            try:
+                identificativo, (riuscita, valore), al_termine, pulsante = self._risultati.get_nowait()
+            except queue.Empty:
+                break
+            descrizione, inizio = self._in_corso.pop(identificativo)
+            durata = time.monotonic() - inizio
+            if pulsante is not None:
+                try:
+                    pulsante.config(state=tk.NORMAL)
+                except tk.TclError:
+                    # La finestra del pulsante è stata chiusa nel frattempo
+                    pass
+            if not riuscita:
+                self.testo_stato.set(f"{descrizione}: errore.")
+                messagebox.showerror("Errore", f"Errore durante l'operazione '{descrizione}': {valore}")
+                continue
+            self.testo_stato.set(f"{descrizione}: completato in {durata:.1f}s.")
+            if al_termine is None:
+                continue
+            try:
+                al_termine(valore)
+            except tk.TclError:
+                # I widget da aggiornare sono stati chiusi mentre l'operazione era in corso
+                pass
+            except Exception as e:
+                print(f"Errore nell'aggiornamento dell'interfaccia dopo '{descrizione}': {e}")
+
+        # Le notifiche identiche arrivate a raffica (es. da più richieste HTTP) si mostrano una volta
+        mostrate = set()
+        while True:
+            try:
+                titolo, messaggio, errore = coda_notifiche.get_nowait()
+            except queue.Empty:
+                break
+            if (titolo, messaggio) in mostrate:
+                continue
+            mostrate.add((titolo, messaggio))
+            if errore:
+                messagebox.showerror(titolo, messaggio)
+            else:
+                messagebox.showinfo(titolo, messaggio)
+
+        self._aggiorna_stato()
+        try:
+            self.finestra.after(self.intervallo_ms, self._controlla)
+        except tk.TclError:
+            # La finestra è stata distrutta (chiusura dell'applicazione)
+            pass
+
+    def _aggiorna_stato(self):
+        if self._in_corso:
+            descrizioni = [descrizione for descrizione, _ in self._in_corso.values()]
+            self.testo_stato.set(f"In corso ({len(descrizioni)}): {', '.join(descrizioni)}...")
+            if self._barra is not None:
+                self._barra.start(15)
+        elif self._barra is not None:
+            self._barra.stop()
+
+def mostra_esito(esito, titolo_successo="Successo"):
+    """Mostra l'esito (successo, messaggio) restituito da un metodo del manager."""
+    successo, messaggio = esito
+    if successo:
+        messagebox.showinfo(titolo_successo, messaggio)
+    else:
+        messagebox.showerror("Errore", messaggio)
+
 # --- Nuova funzione per la gestione della classifica (spostata qui) ---
 def mostra_gestione_classifica():
-    global classifica_manager, window
+    global classifica_manager, window, esecutore_gui
     gestione_window = Toplevel(window)
     gestione_window.title("Gestione Collaboratori e Punti")
     gestione_window.geometry("600x650")
@@ -826,8 +5630,7 @@ def mostra_gestione_classifica():
     # Funzione per popolare la Listbox
     def popola_listbox():
         listbox_collaboratori.delete(0, tk.END)
-        for nome_collaboratore in sorted(classifica_manager.dati_collaboratori.keys()):
-            punteggio = classifica_manager.calcola_punteggio_totale(nome_collaboratore)
+        for nome_collaboratore, punteggio in sorted(classifica_manager.vista().punteggi.items()):
             listbox_collaboratori.insert(tk.END, f"{nome_collaboratore} ({punteggio} punti)")
             
     popola_listbox()
@@ -853,20 +5656,23 @@ def mostra_gestione_classifica():
             entry_modifica_nome.insert(0, nome_selezionato)
             entry_modifica_nome.pack(pady=(0, 5))
 
+            # Al termine di una modifica riuscita si aggiornano la lista e si chiude il dialogo
+            def modifica_completata(esito):
+                mostra_esito(esito)
+                if esito[0]:
+                    popola_listbox()
+                    modifica_window.destroy()
+
             def esegui_modifica_nome():
                 nuovo_nome = entry_modifica_nome.get()
                 if nuovo_nome and nuovo_nome != nome_selezionato:
-                    successo, messaggio = classifica_manager.modifica_nome_collaboratore(nome_selezionato, nuovo_nome)
-                    if successo:
-                        messagebox.showinfo("Successo", messaggio)
-                        popola_listbox() # Aggiorna la lista
-                        modifica_window.destroy()
-                    else:
-                        messagebox.showerror("Errore", messaggio)
+                    esecutore_gui.esegui(f"Rinomina di '{nome_selezionato}'", classifica_manager.modifica_nome_collaboratore,
+                                         nome_selezionato, nuovo_nome, al_termine=modifica_completata, pulsante=pulsante_nome)
                 else:
                     messagebox.showinfo("Avviso", "Nessuna modifica del nome.")
 
-            tk.Button(frame_modifica, text="Salva Nuovo Nome", command=esegui_modifica_nome).pack(pady=5)
+            pulsante_nome = tk.Button(frame_modifica, text="Salva Nuovo Nome", command=esegui_modifica_nome)
+            pulsante_nome.pack(pady=5)
             
             tk.Frame(frame_modifica, height=2, bg="gray").pack(fill="x", pady=10)
 
@@ -874,14 +5680,10 @@ def mostra_gestione_classifica():
             tk.Label(frame_modifica, text="Elimina Collaboratore:", font=("Helvetica", 10, "bold")).pack(pady=(0, 5))
             def esegui_eliminazione_collaboratore():
                 if messagebox.askyesno("Conferma", f"Sei sicuro di voler eliminare definitivamente il collaboratore '{nome_selezionato}' e tutti i suoi dati?"):
-                    successo, messaggio = classifica_manager.elimina_collaboratore(nome_selezionato)
-                    if successo:
-                        messagebox.showinfo("Successo", messaggio)
-                        popola_listbox() # Aggiorna la lista
-                        modifica_window.destroy()
-                    else:
-                        messagebox.showerror("Errore", messaggio)
-            tk.Button(frame_modifica, text="Elimina Collaboratore", fg="red", command=esegui_eliminazione_collaboratore).pack(pady=5)
+                    esecutore_gui.esegui(f"Eliminazione di '{nome_selezionato}'", classifica_manager.elimina_collaboratore,
+                                         nome_selezionato, al_termine=modifica_completata, pulsante=pulsante_elimina)
+            pulsante_elimina = tk.Button(frame_modifica, text="Elimina Collaboratore", fg="red", command=esegui_eliminazione_collaboratore)
+            pulsante_elimina.pack(pady=5)
             
             tk.Frame(frame_modifica, height=2, bg="gray").pack(fill="x", pady=10)
 
@@ -901,46 +5703,74 @@ def mostra_gestione_classifica():
 
             aggiorna_dettagli_azioni()
 
+            def eliminazione_punti_completata(esito):
+                mostra_esito(esito)
+                if esito[0]:
+                    # Aggiorna le listbox dopo l'eliminazione
+                    popola_listbox()
+                    aggiorna_dettagli_azioni()
+
             def esegui_eliminazione_punti():
                 indice_riga_input = simpledialog.askinteger("Elimina Punti", "Inserisci il numero di riga (es. 1, 2, 3...) da eliminare:", parent=modifica_window)
                 if indice_riga_input is not None:
                     # L'utente ha inserito un numero
                     indice_riga = int(indice_riga_input) - 1 # Converti l'indice per la lista Python
                     if indice_riga >= 0:
-                        successo, messaggio = classifica_manager.elimina_riga(nome_selezionato, indice_riga)
-                        if successo:
-                            messagebox.showinfo("Successo", messaggio)
-                            # Aggiorna le listbox dopo l'eliminazione
-                            popola_listbox() 
-                            aggiorna_dettagli_azioni()
-                        else:
-                            messagebox.showerror("Errore", messaggio)
+                        esecutore_gui.esegui(f"Eliminazione della riga {indice_riga_input} di '{nome_selezionato}'", classifica_manager.elimina_riga,
+                                             nome_selezionato, indice_riga, al_termine=eliminazione_punti_completata, pulsante=pulsante_punti)
                     else:
                         messagebox.showerror("Errore", "Indice non valido. Deve essere un numero maggiore di 0.")
             
-            tk.Button(frame_modifica, text="Elimina Punti per Riga", command=esegui_eliminazione_punti).pack(pady=5)
+            pulsante_punti = tk.Button(frame_modifica, text="Elimina Punti per Riga", command=esegui_eliminazione_punti)
+            pulsante_punti.pack(pady=5)
 
         except IndexError:
             messagebox.showerror("Errore", "Seleziona un collaboratore dalla lista.")
 
     tk.Button(frame_gestione, text="Gestisci Collaboratore Selezionato", command=seleziona_collaboratore).pack(pady=10)
 
+# --- Ripristino della classifica a un momento passato (dal giornale degli eventi) ---
+def ripristina_classifica_gui():
+    global classifica_manager, window, esecutore_gui
+    momento = simpledialog.askstring("Ripristina Classifica", "Data e ora da ripristinare (AAAA-MM-GG HH:MM:SS):", parent=window)
+    if not momento:
+        return
+    try:
+        datetime.strptime(momento.strip(), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        messagebox.showerror("Errore", "Formato non valido. Usa AAAA-MM-GG HH:MM:SS.")
+        return
+    if messagebox.askyesno("Conferma", f"Riportare la classifica allo stato del {momento.strip()}?"):
+        esecutore_gui.esegui(f"Ripristino al {momento.strip()}", classifica_manager.ripristina_al, momento.strip(), al_termine=mostra_esito)
+
 # --- Interfaccia principale (PySimpleGUI rimosso) ---
-def main():
-    global classifica_manager
-    global public_url
+# Azioni in memoria e file principale nel formato compatto (vedi AzioniCompatte).
+# Il file scritto in formato 3 non è leggibile dalle versioni precedenti dell'applicazione.
+AZIONI_COMPATTE = False
+# Archiviazione su SQLite invece dei file JSON. Al primo avvio il database viene
+# popolato importando il file principale e il giornale esistenti; la cronologia resta
+# nella sua cartella, dove il database continua a leggere e salvare le istantanee.
+ARCHIVIAZIONE_SQLITE = False
+DATABASE_SQLITE = "classifica_apex.sqlite3"
+# Regole di frequenza da aggiungere o cambiare rispetto a quelle predefinite, valide per
+# interfaccia grafica, server e comandi: {azione: "giorno" | "settimana" | None (senza limiti)}
+REGOLE_FREQUENZA = {}
+
+def avvia_gui(server_port=8000):
     global window
-    classifica_manager = ClassificaManager()
-    
-    server_port = 8000
-    server_thread = ServerThread(server_port)
-    server_thread.daemon = True
-    server_thread.start()
+    global esecutore_gui
+    importa_moduli_gui()
+    blocco, errore = blocca_cartella_dati()
+    if blocco is None:
+        messagebox.showerror("Apex Challenge Report", errore)
+        return False
+    pianificatore, chiudi_servizi = avvia_servizi(server_port)
 
     # Creazione della finestra principale di Tkinter
     window = tk.Tk()
     window.title("Apex Challenge Report")
     window.geometry("700x550") # Aumento le dimensioni per la nuova finestra
+    esecutore_gui = EsecutoreGUI(window)
     
     # Crea un menu a tendina
     menubar = tk.Menu(window)
@@ -950,38 +5780,23 @@ def main():
     opzioni_menu = tk.Menu(menubar, tearoff=0)
     menubar.add_cascade(label="Opzioni", menu=opzioni_menu)
     opzioni_menu.add_command(label="Gestione Classifica", command=mostra_gestione_classifica)
+    opzioni_menu.add_command(label="Ripristina a Data/Ora...", command=ripristina_classifica_gui)
     opzioni_menu.add_separator()
     opzioni_menu.add_command(label="Esci", command=window.quit)
 
     # Funzione per gestire l'avvio e la chiusura di ngrok
+    # L'avvio e l'arresto del tunnel passano dalla rete: vengono eseguiti in background
     def gestisci_ngrok(action):
-        global public_url
         if action == "start":
             if public_url:
                 messagebox.showinfo("ngrok", f"ngrok è già in esecuzione: {public_url}")
                 return
-            try:
-                tunnel = ngrok.connect(server_port)
-                public_url = tunnel.public_url
-                # L'URL per il QR code dovrebbe puntare al server web locale
-                qrcode_url = f"{public_url}/?nome=nome_collaboratore" 
-                qrcode_img = qrcode.make(qrcode_url)
-                qrcode_img.save("qrcode.png")
-                messagebox.showinfo("ngrok Avviato", f"ngrok è stato avviato con successo. URL: {public_url}")
-            except Exception as e:
-                messagebox.showerror("Errore ngrok", f"Errore durante l'avvio di ngrok: {e}")
+            esecutore_gui.esegui("Avvio di ngrok", avvia_ngrok, server_port, al_termine=lambda esito: mostra_esito(esito, "ngrok Avviato"), pulsante=pulsante_avvia_ngrok)
         elif action == "stop":
             if not public_url:
                 messagebox.showinfo("ngrok", "ngrok non è in esecuzione.")
                 return
-            try:
-                ngrok.kill()
-                public_url = None
-                if os.path.exists("qrcode.png"):
-                    os.remove("qrcode.png")
-                messagebox.showinfo("ngrok Arrestato", "ngrok è stato arrestato con successo.")
-            except Exception as e:
-                messagebox.showerror("Errore ngrok", f"Errore durante l'arresto di ngrok: {e}")
+            esecutore_gui.esegui("Arresto di ngrok", arresta_ngrok, al_termine=lambda esito: mostra_esito(esito, "ngrok Arrestato"), pulsante=pulsante_ferma_ngrok)
     
     # Layout a 3 colonne per i pulsanti principali
     main_frame = tk.Frame(window, padx=20, pady=20)
@@ -998,17 +5813,11 @@ def main():
     def aggiungi_collaboratore_gui():
         nome = entry_collaboratore.get()
         if nome:
-            nome_std = classifica_manager.standardizza_nome(nome)
-            if nome_std not in classifica_manager.dati_collaboratori:
-                classifica_manager.dati_collaboratori[nome_std] = []
-                classifica_manager.salva_dati()
-                classifica_manager.salva_cronologia()
-                classifica_manager.genera_report_html_e_carica()
-                messagebox.showinfo("Successo", f"Collaboratore '{nome_std}' aggiunto.")
-            else:
-                messagebox.showerror("Errore", "Collaboratore già esistente.")
+            esecutore_gui.esegui(f"Aggiunta di '{nome}'", classifica_manager.aggiungi_collaboratore, nome,
+                                 al_termine=mostra_esito, pulsante=pulsante_collaboratore)
     
-    tk.Button(collaboratori_frame, text="Aggiungi Collaboratore", command=aggiungi_collaboratore_gui).pack(fill='x', pady=2)
+    pulsante_collaboratore = tk.Button(collaboratori_frame, text="Aggiungi Collaboratore", command=aggiungi_collaboratore_gui)
+    pulsante_collaboratore.pack(fill='x', pady=2)
 
 
     # Sezione "Gestione Punti"
@@ -1027,36 +5836,102 @@ def main():
     menu_azioni.pack(fill='x', pady=(0, 5))
     
     def aggiungi_punti_gui():
+        # I widget si leggono qui, nel thread di Tk: in background lavora solo il manager
         nome_input = entry_collaboratore_punti.get()
         azione = variabile_azione.get()
-        nome_std = classifica_manager.cerca_collaboratore_flessibile(nome_input)
-        if nome_std:
-            risultato = classifica_manager.aggiungi_azione(nome_std, azione)
-            messagebox.showinfo("Risultato", risultato)
-        else:
-            messagebox.showerror("Errore", f"Collaboratore '{nome_input}' non trovato.")
+
+        def registra():
+            nome_std = classifica_manager.cerca_collaboratore_flessibile(nome_input)
+            if nome_std:
+                return True, classifica_manager.aggiungi_azione(nome_std, azione)
+            messaggio = f"Collaboratore '{nome_input}' non trovato."
+            simili = classifica_manager.suggerisci_collaboratori(nome_input)
+            if simili:
+                messaggio += "\nForse intendevi:\n" + "\n".join(simili)
+            return False, messaggio
+
+        esecutore_gui.esegui(f"Aggiunta punti a '{nome_input}'", registra,
+                             al_termine=lambda esito: mostra_esito(esito, "Risultato"), pulsante=pulsante_punti)
     
-    tk.Button(punti_frame, text="Aggiungi Punti", command=aggiungi_punti_gui).pack(fill='x', pady=2)
+    pulsante_punti = tk.Button(punti_frame, text="Aggiungi Punti", command=aggiungi_punti_gui)
+    pulsante_punti.pack(fill='x', pady=2)
+
+    def importa_presenze_gui():
+        percorso = filedialog.askopenfilename(
+            title="Importa Presenze",
+            filetypes=[("File CSV o di testo", "*.csv *.txt"), ("Tutti i file", "*.*")],
+            parent=window,
+        )
+        if not percorso:
+            return
+        azione_predefinita = variabile_azione.get()
+
+        def importa():
+            try:
+                with open(percorso, 'r', encoding='utf-8-sig') as f:
+                    righe = leggi_righe_presenze(f.read(), azione_predefinita=azione_predefinita)
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                return False, f"Errore: Impossibile leggere il file: {e}"
+            # I nomi non trovati vengono segnalati con i suggerimenti, non creati
+            return True, classifica_manager.aggiungi_azioni_bulk(righe)
+
+        esecutore_gui.esegui(f"Importazione di {os.path.basename(percorso)}", importa,
+                             al_termine=mostra_importazione, pulsante=pulsante_importa)
+
+    def mostra_importazione(risultato):
+        successo, esiti = risultato
+        if not successo:
+            messagebox.showerror("Errore", esiti)
+            return
+        registrate = sum(1 for esito in esiti if esito["esito"] == "ok")
+
+        finestra_esito = Toplevel(window)
+        finestra_esito.title("Esito Importazione")
+        tk.Label(finestra_esito, text=f"Righe registrate: {registrate} su {len(esiti)}").pack(padx=10, pady=5)
+        testo = scrolledtext.ScrolledText(finestra_esito, width=90, height=20)
+        testo.pack(padx=10, pady=5, fill='both', expand=True)
+        for esito in esiti:
+            testo.insert(tk.END, f"{esito['riga']}. {esito['messaggio']}\n")
+        testo.configure(state='disabled')
+
+    pulsante_importa = tk.Button(punti_frame, text="Importa Presenze (CSV)", command=importa_presenze_gui)
+    pulsante_importa.pack(fill='x', pady=2)
 
     # Sezione "Report Online"
     report_frame = tk.LabelFrame(main_frame, text="Report e Gestione Online", padx=10, pady=10)
     report_frame.grid(row=0, column=2, padx=5, pady=5, sticky="nsew")
 
     def apri_report_locale():
-        classifica_manager.genera_report_html()
+        import webbrowser
         report_path = os.path.abspath("index.html")
-        webbrowser.open(f"file://{report_path}")
-    tk.Button(report_frame, text="Apri Report Locale", command=apri_report_locale).pack(fill='x', pady=2)
+        esecutore_gui.esegui("Generazione del report", classifica_manager.genera_report_html,
+                             al_termine=lambda _: webbrowser.open(f"file://{report_path}"), pulsante=pulsante_report_locale)
+    pulsante_report_locale = tk.Button(report_frame, text="Apri Report Locale", command=apri_report_locale)
+    pulsante_report_locale.pack(fill='x', pady=2)
+
+    def aggiorna_report_ora():
+        def report_aggiornato(_):
+            stato = pianificatore.stato()
+            messagebox.showinfo("Report Aggiornato", f"Report rigenerato e accodato per la pubblicazione.\nGenerazioni risparmiate finora grazie all'accorpamento: {stato['risparmiate']}.")
+        esecutore_gui.esegui("Aggiornamento del report", pianificatore.genera_ora, al_termine=report_aggiornato, pulsante=pulsante_aggiorna_report)
+    pulsante_aggiorna_report = tk.Button(report_frame, text="Aggiorna Report Ora", command=aggiorna_report_ora)
+    pulsante_aggiorna_report.pack(fill='x', pady=2)
 
     def carica_e_aggiorna():
-        if carica_su_github():
-            messagebox.showinfo("Successo", "Report HTML generato e caricato su GitHub con successo!")
-        else:
-            messagebox.showerror("Errore", "Caricamento su GitHub fallito.")
-    tk.Button(report_frame, text="Carica e Aggiorna su GitHub", command=carica_e_aggiorna).pack(fill='x', pady=2)
+        def caricamento_completato(successo):
+            # I dettagli di un errore arrivano come notifica da carica_su_github
+            if successo:
+                messagebox.showinfo("Successo", "Report HTML generato e caricato su GitHub con successo!")
+            else:
+                messagebox.showerror("Errore", "Caricamento su GitHub fallito.")
+        esecutore_gui.esegui("Caricamento su GitHub", carica_su_github, al_termine=caricamento_completato, pulsante=pulsante_github)
+    pulsante_github = tk.Button(report_frame, text="Carica e Aggiorna su GitHub", command=carica_e_aggiorna)
+    pulsante_github.pack(fill='x', pady=2)
 
-    tk.Button(report_frame, text="Avvia Server Web (ngrok)", command=lambda: gestisci_ngrok("start")).pack(fill='x', pady=2)
-    tk.Button(report_frame, text="Ferma Server Web (ngrok)", command=lambda: gestisci_ngrok("stop")).pack(fill='x', pady=2)
+    pulsante_avvia_ngrok = tk.Button(report_frame, text="Avvia Server Web (ngrok)", command=lambda: gestisci_ngrok("start"))
+    pulsante_avvia_ngrok.pack(fill='x', pady=2)
+    pulsante_ferma_ngrok = tk.Button(report_frame, text="Ferma Server Web (ngrok)", command=lambda: gestisci_ngrok("stop"))
+    pulsante_ferma_ngrok.pack(fill='x', pady=2)
     tk.Button(report_frame, text="Mostra QR Code", command=lambda: os.startfile("qrcode.png") if os.path.exists("qrcode.png") else messagebox.showinfo("Avviso", "QR code non generato. Avvia ngrok prima.")).pack(fill='x', pady=2)
     
     # Configura le colonne per essere ridimensionabili
@@ -1064,16 +5939,213 @@ def main():
     main_frame.grid_columnconfigure(1, weight=1)
     main_frame.grid_columnconfigure(2, weight=1)
 
-    # Funzione per gestire la chiusura dell'applicazione
+    # Barra di stato: operazioni in corso ed esito dell'ultima operazione
+    esecutore_gui.crea_barra_stato(window).pack(side=tk.BOTTOM, fill='x')
+    esecutore_gui.avvia()
+
+    # Funzione per gestire la chiusura dell'applicazione: l'attesa del push finale avviene
+    # in background e la finestra, che resta reattiva, si chiude al termine
     def on_closing():
-        if server_thread and server_thread.is_running:
-            server_thread.stop()
-        if public_url:
-            ngrok.kill()
-        window.destroy()
+        esecutore_gui.chiudi(chiudi_servizi, al_termine=lambda _: window.destroy())
 
     window.protocol("WM_DELETE_WINDOW", on_closing)
     window.mainloop()
+    blocco.rilascia()
+    return True
+
+# --- Modalità server e comandi da terminale (senza interfaccia grafica) ---
+def esegui_server(args):
+    """
+    Avvia il server di check-in senza interfaccia grafica, ad esempio su un server Linux senza display.
+    Resta in esecuzione fino a Ctrl+C o SIGTERM, poi arresta i servizi come alla chiusura della GUI.
+    """
+    blocco, errore = blocca_cartella_dati()
+    if blocco is None:
+        print(errore, file=sys.stderr)
+        return 1
+    _, chiudi_servizi = avvia_servizi(args.porta, pubblica=not args.senza_pubblicazione)
+    if args.ngrok:
+        successo, messaggio = avvia_ngrok(args.porta)
+        notifica_utente("ngrok", messaggio, errore=not successo)
+    arresto = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: arresto.set())
+    print(f"Server di check-in in ascolto sulla porta {args.porta}. Premi Ctrl+C per arrestarlo.")
+    try:
+        # L'attesa a intervalli lascia arrivare Ctrl+C anche su Windows
+        while not arresto.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    print("Arresto dei servizi in corso...")
+    chiudi_servizi()
+    blocco.rilascia()
+    return 0
+
+def comando_aggiungi(manager, args):
+    return manager.aggiungi_collaboratore(args.nome)
+
+def comando_punti(manager, args):
+    nome = manager.cerca_collaboratore_flessibile(args.nome)
+    if nome is None:
+        messaggio = f"Errore: Collaboratore '{args.nome}' non trovato."
+        simili = manager.suggerisci_collaboratori(args.nome)
+        if simili:
+            messaggio += "\nForse intendevi:\n" + "\n".join(simili)
+        return False, messaggio
+    messaggio = manager.aggiungi_azione(nome, args.azione, args.quantita)
+    return not messaggio.startswith("Errore"), messaggio
+
+def comando_importa(manager, args):
+    try:
+        with open(args.file, 'r', encoding='utf-8-sig') as f:
+            righe = leggi_righe_presenze(f.read(), azione_predefinita=args.azione)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return False, f"Errore: Impossibile leggere il file: {e}"
+    esiti = manager.aggiungi_azioni_bulk(righe, crea_mancanti=args.crea_mancanti)
+    for esito in esiti:
+        print(f"{esito['riga']}. {esito['messaggio']}")
+    registrate = sum(1 for esito in esiti if esito["esito"] == "ok")
+    return True, f"Righe registrate: {registrate} su {len(esiti)}"
+
+def comando_elimina(manager, args):
+    return manager.elimina_collaboratore(args.nome)
+
+def comando_rinomina(manager, args):
+    return manager.modifica_nome_collaboratore(args.nome, args.nuovo_nome)
+
+def comando_classifica(manager, args):
+    try:
+        if args.al:
+            classifica = manager.classifica_al(args.al, args.registrata)
+            if classifica is None:
+                return False, f"Errore: Né il giornale degli eventi né la cronologia contengono dati precedenti a {args.al}."
+        elif args.periodo:
+            classifica = manager.classifica_del_periodo(args.periodo, args.data)["classifica"]
+        else:
+            classifica = manager.classifica_ordinata()
+    except ValueError as e:
+        return False, f"Errore: {e}"
+    if not classifica:
+        return True, "La classifica è vuota."
+    for posizione, (nome, punteggio) in enumerate(classifica[:args.limite], start=1):
+        print(f"{posizione}. {nome}: {punteggio} punti")
+    return True, None
+
+def comando_esporta(manager, args):
+    """Scrive le azioni di tutti i collaboratori in JSON (come classifica_apex_data.json) o in CSV, una riga per azione."""
+    vista = manager.vista()
+    f = open(args.file, 'w', newline='', encoding='utf-8') if args.file else sys.stdout
+    try:
+        if args.formato == "json":
+            json.dump(dict(vista.dati), f, indent=4, ensure_ascii=False, default=serializza_json)
+            f.write("\n")
+        else:
+            scrittore = csv.writer(f)
+            scrittore.writerow(["nome", "azione", "punti", "data"])
+            for nome, azioni in vista.dati.items():
+                scrittore.writerows((nome, voce["azione"], voce["punti"], voce["data"]) for voce in azioni)
+    finally:
+        if args.file:
+            f.close()
+    return True, f"Esportati {len(vista.dati)} collaboratori in '{args.file}'." if args.file else None
+
+def comando_pota_cronologia(manager, args):
+    return manager.pota_cronologia(args.elimina_legacy)
+
+def comando_report(manager, args):
+    manager.pianificatore.segnala_modifica()
+    return True, "Report HTML generato nel file 'index.html'."
+
+def esegui_gestione(comando, args):
+    """
+    Esegue un comando di gestione sulla classifica e restituisce il codice di uscita.
+    Il report si rigenera una sola volta, alla fine, se il comando ha modificato qualcosa;
+    viene caricato su GitHub solo con --pubblica.
+    I comandi che possono scrivere acquisiscono il blocco della cartella dei dati e si rifiutano
+    di partire mentre l'interfaccia grafica, il server o un altro comando la stanno usando;
+    quelli di sola lettura caricano la classifica senza modificare alcun file.
+    """
+    blocco = None
+    if not args.sola_lettura:
+        blocco, errore = blocca_cartella_dati()
+        if blocco is None:
+            print(errore, file=sys.stderr)
+            return 1
+    try:
+        manager = crea_classifica_manager(sola_lettura=args.sola_lettura)
+        # Pianificatore mai avviato: raccoglie le richieste di rigenerazione del report del comando
+        manager.pianificatore = PianificatoreReport(manager.genera_report_html)
+        try:
+            successo, messaggio = comando(manager, args)
+            if manager.pianificatore.genera_ora(solo_se_in_sospeso=True) and args.pubblica and not carica_su_github():
+                successo = False
+        finally:
+            manager.chiudi()
+    finally:
+        if blocco is not None:
+            blocco.rilascia()
+    if messaggio:
+        print(messaggio, file=sys.stdout if successo else sys.stderr)
+    return 0 if successo else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Classifica dell'Apex Challenge: interfaccia grafica, server di check-in e comandi di gestione.",
+        epilog="Senza comando si apre l'interfaccia grafica. I comandi di gestione che modificano i file della classifica "
+               "si rifiutano di partire mentre l'interfaccia, il server o un altro comando sono in esecuzione; "
+               "classifica ed esporta, che leggono soltanto, si possono usare in qualsiasi momento.",
+    )
+    comandi = parser.add_subparsers(dest="comando", metavar="comando")
+    comandi.add_parser("gui", help="apre l'interfaccia grafica (predefinito)")
+    server = comandi.add_parser("serve", help="avvia solo il server di check-in, senza interfaccia grafica")
+    server.add_argument("--porta", type=int, default=8000, help="porta del server web (predefinita 8000)")
+    server.add_argument("--ngrok", action="store_true", help="apre anche il tunnel ngrok e salva il QR code in qrcode.png")
+    server.add_argument("--senza-pubblicazione", action="store_true", help="non carica il report aggiornato su GitHub")
+
+    # Opzione comune ai comandi di gestione
+    pubblicazione = argparse.ArgumentParser(add_help=False)
+    pubblicazione.add_argument("--pubblica", action="store_true", help="carica su GitHub il report aggiornato")
+
+    def gestione(nome, funzione, aiuto, alias=None, sola_lettura=False):
+        sotto = comandi.add_parser(nome, aliases=[alias] if alias else [], parents=[pubblicazione], help=aiuto)
+        sotto.set_defaults(gestione=funzione, sola_lettura=sola_lettura)
+        return sotto
+
+    gestione("aggiungi", comando_aggiungi, "aggiunge un collaboratore", "add").add_argument("nome")
+    punti = gestione("punti", comando_punti, "registra un'azione per un collaboratore", "points")
+    punti.add_argument("nome")
+    punti.add_argument("azione", help="es. \"Meeting day\"")
+    punti.add_argument("--quantita", type=int, default=1, help=f"numero di registrazioni, da 1 a {QUANTITA_MASSIMA} (predefinito 1)")
+    importa = gestione("importa", comando_importa, "registra le presenze di un file CSV", "import")
+    importa.add_argument("file")
+    importa.add_argument("--azione", default="Meeting day", help="azione per le righe che non la indicano")
+    importa.add_argument("--crea-mancanti", action="store_true",
+                         help="crea i collaboratori non trovati (altrimenti la riga viene segnalata con i nomi simili)")
+    gestione("elimina", comando_elimina, "elimina un collaboratore", "delete").add_argument("nome")
+    rinomina = gestione("rinomina", comando_rinomina, "cambia il nome di un collaboratore", "rename")
+    rinomina.add_argument("nome")
+    rinomina.add_argument("nuovo_nome")
+    classifica = gestione("classifica", comando_classifica, "mostra la classifica", "rank", sola_lettura=True)
+    classifica.add_argument("--limite", type=int, default=None, help="numero massimo di righe")
+    classifica.add_argument("--al", metavar="MOMENTO", help="classifica prima di 'AAAA-MM-GG[ HH:MM:SS]'")
+    classifica.add_argument("--registrata", action="store_true", help="con --al: come era registrata allora (giornale e cronologia)")
+    classifica.add_argument("--periodo", choices=GRANULARITA_PERIODI, help="solo i punti del giorno, della settimana o del mese")
+    classifica.add_argument("--data", help="con --periodo: 'AAAA-MM-GG' compreso nel periodo (oggi se assente)")
+    esporta = gestione("esporta", comando_esporta, "esporta le azioni in JSON o CSV", "export", sola_lettura=True)
+    esporta.add_argument("--formato", choices=("json", "csv"), default="csv")
+    esporta.add_argument("--file", help="file di destinazione (predefinito: output a schermo)")
+    gestione("report", comando_report, "rigenera il report HTML")
+    pota = gestione("pota-cronologia", comando_pota_cronologia, "dirada subito la cronologia secondo la politica di conservazione",
+                    "prune-history")
+    pota.add_argument("--elimina-legacy", action="store_true",
+                      help="cancella anche i file classifica_apex_data_<data>.json già importati nell'archivio")
+
+    args = parser.parse_args(argv)
+    if args.comando in (None, "gui"):
+        return 0 if avvia_gui() else 1
+    if args.comando == "serve":
+        return esegui_server(args)
+    return esegui_gestione(args.gestione, args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file